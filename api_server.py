@@ -0,0 +1,260 @@
+import argparse
+import asyncio
+import json
+import sqlite3
+import sys
+import threading
+import zlib
+from urllib.parse import urlencode
+
+import pandas as pd
+import tornado.web
+from tornado.ioloop import IOLoop
+
+import competition_config as config
+import storage
+
+# Read-only JSON / Arrow API over the scouting database, so strategy tools can
+# pull data without rendering Streamlit pages.
+#
+#   GET /api/events
+#   GET /api/events/<event>/calcs
+#   GET /api/events/<event>/normalized
+#   GET /api/events/<event>/matches                 match lineups and scores from TBA
+#   GET /api/events/<event>/teams/<team>/matches    a team's scouted match series
+#
+# <event> is an Event Key from config.EVENTS, or "all" for All Competitions.
+# Query parameters: format=json|arrow, limit, offset. Responses are gzipped,
+# carry an ETag tied to the latest data commit, and list endpoints are paginated.
+#
+# Run standalone with `python api_server.py`, or set API_ENABLED to serve it
+# from the dashboard process.
+
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+ALL_COMPETITIONS = "All Competitions"
+
+
+# Read-only connection with the files of an event key (every event for All
+# Competitions) attached; without one only the aggregate tables are visible
+def _connect(event_key=None):
+    if event_key == ALL_COMPETITIONS:
+        comp = ALL_COMPETITIONS
+    else:
+        comp = next((event["Name"] for event in config.EVENTS.values() if event["Event Key"] == event_key), None)
+    return storage.connect(comp, read_only=True)
+
+
+# Latest commit id; changes whenever the data does, so it makes a cheap ETag
+def _generation():
+    conn = _connect()
+    try:
+        row = conn.execute('SELECT MAX("Commit ID") FROM "Commit Log"').fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    conn.close()
+    return row[0] if row and row[0] is not None else 0
+
+
+def _event_key(event):
+    if event == "all":
+        return ALL_COMPETITIONS
+    if event not in config.EVENTS:
+        raise tornado.web.HTTPError(404, reason=f"Unknown event '{event}'")
+    return config.EVENTS[event]["Event Key"]
+
+
+# Run a filtered, ordered query one page at a time; returns (page, total rows)
+def _paged_query(event_key, table, columns, where, params, order_by, limit, offset):
+    conn = _connect(event_key)
+    try:
+        total = conn.execute(f'SELECT COUNT(*) FROM "{table}" WHERE {where}', params).fetchone()[0]
+        df = pd.read_sql(
+            f'SELECT {columns} FROM "{table}" WHERE {where} ORDER BY {order_by} LIMIT ? OFFSET ?',
+            conn,
+            params=list(params) + [limit, offset]
+        )
+    except (sqlite3.OperationalError, pd.errors.DatabaseError):
+        df, total = pd.DataFrame(), 0
+    finally:
+        conn.close()
+    return df, total
+
+
+def _team_numbers(team_keys):
+    if isinstance(team_keys, str):
+        team_keys = json.loads(team_keys)
+    return [int(key[3:]) for key in team_keys or [] if isinstance(key, str) and key[3:].isdigit()]
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    def set_default_headers(self):
+        self.set_header("Access-Control-Allow-Origin", "*")
+
+    # The ETag comes from the data generation, set before any query runs
+    def compute_etag(self):
+        return None
+
+    def write_error(self, status_code, **kwargs):
+        self.finish({"error": self._reason})
+
+    def _not_modified(self):
+        etag = f'"{_generation()}-{zlib.crc32(self.request.uri.encode()):x}"'
+        self.set_header("Etag", etag)
+        self.set_header("Cache-Control", "no-cache")
+        if self.check_etag_header():
+            self.set_status(304)
+            self.finish()
+            return True
+        return False
+
+    def _page_params(self):
+        try:
+            limit = int(self.get_query_argument("limit", config.API_PAGE_SIZE))
+            offset = int(self.get_query_argument("offset", 0))
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="limit and offset must be integers")
+        return max(1, min(limit, config.API_MAX_PAGE_SIZE)), max(0, offset)
+
+    def _wants_arrow(self):
+        fmt = self.get_query_argument("format", None)
+        if fmt is not None:
+            if fmt not in ("json", "arrow"):
+                raise tornado.web.HTTPError(400, reason="format must be json or arrow")
+            return fmt == "arrow"
+        return ARROW_MIME in self.request.headers.get("Accept", "")
+
+    def _next_url(self, limit, offset, total):
+        if offset + limit >= total:
+            return None
+        args = {key: values[-1].decode() for key, values in self.request.query_arguments.items()}
+        args.update(limit=limit, offset=offset + limit)
+        return f"{self.request.path}?{urlencode(args)}"
+
+    def _send_frame(self, df, total, limit, offset):
+        next_url = self._next_url(limit, offset, total)
+        self.set_header("X-Total-Count", str(total))
+        if next_url:
+            self.set_header("Link", f'<{next_url}>; rel="next"')
+
+        if self._wants_arrow():
+            import pyarrow as pa
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            self.set_header("Content-Type", ARROW_MIME)
+            self.finish(sink.getvalue().to_pybytes())
+        else:
+            self.set_header("Content-Type", "application/json")
+            records = json.loads(df.to_json(orient="records"))
+            self.finish(json.dumps({
+                "data": records, "total": total, "limit": limit, "offset": offset, "next": next_url
+            }))
+
+    # Query an event's table; the event key is the first parameter of `where`
+    async def _serve_query(self, table, columns, where, params, order_by, transform=None):
+        if self._not_modified():
+            return
+        limit, offset = self._page_params()
+        df, total = await IOLoop.current().run_in_executor(
+            None, _paged_query, params[0], table, columns, where, params, order_by, limit, offset
+        )
+        if transform is not None and not df.empty:
+            df = transform(df)
+        self._send_frame(df, total, limit, offset)
+
+
+class EventsHandler(BaseHandler):
+    def get(self):
+        if self._not_modified():
+            return
+        events = [
+            {"event": key, "Event Key": event["Event Key"], "Event Name": event["Name"],
+             "Competition Week": event["Competition Week"]}
+            for key, event in config.EVENTS.items()
+        ]
+        events.append({"event": "all", "Event Key": ALL_COMPETITIONS, "Event Name": ALL_COMPETITIONS,
+                       "Competition Week": "All Weeks"})
+        self.finish({"data": events, "generation": _generation()})
+
+
+class CalcsHandler(BaseHandler):
+    async def get(self, event):
+        await self._serve_query("Calcs", "*", '"Event Key" = ?', (_event_key(event),), '"Team Number"')
+
+
+class NormalizedHandler(BaseHandler):
+    async def get(self, event):
+        await self._serve_query("Normalized Data", "*", '"Event Key" = ?', (_event_key(event),), '"Team Number"')
+
+
+class TeamMatchesHandler(BaseHandler):
+    async def get(self, event, team):
+        await self._serve_query(
+            "Scouting_Data", "*", '"Event Key" = ? AND "Team Number" = ?', (_event_key(event), int(team)),
+            '"Team Match Number"'
+        )
+
+
+class LineupsHandler(BaseHandler):
+    @staticmethod
+    def _lineups(df):
+        df["Red Teams"] = df["Red Teams"].map(_team_numbers)
+        df["Blue Teams"] = df["Blue Teams"].map(_team_numbers)
+        return df
+
+    async def get(self, event):
+        columns = (
+            '"key" AS "Match Key", "comp_level" AS "Comp Level", "match_number" AS "Match Number", '
+            '"alliances.red.team_keys" AS "Red Teams", "alliances.blue.team_keys" AS "Blue Teams", '
+            '"alliances.red.score" AS "Red Score", "alliances.blue.score" AS "Blue Score"'
+        )
+        await self._serve_query(
+            "TBA Data", columns, '"Event Key" = ?', (_event_key(event),),
+            '"comp_level", "match_number"', transform=self._lineups
+        )
+
+
+def make_app():
+    return tornado.web.Application([
+        (r"/api/events", EventsHandler),
+        (r"/api/events/([^/]+)/calcs", CalcsHandler),
+        (r"/api/events/([^/]+)/normalized", NormalizedHandler),
+        (r"/api/events/([^/]+)/matches", LineupsHandler),
+        (r"/api/events/([^/]+)/teams/(\d+)/matches", TeamMatchesHandler),
+    ], compress_response=True)
+
+
+# Serve the API on its own event loop thread, e.g. from inside the Streamlit process
+def start_in_background(port=None):
+    port = port or config.API_PORT
+
+    def run():
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        make_app().listen(port)
+        IOLoop.current().start()
+
+    thread = threading.Thread(target=run, name="scouting-api", daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve scouting data as a read-only HTTP API.")
+    parser.add_argument("--port", type=int, default=config.API_PORT)
+    args = parser.parse_args(argv)
+
+    async def serve():
+        make_app().listen(args.port)
+        print(f"Serving scouting data API on http://localhost:{args.port}/api/events")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
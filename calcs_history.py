@@ -0,0 +1,192 @@
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import competition_config as config
+
+# Version history of the Calcs table. Every refresh that changes an event's
+# Calcs stores a new version holding only the cells that changed since the
+# previous one, in a long table of (Version, Event Key, Team Number, Column, Value).
+# A team joining the event is recorded as a "Team Number" cell with its number,
+# and a team dropping out as a "Team Number" cell with no value. Any version is
+# rebuilt from the latest value of each cell at or before it.
+
+VERSIONS_TABLE = "Calcs Versions"
+HISTORY_TABLE = "Calcs History"
+PRESENCE_COLUMN = "Team Number"
+
+
+def _connect():
+    return sqlite3.connect(config.DATABASE_PATH)
+
+
+def _create_tables(conn):
+    conn.execute(
+        f'CREATE TABLE IF NOT EXISTS "{VERSIONS_TABLE}" ('
+        '"Version" INTEGER PRIMARY KEY AUTOINCREMENT, "Event Key" TEXT, "Refresh ID" INTEGER, '
+        '"Created At" TEXT, "Teams" INTEGER, "Cells Changed" INTEGER)'
+    )
+    conn.execute(
+        f'CREATE TABLE IF NOT EXISTS "{HISTORY_TABLE}" ('
+        '"Version" INTEGER, "Event Key" TEXT, "Team Number" INTEGER, "Column" TEXT, "Value" REAL)'
+    )
+    conn.execute(
+        f'CREATE INDEX IF NOT EXISTS "{HISTORY_TABLE} Cell" ON "{HISTORY_TABLE}" '
+        '("Event Key", "Team Number", "Column", "Version")'
+    )
+
+
+def _has_history(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (HISTORY_TABLE,)
+    ).fetchone() is not None
+
+
+# Numeric Calcs columns tracked by the history, as a team-indexed frame
+def _tracked(calc_df):
+    numeric = calc_df.set_index("Team Number").select_dtypes("number")
+    numeric.index = numeric.index.astype(int)
+    return numeric.astype(float)
+
+
+# Cells of `current` that differ from `previous`, plus presence markers for teams
+# that joined or left, as long rows (Team Number, Column, Value)
+def _deltas(previous, current):
+    teams = current.index.union(previous.index)
+    columns = current.columns
+    old = previous.reindex(index=teams, columns=columns).to_numpy()
+    new = current.reindex(index=teams).to_numpy()
+
+    changed = ~((old == new) | (np.isnan(old) & np.isnan(new)))
+    changed[~teams.isin(current.index)] = False
+    rows, cols = np.nonzero(changed)
+    cells = pd.DataFrame({
+        "Team Number": teams[rows],
+        "Column": columns[cols],
+        "Value": new[rows, cols],
+    })
+
+    joined = current.index.difference(previous.index)
+    left = previous.index.difference(current.index)
+    markers = pd.DataFrame({
+        "Team Number": joined.append(left),
+        "Column": PRESENCE_COLUMN,
+        "Value": np.concatenate([joined.to_numpy(dtype=float), np.full(len(left), np.nan)]),
+    })
+    return pd.concat([markers, cells], ignore_index=True)
+
+
+# Latest value of every cell of an event at or before `version`, as long rows
+def _cells(conn, event_key, version=None):
+    bound = "" if version is None else ' AND "Version" <= ?'
+    params = (event_key,) if version is None else (event_key, version)
+    return pd.read_sql(
+        f'SELECT h."Team Number", h."Column", h."Value" FROM "{HISTORY_TABLE}" h '
+        f'JOIN (SELECT "Team Number", "Column", MAX("Version") AS "Version" FROM "{HISTORY_TABLE}" '
+        f'WHERE "Event Key" = ?{bound} GROUP BY "Team Number", "Column") latest '
+        f'USING ("Team Number", "Column", "Version") WHERE h."Event Key" = ?',
+        conn,
+        params=params + (event_key,)
+    )
+
+
+def _pivot(cells):
+    present = cells[(cells["Column"] == PRESENCE_COLUMN) & cells["Value"].notna()]["Team Number"]
+    cells = cells[(cells["Column"] != PRESENCE_COLUMN) & cells["Team Number"].isin(present)]
+    wide = cells.pivot(index="Team Number", columns="Column", values="Value")
+    wide = wide.reindex(index=pd.Index(sorted(present), name="Team Number"))
+    wide.columns.name = None
+    return wide
+
+
+# Store a new version of an event's Calcs if anything changed since the last one.
+# Returns the new version number, or None when nothing changed.
+def record(calc_df, event_key, refresh_id=None):
+    current = _tracked(calc_df)
+    conn = _connect()
+    try:
+        _create_tables(conn)
+        previous = _pivot(_cells(conn, event_key))
+        deltas = _deltas(previous, current)
+        if deltas.empty:
+            return None
+
+        cursor = conn.execute(
+            f'INSERT INTO "{VERSIONS_TABLE}" ("Event Key", "Refresh ID", "Created At", "Teams", "Cells Changed") '
+            'VALUES (?, ?, ?, ?, ?)',
+            (event_key, refresh_id, datetime.now().isoformat(timespec="seconds"), len(current), len(deltas))
+        )
+        version = cursor.lastrowid
+        conn.executemany(
+            f'INSERT INTO "{HISTORY_TABLE}" ("Version", "Event Key", "Team Number", "Column", "Value") '
+            'VALUES (?, ?, ?, ?, ?)',
+            (
+                (version, event_key, int(team), column, None if np.isnan(value) else float(value))
+                for team, column, value in deltas.itertuples(index=False)
+            )
+        )
+        conn.commit()
+        return version
+    finally:
+        conn.close()
+
+
+# Versions stored for an event, oldest first
+def versions(event_key):
+    conn = _connect()
+    try:
+        if not _has_history(conn):
+            return pd.DataFrame(columns=["Version", "Event Key", "Refresh ID", "Created At", "Teams", "Cells Changed"])
+        return pd.read_sql(
+            f'SELECT * FROM "{VERSIONS_TABLE}" WHERE "Event Key" = ? ORDER BY "Version"', conn, params=(event_key,)
+        )
+    finally:
+        conn.close()
+
+
+# An event's tracked Calcs columns as they were at `version` (the latest by default),
+# one row per team
+def reconstruct(event_key, version=None):
+    conn = _connect()
+    try:
+        if not _has_history(conn):
+            return pd.DataFrame(columns=["Team Number"])
+        return _pivot(_cells(conn, event_key, version)).reset_index()
+    finally:
+        conn.close()
+
+
+# One team's values of the given columns at every version of the event, carrying
+# unchanged values forward. Versions before the team joined are left out.
+def metric_series(event_key, team_number, columns):
+    conn = _connect()
+    try:
+        if not _has_history(conn):
+            return pd.DataFrame(columns=["Version", "Created At"] + list(columns))
+        placeholders = ", ".join("?" for _ in range(len(columns) + 1))
+        cells = pd.read_sql(
+            f'SELECT "Version", "Column", "Value" FROM "{HISTORY_TABLE}" '
+            f'WHERE "Event Key" = ? AND "Team Number" = ? AND "Column" IN ({placeholders}) ORDER BY "Version"',
+            conn,
+            params=(event_key, int(team_number), PRESENCE_COLUMN, *columns)
+        )
+        event_versions = pd.read_sql(
+            f'SELECT "Version", "Created At" FROM "{VERSIONS_TABLE}" WHERE "Event Key" = ? ORDER BY "Version"',
+            conn,
+            params=(event_key,)
+        )
+    finally:
+        conn.close()
+
+    series = (cells.pivot(index="Version", columns="Column", values="Value")
+              .reindex(event_versions["Version"])
+              .ffill())
+    for column in [PRESENCE_COLUMN, *columns]:
+        if column not in series.columns:
+            series[column] = np.nan
+    series = series[series[PRESENCE_COLUMN].notna()]
+    series = series[list(columns)].reset_index()
+    series.columns.name = None
+    return event_versions.merge(series, on="Version")
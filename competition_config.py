@@ -37,6 +37,14 @@ EVENTS = {
     }
 }
 
+# All Competitions attaches one database file per event, and SQLite allows at most
+# 10 attached files in most builds, so keep this to 9 events. To archive a finished
+# event, remove it here; its snapshot files stay on disk.
+
+# Each event reads from its Google Sheet unless it sets a "Data Source", e.g. to read
+# "Data Entry" and "Pit Scouting" CSV or Parquet files exported from the tablets:
+#     "Data Source": {"type": "local", "path": "exports/2025mawor"}
+
 # Google Sheet name
 GOOGLE_SHEET = "Test Data"
 
@@ -57,6 +65,44 @@ except:
 NEXUS_URL = "https://frc.nexus/api/v1/event/" + EVENT_KEY
 NEXUS_HEADERS = {"Nexus-Api-Key": NEXUS_API_KEY}
 
+# ============================================================================
+# DATABASE & REFRESH SETTINGS
+# ============================================================================
+
+# SQLite database shared by the refresh pipeline and the dashboard pages. It holds
+# the refresh logs and which snapshot file is current for each event; the data
+# itself lives in snapshot files in EVENT_DATABASE_DIR ("events" next to
+# DATABASE_PATH by default).
+DATABASE_PATH = os.environ.get("SCOUTING_DATABASE_PATH", "Scouting_Data.db")
+EVENT_DATABASE_DIR = os.environ.get("SCOUTING_EVENT_DATABASE_DIR", "")
+
+# Events refreshed at the same time (each event writes its own snapshot file)
+REFRESH_WORKERS = 4
+
+# Replaced snapshot files are kept this long, so pages still reading one finish first
+SNAPSHOT_RETENTION_SECONDS = 600
+
+# Set to True when a separate refresh worker (`python db_calc.py --watch`) keeps the
+# database up to date, so the dashboard only reads and never runs a refresh itself
+EXTERNAL_REFRESH_WORKER = os.environ.get("EXTERNAL_REFRESH_WORKER", "").lower() in ("1", "true", "yes")
+
+# A refresh that finished less than this many seconds ago is reused instead of rerun
+REFRESH_COOLDOWN_SECONDS = 30
+
+# Google Sheets read budget (the default per-user quota is 60 reads per minute)
+SHEETS_REQUESTS_PER_MINUTE = 60
+
+# Retries for throttled (429) or failed (5xx) Sheets requests, with exponential backoff
+SHEETS_MAX_RETRIES = 5
+SHEETS_BACKOFF_BASE_SECONDS = 1.0
+SHEETS_BACKOFF_MAX_SECONDS = 32.0
+
+# Seconds between refreshes in watch mode
+REFRESH_INTERVAL_SECONDS = 120
+
+# Consecutive failed refreshes before watch mode exits with an error
+REFRESH_MAX_FAILURES = 5
+
 # ============================================================================
 # SCORING RULES
 # ============================================================================
@@ -87,6 +133,92 @@ TELEOP_SCORES = {
 # K value for RAW calculation: RAW_new = RAW_old + K * (actual - RAW_old)
 RAW_K = 0.4
 
+# Streaming ingestion (`python ingest_watch.py`): per-match submission files dropped in
+# <directory>/<event key>/ are merged into that event's local data source and the
+# event is recomputed every batch_size files or batch_seconds, whichever comes first
+STREAM_INGEST = {
+    "directory": "submissions",
+    "batch_size": 6,
+    "batch_seconds": 10,
+}
+
+# Read-only data API (api_server.py). Run it with `python api_server.py`, or set
+# API_ENABLED to serve it from the dashboard process
+API_ENABLED = os.environ.get("SCOUTING_API_ENABLED", "").lower() in ("1", "true", "yes")
+API_PORT = 8502
+API_PAGE_SIZE = 500
+API_MAX_PAGE_SIZE = 5000
+
+# ============================================================================
+# MATCH PREDICTION SETTINGS
+# ============================================================================
+
+# Monte Carlo simulations per match for win probabilities on the Live Competition page
+PREDICTION_SIMULATIONS = 5000
+
+# How much a team's latest RAW counts versus its match average when predicting scores
+PREDICTION_RAW_WEIGHT = 0.5
+
+# ============================================================================
+# CHART CACHE
+# ============================================================================
+
+# Number of team score trend figures kept in memory (least recently used are dropped)
+FIGURE_CACHE_SIZE = 256
+
+# ============================================================================
+# CALCS HISTORY
+# ============================================================================
+
+# Rankings charted over the refreshes of an event on the Single Team page
+RANK_HISTORY_COLUMNS = ['ACE Rank', 'RAW Rank', 'Score Rank', 'OPR Rank']
+
+# ============================================================================
+# STARTUP
+# ============================================================================
+
+# Longest a cold import of the app (main.py and the home page's imports) may take,
+# checked by scripts/import_cost.py --check
+STARTUP_IMPORT_BUDGET_SECONDS = 1.0
+
+# Modules that must not be imported before the first page renders
+STARTUP_FORBIDDEN_MODULES = ["db_calc", "gspread", "google.oauth2", "requests", "pandas", "matplotlib"]
+
+# ============================================================================
+# DIAGNOSTICS
+# ============================================================================
+
+# Queries slower than this are logged, with the page that ran them
+SLOW_QUERY_SECONDS = 0.25
+
+# Most recent queries and page reruns kept in memory for the Diagnostics page
+DIAGNOSTICS_QUERY_BUFFER = 5000
+DIAGNOSTICS_RERUN_BUFFER = 1000
+
+# ============================================================================
+# PICK LIST SETTINGS
+# ============================================================================
+
+PICKLIST_CONFIG = {
+    # Calcs metrics where robots complement each other: a partner strong where we are
+    # weak adds more than one duplicating our strengths (weights per metric)
+    'coverage': {
+        'Auto RAW': 1.0,
+        'Teleop RAW': 1.5,
+        'Endgame RAW': 1.0,
+    },
+    # Calcs metrics averaged over the alliance
+    'average': {
+        'ACE': 1.0,
+        'Consistency': 0.5,
+        'Dominance AVG': 0.5,
+    },
+    # Number of alliances to recommend
+    'recommendations': 15,
+    # Second-pick candidates evaluated per step of the pruned search
+    'block_size': 8,
+}
+
 # ============================================================================
 # COLUMN CONFIGURATIONS
 # ============================================================================
@@ -104,6 +236,15 @@ ENDGAME_COLUMN = "Endgame"
 # Column used for auto scoring in the data
 AUTO_COLUMN = "Auto Climb"
 
+# Other match sheet columns to load besides the scoring and single team columns
+EXTRA_MATCH_COLUMNS = ['Scouter Initials']
+
+# Column with who scouted each row, used for scouter reliability (must be loaded above)
+SCOUTER_COLUMN = "Scouter Initials"
+
+# Ridge penalty for the scouter bias fit; pulls scouters with few rows towards zero bias
+SCOUTER_BIAS_RIDGE = 1.0
+
 # ============================================================================
 # CALCULATED METRICS
 # ============================================================================
@@ -137,6 +278,11 @@ CALCS_COLUMN_ORDER = [
     'Dominance AVG',
     'Confidence',
     'Confidence Rank',
+    'OPR',
+    'OPR Rank',
+    'DPR',
+    'CCWM',
+    'CCWM Rank',
     'Event Key',
     'Event Name',
     'Competition Week'
@@ -148,6 +294,7 @@ TELEOP_AVG_COLUMNS = ['Teleop Score AVG']
 ENDGAME_AVG_COLUMNS = ['Climb Score AVG']
 TOTAL_AVG_COLUMNS = ['Total Score AVG', 'Total Score STDEV', 'Consistency']
 RAW_COLUMNS = ['Auto RAW', 'Teleop RAW', 'Endgame RAW', 'Total RAW', 'Dominance AVG', 'Confidence', 'ACE']
+RATING_COLUMNS = ['OPR', 'CCWM']
 SCORING_AVG_COLUMNS = [
     'ACE',
     'Auto Score AVG', 
@@ -162,15 +309,19 @@ SCORING_AVG_COLUMNS = [
     'Total RAW',
     'Dominance AVG',
     'Confidence',
+    'OPR',
+    'DPR',
+    'CCWM',
 ]
 
-RANK_COLUMNS = ['Score Rank', 'RAW Rank', 'ACE Rank', 'Confidence Rank']
+RANK_COLUMNS = ['Score Rank', 'RAW Rank', 'ACE Rank', 'Confidence Rank', 'OPR Rank', 'CCWM Rank']
 # Color schemes for background gradients in the Averages section
 AUTO_COLORS = ["#252525", "#010014"]
 TELEOP_COLORS = ["#252525", "#301500"]
 ENDGAME_COLORS = ["#252525", "#302d00"]
 TOTAL_COLORS = ["#252525", "#003003"]
 RAW_COLORS = ["#252525", "#1E0030"]
+RATING_COLORS = ["#252525", "#300018"]
 
 # Alternative pastel set (if you prefer softer colors):
 GRAPH_LINE_COLORS_PASTEL = {
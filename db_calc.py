@@ -1,16 +1,108 @@
-import gspread
+import csv
 import json
+import math
 import pandas as pd
 import sqlite3
-import requests
-from google.oauth2.service_account import Credentials
 import competition_config as config
+import ratings
+import calcs_history
+import storage
 import streamlit as st
 import os
+import sys
+import time
+import queue
+import argparse
+import traceback
+import threading
+import shutil
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
 
-# Write a dataframe to SQLite database
-def write_to_db(dataframe, table_name):
-    conn = sqlite3.connect("Scouting_Data.db")
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Hold an exclusive lock on the aggregate database while a refresh writes to it.
+# The lock is advisory and lives in a sidecar file so it works across processes
+# (the refresh worker CLI and the Streamlit app) without blocking readers.
+@contextmanager
+def refresh_lock(db_path=None):
+    lock_path = (db_path or config.DATABASE_PATH) + ".lock"
+    with open(lock_path, "a+") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after ~10 seconds, keep waiting
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+# Log a refresh as running when it starts, so readers can tell one is under way.
+# Returns its Refresh ID for record_refresh.
+def begin_refresh(started_at):
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS "Refresh Log" ('
+        '"Refresh ID" INTEGER PRIMARY KEY AUTOINCREMENT, '
+        '"Started At" TEXT, "Duration" REAL, "Status" TEXT, "Error" TEXT)'
+    )
+    cursor = conn.execute(
+        'INSERT INTO "Refresh Log" ("Started At", "Status", "Error") VALUES (?, ?, ?)',
+        (started_at.isoformat(timespec="seconds"), "running", "")
+    )
+    conn.commit()
+    conn.close()
+    return cursor.lastrowid
+
+# Record the outcome of a refresh so readers can tell how fresh the data is
+def record_refresh(refresh_id, duration, status, error=""):
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    conn.execute(
+        'UPDATE "Refresh Log" SET "Duration" = ?, "Status" = ?, "Error" = ? WHERE "Refresh ID" = ?',
+        (round(duration, 2), status, error, refresh_id)
+    )
+    conn.commit()
+    conn.close()
+
+# Publish the snapshot files of an event (or of all competitions) and log the
+# commit, in one transaction. `files` maps event keys to the files the scope
+# reads. The latest Commit ID is the data generation readers key their caches
+# on, so each event becomes visible as soon as it is committed.
+def record_commit(refresh_id, event_key, rows, files):
+    conn = sqlite3.connect(config.DATABASE_PATH, timeout=30)
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS "Commit Log" ('
+        '"Commit ID" INTEGER PRIMARY KEY AUTOINCREMENT, '
+        '"Refresh ID" INTEGER, "Event Key" TEXT, "Rows" INTEGER, "Committed At" TEXT)'
+    )
+    storage.create_snapshots_table(conn)
+    storage.publish(conn, event_key, files)
+    conn.execute(
+        'INSERT INTO "Commit Log" ("Refresh ID", "Event Key", "Rows", "Committed At") VALUES (?, ?, ?, ?)',
+        (refresh_id, event_key, rows, datetime.now().isoformat(timespec="seconds"))
+    )
+    conn.commit()
+    conn.close()
+
+# Write a dataframe to SQLite database (the aggregate file unless `path` is given)
+def write_to_db(dataframe, table_name, path=None):
+    conn = sqlite3.connect(path or config.DATABASE_PATH)
     cursor = conn.cursor()
 
     # Check if table exists and handle schema changes
@@ -32,328 +124,1132 @@ def write_to_db(dataframe, table_name):
     if 'Event Key' in dataframe.columns:
         dataframe = dataframe.drop_duplicates()
 
-        try:
-            cursor.execute(
-                f'DELETE FROM "{table_name}" WHERE "Event Key" = ?',
-                (dataframe['Event Key'].iloc[0],)
-            )
-            conn.commit()
-        except Exception as e:
-            print(f"Warning {table_name}: {e}")
+        # Replace the event's previous rows. Snapshot files are always new, so
+        # there is usually no table to clear yet.
+        if table_exists:
+            try:
+                cursor.execute(
+                    f'DELETE FROM "{table_name}" WHERE "Event Key" = ?',
+                    (dataframe['Event Key'].iloc[0],)
+                )
+                conn.commit()
+            except Exception as e:
+                print(f"Warning {table_name}: {e}")
 
     dataframe.to_sql(table_name, conn, if_exists='append', index=False)
     conn.close()
 
-# Main calculation and data processing function
-def perform_calculations():
-    for competition in config.EVENTS:
-    # Google Sheets API scopes for authentication
-        apis = [
-            "https://www.googleapis.com/auth/spreadsheets",
-            "https://www.googleapis.com/auth/drive"
-        ]
-        
-        # Authenticate using service account credentials
-        # Try Streamlit secrets first (for cloud deployment), then fall back to local file
+# Extract team numbers from a TBA team key list (["frc1100", ...]), JSON encoded or not
+def _team_numbers(team_keys):
+    if isinstance(team_keys, str):
         try:
-            # Use Streamlit secrets (for Streamlit Cloud)
-            service_account_info = dict(st.secrets["gcp_service_account"])
-            creds = Credentials.from_service_account_info(service_account_info, scopes=apis)
-        except (FileNotFoundError, KeyError):
-            # Fall back to local file (for local development)
-            creds = Credentials.from_service_account_file(
-                "data_reader_account.json",
-                scopes=apis
+            team_keys = json.loads(team_keys)
+        except json.JSONDecodeError:
+            return []
+    if not isinstance(team_keys, list):
+        return []
+    return [int(key[3:]) for key in team_keys if isinstance(key, str) and key.startswith('frc') and key[3:].isdigit()]
+
+# One row per alliance per played qualification match, with the alliance's teams,
+# its score and the opposing alliance's score
+def alliance_rows(tba_df):
+    columns = ['Match Number', 'Alliance', 'Teams', 'Score', 'Opponent Score']
+    needed = {'comp_level', 'match_number', 'alliances.red.team_keys', 'alliances.blue.team_keys',
+              'alliances.red.score', 'alliances.blue.score'}
+    if tba_df.empty or not needed.issubset(tba_df.columns):
+        return pd.DataFrame(columns=columns)
+
+    qm = tba_df[tba_df['comp_level'] == 'qm']
+    if 'key' in qm.columns:
+        qm = qm.drop_duplicates(subset=[col for col in ('Event Key', 'key') if col in qm.columns])
+
+    frames = []
+    for color, opponent in (('red', 'blue'), ('blue', 'red')):
+        frames.append(pd.DataFrame({
+            'Match Number': qm['match_number'].to_numpy(),
+            'Alliance': color,
+            'Teams': qm[f'alliances.{color}.team_keys'].map(_team_numbers).to_numpy(),
+            'Score': pd.to_numeric(qm[f'alliances.{color}.score'], errors='coerce').to_numpy(),
+            'Opponent Score': pd.to_numeric(qm[f'alliances.{opponent}.score'], errors='coerce').to_numpy(),
+        }))
+    rows = pd.concat(frames, ignore_index=True)
+
+    # Unplayed matches are reported with a score of -1
+    rows = rows[(rows['Score'] >= 0) & (rows['Opponent Score'] >= 0) & (rows['Teams'].map(len) > 0)]
+    return rows.sort_values(['Match Number', 'Alliance']).reset_index(drop=True)[columns]
+
+TBA_TABLE = storage.TBA_TABLE
+
+# Slim TBA frame (the columns of storage.TBA_COLUMNS) from the match list the TBA
+# API returns. Only the fields the dashboard reads get a column; each match is
+# also kept whole in "Raw". Team keys, videos and the raw record stay Python
+# objects until written.
+def tba_frame(matches):
+    rows = []
+    for match in matches:
+        alliances = match.get('alliances') or {}
+        red, blue = alliances.get('red') or {}, alliances.get('blue') or {}
+        rows.append({
+            'key': match.get('key'),
+            'comp_level': match.get('comp_level'),
+            'set_number': match.get('set_number'),
+            'match_number': match.get('match_number'),
+            'alliances.red.team_keys': red.get('team_keys') or [],
+            'alliances.blue.team_keys': blue.get('team_keys') or [],
+            'alliances.red.score': red.get('score'),
+            'alliances.blue.score': blue.get('score'),
+            'videos': match.get('videos') or [],
+            'Raw': match,
+        })
+    columns = [col for col in storage.TBA_COLUMNS if col not in ('Event Key', 'Event Name')]
+    return pd.DataFrame(rows, columns=columns)
+
+# Write an event's TBA frame into its new file: lists as JSON and the raw
+# records compressed against a dictionary made from the first match
+def write_tba(tba_df, path):
+    dictionary = storage.tba_dictionary(tba_df['Raw'].iloc[0])
+    tba_df = tba_df.assign(
+        Raw=tba_df['Raw'].map(lambda match: storage.encode_tba(match, dictionary)),
+        **{col: tba_df[col].map(json.dumps) for col in storage.TBA_JSON_COLUMNS}
+    )
+    conn = sqlite3.connect(path)
+    storage.create_tba_tables(conn)
+    conn.execute(
+        f'INSERT INTO {_quote(storage.TBA_DICTIONARY_TABLE)} ("Event Key", "Dictionary") VALUES (?, ?)',
+        (tba_df['Event Key'].iloc[0], dictionary)
+    )
+    conn.commit()
+    conn.close()
+    write_to_db(tba_df, TBA_TABLE, path)
+
+MATCH_ACCURACY_TABLE = "Match Accuracy"
+MATCH_ACCURACY_COLUMNS = ['Match Number', 'Alliance', 'Teams', 'Teams Scouted', 'Scouted Auto', 'Scouted Teleop',
+                          'Scouted Endgame', 'Scouted Score', 'TBA Score', 'Error', 'Abs Error']
+
+# Scouted vs TBA totals for every played qualification match alliance: the
+# scouted scores of the alliance's teams summed next to the score TBA reports,
+# with the signed (scouted - TBA) and absolute error. A team scouted more than
+# once in a match counts with its average. Alliances with no scouted team have
+# no error.
+def match_accuracy(df, tba_df):
+    alliances = alliance_rows(tba_df)
+    if alliances.empty or df.empty:
+        return pd.DataFrame(columns=MATCH_ACCURACY_COLUMNS)
+
+    lineups = (alliances[['Match Number', 'Alliance', 'Teams']]
+               .explode('Teams')
+               .rename(columns={'Teams': 'Team Number'}))
+    lineups['Team Number'] = lineups['Team Number'].astype(int)
+    scouted = (df.groupby(['Match Number', 'Team Number'], as_index=False)
+               [['Auto Score', 'Teleop Score', 'Endgame Score', 'Total Score']].mean())
+    totals = (lineups.merge(scouted, on=['Match Number', 'Team Number'])
+              .groupby(['Match Number', 'Alliance'], as_index=False)
+              .agg(**{'Teams Scouted': ('Team Number', 'size'),
+                      'Scouted Auto': ('Auto Score', 'sum'),
+                      'Scouted Teleop': ('Teleop Score', 'sum'),
+                      'Scouted Endgame': ('Endgame Score', 'sum'),
+                      'Scouted Score': ('Total Score', 'sum')}))
+
+    accuracy = alliances.merge(totals, on=['Match Number', 'Alliance'], how='left')
+    accuracy['Teams'] = accuracy['Teams'].map(lambda teams: ", ".join(str(team) for team in teams))
+    accuracy['Teams Scouted'] = accuracy['Teams Scouted'].fillna(0).astype(int)
+    accuracy['TBA Score'] = accuracy['Score']
+    accuracy['Error'] = accuracy['Scouted Score'] - accuracy['TBA Score']
+    accuracy['Abs Error'] = accuracy['Error'].abs()
+    return accuracy[MATCH_ACCURACY_COLUMNS].round(2)
+
+SCOUTER_RELIABILITY_TABLE = "Scouter Reliability"
+
+# Per-scouter bias and error variance for an event: every scouted row is joined
+# to its alliance's TBA result, and the error of each alliance whose robots were
+# all scouted is attributed to its scouters by least squares (ratings.scouter_bias).
+# A negative bias means the scouter's robots are under-counted.
+def scouter_reliability(df, tba_df):
+    alliances = alliance_rows(tba_df)
+    if alliances.empty or df.empty or config.SCOUTER_COLUMN not in df.columns:
+        return ratings.scouter_bias(pd.DataFrame(), None, config.SCOUTER_BIAS_RIDGE)
+
+    alliances['Alliance'] = alliances.index
+    lineups = alliances[['Alliance', 'Match Number', 'Teams']].explode('Teams').rename(columns={'Teams': 'Team Number'})
+    lineups['Team Number'] = lineups['Team Number'].astype(int)
+    scouted = df[['Match Number', 'Team Number', 'Total Score']].assign(
+        Scouter=df[config.SCOUTER_COLUMN].fillna('').astype(str).str.strip().str.upper().replace('', 'Unknown')
+    )
+    rows = lineups.merge(scouted, on=['Match Number', 'Team Number'])
+
+    # A robot scouted twice counts once, each row carrying half of it
+    rows['Weight'] = 1 / rows.groupby(['Alliance', 'Team Number'])['Team Number'].transform('size')
+    robots = rows.groupby('Alliance')['Team Number'].nunique()
+    complete = robots.index[robots.to_numpy() == alliances.loc[robots.index, 'Teams'].map(len).to_numpy()]
+    rows = rows[rows['Alliance'].isin(complete)]
+    if rows.empty:
+        return ratings.scouter_bias(rows, None, config.SCOUTER_BIAS_RIDGE)
+
+    totals = (rows['Total Score'] * rows['Weight']).groupby(rows['Alliance']).sum()
+    errors = (totals - alliances.loc[totals.index, 'Score']).to_numpy(dtype=float)
+    rows = rows.assign(Alliance=pd.Index(totals.index).get_indexer(rows['Alliance']))
+    return ratings.scouter_bias(rows, errors, config.SCOUTER_BIAS_RIDGE).round(2)
+
+# Indexes of an event file: a team's matches, and for Match Accuracy looking up
+# one match and sorting the event by discrepancy
+def index_event_tables(path):
+    conn = sqlite3.connect(path)
+    if _table_type(conn, MATCH_TABLE) == 'table':
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "{MATCH_TABLE} Team" ON {_quote(MATCH_TABLE)} ("Event Name", "Team Number")')
+    if _table_type(conn, MATCH_ACCURACY_TABLE) == 'table':
+        table = _quote(MATCH_ACCURACY_TABLE)
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "{MATCH_ACCURACY_TABLE} Match" ON {table} ("Event Name", "Match Number")')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "{MATCH_ACCURACY_TABLE} Error" ON {table} ("Event Name", "Abs Error")')
+    conn.commit()
+    conn.close()
+
+# ============================================================================
+# GOOGLE SHEETS READER
+# ============================================================================
+
+MATCH_SHEET = "Data Entry"
+PIT_SHEET = "Pit Scouting"
+
+# Columns of the match sheet needed for scoring, display and analysis
+def required_match_columns():
+    columns = ['Team Number', 'Match Number', config.AUTO_COLUMN, config.ENDGAME_COLUMN]
+    columns += list(config.TELEOP_SCORES.keys())
+    for phase_columns in config.SINGLE_TEAM_COLUMNS.values():
+        columns += phase_columns
+    columns += config.EXTRA_MATCH_COLUMNS
+    return list(dict.fromkeys(columns))
+
+# Convert a column letter range like "C2:E" from 0-based column indices
+def _column_range(first, last):
+    import gspread
+    first_letter = gspread.utils.rowcol_to_a1(1, first + 1)[:-1]
+    last_letter = gspread.utils.rowcol_to_a1(1, last + 1)[:-1]
+    return f"{first_letter}2:{last_letter}"
+
+# Group sorted column indices into contiguous runs so each run is one range
+def _contiguous_runs(indices):
+    runs = []
+    for index in sorted(indices):
+        if runs and index == runs[-1][1] + 1:
+            runs[-1][1] = index
+        else:
+            runs.append([index, index])
+    return runs
+
+# Turn a column of sheet values into numbers when every non-blank cell is numeric
+# (get_all_records did the same per cell; blanks become NaN instead of "")
+def _numericise(series):
+    blank = series.eq("")
+    numeric = pd.to_numeric(series.mask(blank), errors="coerce")
+    if numeric.notna().sum() == (~blank).sum():
+        return numeric
+    return series
+
+# Build a dataframe straight from column-major value arrays, padding short columns
+def _columns_to_df(names, columns):
+    row_count = max((len(column) for column in columns), default=0)
+    data = {}
+    for name, column in zip(names, columns):
+        column = list(column) + [""] * (row_count - len(column))
+        data[name] = _numericise(pd.Series(column, dtype=object))
+    return pd.DataFrame(data, columns=names)
+
+def _quote_sheet(title):
+    return "'" + title.replace("'", "''") + "'"
+
+# Read match and pit scouting data with two API calls: one for the match header,
+# one batch_get for the needed match column ranges and the whole pit sheet
+def read_scouting_sheets(spreadsheet):
+    header_response = spreadsheet.values_batch_get(
+        [f"{_quote_sheet(MATCH_SHEET)}!1:1"],
+        params={"majorDimension": "ROWS"}
+    )
+    header_rows = header_response["valueRanges"][0].get("values", [[]])
+    header = [str(name) for name in header_rows[0]] if header_rows else []
+
+    positions = {name: index for index, name in enumerate(header)}
+    wanted = [name for name in required_match_columns() if name in positions]
+    missing = [name for name in ['Team Number', 'Match Number'] if name not in positions]
+    if missing:
+        raise KeyError(f"{MATCH_SHEET} sheet is missing columns: {missing}")
+
+    runs = _contiguous_runs(positions[name] for name in wanted)
+    ranges = [f"{_quote_sheet(MATCH_SHEET)}!{_column_range(first, last)}" for first, last in runs]
+    ranges.append(_quote_sheet(PIT_SHEET))
+
+    response = spreadsheet.values_batch_get(
+        ranges,
+        params={"majorDimension": "COLUMNS", "valueRenderOption": "UNFORMATTED_VALUE"}
+    )
+    value_ranges = response["valueRanges"]
+
+    # Stitch the match column runs back together
+    names, columns = [], []
+    for (first, last), value_range in zip(runs, value_ranges[:-1]):
+        values = value_range.get("values", [])
+        for offset, index in enumerate(range(first, last + 1)):
+            names.append(header[index])
+            columns.append(values[offset] if offset < len(values) else [])
+    df = _columns_to_df(names, columns)
+    df = df[wanted]
+
+    # Pit sheet: first value of each column is its header
+    pit_columns = value_ranges[-1].get("values", [])
+    pit_columns = [column for column in pit_columns if column and column[0] != ""]
+    pdata_df = _columns_to_df([str(column[0]) for column in pit_columns],
+                              [column[1:] for column in pit_columns])
+    return df, pdata_df
+
+# Authenticate using service account credentials
+# Try Streamlit secrets first (for cloud deployment), then fall back to local file
+def authorize_sheets():
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    # Google Sheets API scopes for authentication
+    apis = [
+        "https://www.googleapis.com/auth/spreadsheets",
+        "https://www.googleapis.com/auth/drive"
+    ]
+
+    try:
+        # Use Streamlit secrets (for Streamlit Cloud)
+        service_account_info = dict(st.secrets["gcp_service_account"])
+        creds = Credentials.from_service_account_info(service_account_info, scopes=apis)
+    except (FileNotFoundError, KeyError):
+        # Fall back to local file (for local development)
+        creds = Credentials.from_service_account_file(
+            "data_reader_account.json",
+            scopes=apis
+        )
+    return gspread.authorize(creds)
+
+# One quota-aware client per process so consecutive refreshes share the request budget.
+# Events are read on several threads, so the first ones to ask wait for a single client.
+_sheets_client = None
+_sheets_client_lock = threading.Lock()
+
+def get_sheets_client():
+    global _sheets_client
+    with _sheets_client_lock:
+        if _sheets_client is None:
+            import sheets_client
+            _sheets_client = sheets_client.QuotaAwareSheetsClient(authorize_sheets())
+    return _sheets_client
+
+# Current Sheets usage counters, or None if no event has used Google Sheets yet
+def sheets_usage():
+    return _sheets_client.usage() if _sheets_client is not None else None
+
+# ============================================================================
+# DATA SOURCES
+# ============================================================================
+
+# Each event reads its scouting data through a data source selected by the
+# event's "Data Source" entry in config.EVENTS (Google Sheets when absent).
+# A data source returns the match and pit scouting dataframes from read(). A source
+# may also define tba_matches() to supply the event's TBA match list itself, as
+# the list of match records the TBA API returns.
+
+# Match and pit data from the event's Google Sheet
+class SheetsDataSource:
+    def __init__(self, event):
+        self.sheet_name = event.get("Data Source", {}).get("sheet", event.get("Google Sheet"))
+
+    def read(self):
+        spreadsheet = get_sheets_client().open(self.sheet_name)
+        # Read only the match columns the pipeline uses, plus the pit sheet
+        return read_scouting_sheets(spreadsheet)
+
+# Match and pit data from "Data Entry" and "Pit Scouting" CSV or Parquet files
+# exported by the tablets, read with pyarrow's multithreaded readers. Works offline.
+class LocalFileDataSource:
+    EXTENSIONS = (".parquet", ".csv")
+
+    def __init__(self, event):
+        self.directory = event["Data Source"]["path"]
+
+    def path_for(self, table):
+        for extension in self.EXTENSIONS:
+            path = os.path.join(self.directory, table + extension)
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError(f"No {table} CSV or Parquet file in {self.directory}")
+
+    def _read_table(self, table, wanted=None):
+        import pyarrow.csv as pv
+        import pyarrow.parquet as pq
+
+        path = self.path_for(table)
+        if path.endswith(".parquet"):
+            names = pq.read_schema(path).names
+            columns = [name for name in wanted if name in names] if wanted else None
+            arrow_table = pq.read_table(path, columns=columns, use_threads=True)
+        else:
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                names = next(csv.reader(f), [])
+            columns = [name for name in wanted if name in names] if wanted else None
+            arrow_table = pv.read_csv(
+                path,
+                read_options=pv.ReadOptions(use_threads=True, encoding="utf8"),
+                convert_options=pv.ConvertOptions(include_columns=columns),
             )
+        return arrow_table.to_pandas(), names
 
-        # Connect to Google Sheets
-        gc = gspread.authorize(creds)
-        spreadsheet = gc.open(config.EVENTS[competition]["Google Sheet"])
-        mdata_worksheet = spreadsheet.worksheet("Data Entry")
-        pdata_worksheet = spreadsheet.worksheet("Pit Scouting")
-        # Get all match and pit scouting data as dictionaries
-        mdata = mdata_worksheet.get_all_records()
-        pdata = pdata_worksheet.get_all_records()
-        # Convert to pandas dataframes
-        df = pd.DataFrame(mdata)
-        pdata_df = pd.DataFrame(pdata)
-
-        # Initialize TBA API client
+    def read(self):
+        df, names = self._read_table(MATCH_SHEET, required_match_columns())
+        missing = [name for name in ['Team Number', 'Match Number'] if name not in names]
+        if missing:
+            raise KeyError(f"{MATCH_SHEET} file is missing columns: {missing}")
+        pdata_df, _ = self._read_table(PIT_SHEET)
+        return df, pdata_df
+
+    # Merge new match rows into the local "Data Entry" file. A resubmitted
+    # (Team Number, Match Number) replaces the earlier row. The file is rewritten
+    # next to the original and swapped in, so readers never see a partial file.
+    def append_matches(self, rows):
         try:
-            headers = {"X-TBA-Auth-Key": config.TBA_API_KEY}
-            response = requests.get(
-                f"https://www.thebluealliance.com/api/v3/event/{config.EVENTS[competition]['Event Key']}/matches",
-                headers=headers
+            path = self.path_for(MATCH_SHEET)
+            existing, _ = self._read_table(MATCH_SHEET)
+        except FileNotFoundError:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, MATCH_SHEET + ".csv")
+            existing = pd.DataFrame()
+
+        combined = pd.concat([existing, rows], ignore_index=True)
+        combined = combined.drop_duplicates(subset=['Team Number', 'Match Number'], keep='last')
+
+        temp_path = path + ".tmp"
+        if path.endswith(".parquet"):
+            combined.to_parquet(temp_path, index=False)
+        else:
+            combined.to_csv(temp_path, index=False)
+        os.replace(temp_path, path)
+        return len(combined)
+
+DATA_SOURCES = {
+    "sheets": SheetsDataSource,
+    "local": LocalFileDataSource,
+}
+
+def data_source_for(event):
+    kind = event.get("Data Source", {}).get("type", "sheets")
+    return DATA_SOURCES[kind](event)
+
+# ============================================================================
+# EVENT FILES
+# ============================================================================
+
+# Each event's tables live in its own file and the "All Competitions" rows in the
+# aggregate one; see storage.py for the layout and the views readers query.
+MATCH_TABLE = storage.MATCH_TABLE
+PIT_TABLE = storage.PIT_TABLE
+ALL_COMPETITIONS_TABLE = storage.ALL_COMPETITIONS_TABLE
+ALL_COMPETITIONS_COLUMNS = storage.ALL_COMPETITIONS_COLUMNS
+
+_quote = storage.quote
+
+def _table_type(conn, name, schema="main"):
+    row = conn.execute(f"SELECT type FROM {schema}.sqlite_master WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+# Side table keyed by each event row's event and rowid in that event's file
+def create_all_competitions_table(conn):
+    conn.execute(
+        f'CREATE TABLE {_quote(ALL_COMPETITIONS_TABLE)} ("Event Key" TEXT, "Source Row" INTEGER, '
+        + "".join(f'{_quote(col)} {"INTEGER" if col == "Team Match Number" else "REAL"}, ' for col in ALL_COMPETITIONS_COLUMNS)
+        + 'PRIMARY KEY ("Event Key", "Source Row"))'
+    )
+
+# Databases written before the views existed stored "Scouting_Data" and
+# "Pit Scouting" as tables with duplicated "All Competitions" rows
+def migrate_all_competitions_storage():
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    migrated = False
+    for view, table in (("Scouting_Data", MATCH_TABLE), ("Pit Scouting", PIT_TABLE)):
+        if _table_type(conn, view) == 'table':
+            if _table_type(conn, table) is None:
+                conn.execute(f'ALTER TABLE {_quote(view)} RENAME TO {_quote(table)}')
+                conn.execute(f'DELETE FROM {_quote(table)} WHERE "Event Name" = \'All Competitions\'')
+            else:
+                conn.execute(f'DROP TABLE {_quote(view)}')
+            migrated = True
+    conn.commit()
+    if migrated:
+        # Give back the space the duplicated rows used
+        conn.execute('VACUUM')
+    conn.close()
+
+# Databases written before the event files kept every event's tables in the
+# aggregate file. Each configured event's rows are copied to its own file, then
+# the aggregate keeps only the "All Competitions" rows. Events no longer in
+# config.EVENTS are left behind and dropped with the rest.
+def migrate_event_files():
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    if _table_type(conn, MATCH_TABLE) != 'table':
+        conn.close()
+        return
+
+    os.makedirs(storage.event_database_dir(), exist_ok=True)
+    legacy = [table for table in storage.EVENT_TABLES if _table_type(conn, table) == 'table']
+    for key in config.EVENTS:
+        path = storage.event_database_path(key)
+        if os.path.exists(path):
+            continue
+        conn.execute("ATTACH DATABASE ? AS event", (path,))
+        for table in legacy:
+            # Rows keep their rowid, so the side table still points at them
+            columns = ", ".join(_quote(col) for col in storage.table_columns(conn, "main", table))
+            conn.execute(f'CREATE TABLE event.{_quote(table)} AS SELECT * FROM main.{_quote(table)} WHERE 0')
+            conn.execute(
+                f'INSERT INTO event.{_quote(table)} (rowid, {columns}) '
+                f'SELECT rowid, {columns} FROM main.{_quote(table)} WHERE "Event Key" = ?',
+                (key,)
             )
-            response.raise_for_status()
-            tba_comp_data = response.json()
-            tba_df = pd.json_normalize(tba_comp_data)
+        conn.commit()
+        conn.execute("DETACH DATABASE event")
+        index_event_tables(path)
+
+    # The side table gains the event key of each row
+    if _table_type(conn, ALL_COMPETITIONS_TABLE) == 'table':
+        columns = ", ".join(f'a.{_quote(col)}' for col in ALL_COMPETITIONS_COLUMNS)
+        conn.execute(f'ALTER TABLE {_quote(ALL_COMPETITIONS_TABLE)} RENAME TO "Legacy Matches"')
+        create_all_competitions_table(conn)
+        conn.execute(
+            f'INSERT INTO {_quote(ALL_COMPETITIONS_TABLE)} '
+            f'SELECT e."Event Key", a."Source Row", {columns} FROM "Legacy Matches" a '
+            f'JOIN {_quote(MATCH_TABLE)} e ON e.rowid = a."Source Row"'
+        )
+        conn.execute('DROP TABLE "Legacy Matches"')
+
+    for view in storage.VIEWS:
+        if _table_type(conn, view) == 'view':
+            conn.execute(f'DROP VIEW {_quote(view)}')
+    for table in legacy:
+        if table in storage.AGGREGATE_TABLES:
+            conn.execute(f'DELETE FROM {_quote(table)} WHERE "Event Key" != ?', (storage.ALL_COMPETITIONS,))
+        else:
+            conn.execute(f'DROP TABLE {_quote(table)}')
+    conn.commit()
+    conn.execute('VACUUM')
+    conn.close()
+
+# Databases written before snapshots kept one file per event, updated in place,
+# and the "All Competitions" rows in the aggregate file. The event files become
+# the first snapshots as they are, and the all-competitions rows move to a new file.
+def migrate_snapshots():
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    if _table_type(conn, storage.SNAPSHOTS_TABLE) is not None:
+        conn.close()
+        return
+
+    event_files = {key: storage.event_database_path(key) for key in config.EVENTS
+                   if os.path.exists(storage.event_database_path(key))}
+    moved = [table for table in storage.AGGREGATE_TABLES + [ALL_COMPETITIONS_TABLE]
+             if _table_type(conn, table) == 'table']
+    files = {}
+    if moved:
+        os.makedirs(storage.event_database_dir(), exist_ok=True)
+        all_path = storage.new_snapshot_path("All Competitions")
+        conn.execute("ATTACH DATABASE ? AS snapshot", (all_path,))
+        for table in moved:
+            if table == ALL_COMPETITIONS_TABLE:
+                conn.execute(f'CREATE TABLE snapshot.{_quote(table)} AS SELECT * FROM main.{_quote(table)} WHERE 0')
+                conn.execute(f'INSERT INTO snapshot.{_quote(table)} SELECT * FROM main.{_quote(table)}')
+            else:
+                conn.execute(
+                    f'CREATE TABLE snapshot.{_quote(table)} AS SELECT * FROM main.{_quote(table)} WHERE "Event Key" = ?',
+                    (storage.ALL_COMPETITIONS,)
+                )
+        conn.commit()
+        conn.execute("DETACH DATABASE snapshot")
+        files = {**event_files, storage.ALL_COMPETITIONS: all_path}
+
+    storage.create_snapshots_table(conn)
+    for key, path in event_files.items():
+        storage.publish(conn, key, {key: path})
+    if files:
+        storage.publish(conn, storage.ALL_COMPETITIONS, files)
+    for table in moved:
+        conn.execute(f'DROP TABLE {_quote(table)}')
+    conn.commit()
+    if moved:
+        conn.execute('VACUUM')
+    conn.close()
+
+# Match record rebuilt from a row of the old wide TBA table: dotted column names
+# nest again, JSON-encoded lists and objects are decoded and missing values dropped
+def _unflatten(row):
+    match = {}
+    for name, value in row.items():
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            continue
+        if isinstance(value, str) and value[:1] in ("[", "{"):
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError:
+                pass
+        node = match
+        *parents, leaf = name.split(".")
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = value
+    return match
+
+# TBA tables written before the slim layout had a column for every flattened
+# field of the match JSON. Current event files that still have one are copied
+# with the table rebuilt from the unflattened rows and published in their place.
+# Runs under the aggregate lock.
+def migrate_tba_storage():
+    snapshot = storage.current_snapshot()["Files"]
+    replaced = {}
+    for scope, files in snapshot.items():
+        path = storage.snapshot_path(files[scope]) if scope in files else None
+        if scope == storage.ALL_COMPETITIONS or path is None or not os.path.exists(path):
+            continue
+        conn = sqlite3.connect(path)
+        wide = (_table_type(conn, TBA_TABLE) == 'table'
+                and 'Raw' not in storage.table_columns(conn, "main", TBA_TABLE))
+        legacy = pd.read_sql(f'SELECT * FROM {_quote(TBA_TABLE)}', conn) if wide else None
+        conn.close()
+        if not wide or legacy.empty:
+            continue
+
+        new_path = storage.new_snapshot_path(scope)
+        shutil.copyfile(path, new_path)
+        conn = sqlite3.connect(new_path)
+        conn.execute(f'DROP TABLE {_quote(TBA_TABLE)}')
+        conn.commit()
+        conn.close()
+        labels = legacy[['Event Key', 'Event Name']].reset_index(drop=True)
+        matches = legacy.drop(columns=['Event Key', 'Event Name']).to_dict('records')
+        write_tba(pd.concat([tba_frame([_unflatten(match) for match in matches]), labels], axis=1), new_path)
+        conn = sqlite3.connect(new_path)
+        conn.execute('VACUUM')
+        conn.close()
+        record_commit(None, scope, len(legacy), {scope: new_path})
+        replaced[files[scope]] = new_path
+
+    # The copies keep their rowids, so all competitions can read them as they are
+    all_files = snapshot.get(storage.ALL_COMPETITIONS)
+    if replaced and all_files:
+        files = {key: replaced.get(file, storage.snapshot_path(file)) for key, file in all_files.items()}
+        record_commit(None, storage.ALL_COMPETITIONS, 0, files)
+
+def _remove_snapshot(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+# Delete snapshot files that were replaced more than config.SNAPSHOT_RETENTION_SECONDS
+# ago, going by when the file after them was written. Files still referenced by a
+# scope are kept, and only scopes with a current file are touched, so files of
+# events no longer configured stay where they are.
+def prune_snapshots():
+    files = storage.current_snapshot()["Files"]
+    current = {file for scope in files.values() for file in scope.values()}
+    cutoff = time.time() - config.SNAPSHOT_RETENTION_SECONDS
+    directory = storage.event_database_dir()
+
+    by_scope = {}
+    for file in os.listdir(directory):
+        if file.endswith(".db") and storage.snapshot_scope(file) in files:
+            path = os.path.join(directory, file)
+            by_scope.setdefault(storage.snapshot_scope(file), []).append((os.path.getmtime(path), path))
+    for entries in by_scope.values():
+        entries.sort()
+        for (_, path), (replaced_at, _) in zip(entries, entries[1:]):
+            if os.path.basename(path) not in current and replaced_at < cutoff:
+                # A reader may still have it open on Windows; it goes next time
+                _remove_snapshot(path)
+
+# Run a full refresh and log the result. Events write their own snapshot files,
+# so a refresh of one event never waits on another.
+# on_progress is called with every progress event of the pipeline as it happens.
+def refresh(events=None, first=None, on_progress=None):
+    started_at = datetime.now()
+    start = time.perf_counter()
+    # Held until the outcome is logged, so readers can tell a live refresh from
+    # one whose process died
+    with storage.refresh_running():
+        refresh_id = begin_refresh(started_at)
+        try:
+            results = run_stages(calculation_stages(events, first, refresh_id), on_progress)
         except Exception as e:
-            print(f"Warning: Failed to fetch TBA data: {e}")
-            # Create empty TBA dataframe if API fails
-            tba_df = pd.DataFrame()
-        
-        # ========================================================================
-        # SCORING CALCULATIONS
-        # ========================================================================
+            record_refresh(refresh_id, time.perf_counter() - start, "failed", repr(e))
+            raise
+        duration = time.perf_counter() - start
+        record_refresh(refresh_id, duration, "ok")
+    return {"Started At": started_at, "Duration": round(duration, 2), "Status": "ok", **results}
 
-        # Calculate Auto score
-        df['Auto Score'] = df[config.AUTO_COLUMN].map(config.AUTO_SCORES).fillna(0)
+# ============================================================================
+# SINGLE-FLIGHT REFRESH
+# ============================================================================
 
-        # Calculate Teleop score
-        df['Teleop Score'] = df[list(config.TELEOP_SCORES.keys())].fillna(0).mul(config.TELEOP_SCORES)
+# Refresh requests are coalesced server-wide: module state is shared by every
+# Streamlit session in the process, so concurrent button presses join the refresh
+# that is already running instead of starting another one.
+_flight_lock = threading.Lock()
+_in_flight = None
+_last_success = None
+_last_success_time = 0.0
 
-        # Calculate Endgame score
-        df['Endgame Score'] = df[config.ENDGAME_COLUMN].map(config.ENDGAME_SCORES).fillna(0)
-        # Sum all scores to get Total Score
-        df['Total Score'] = df['Auto Score'] + df['Teleop Score'] + df['Endgame Score']
+# Future for one refresh that also collects its progress events, so every
+# session that joined the flight can stream them while it runs
+class RefreshFlight(Future):
+    def __init__(self):
+        super().__init__()
+        self.progress = []
+        self._changed = threading.Condition()
+        self.add_done_callback(self._notify)
 
-        # Sort by team and match number
-        df = df.sort_values(['Team Number', 'Match Number'])
+    def add_progress(self, progress):
+        with self._changed:
+            self.progress.append(progress)
+            self._changed.notify_all()
 
-        # Find team specific match number
-        df['Team Match Number'] = df.groupby('Team Number').cumcount() + 1
+    def _notify(self, _):
+        with self._changed:
+            self._changed.notify_all()
 
-        # ========================================================================
-        # RAW SCORE CALCULATIONS (Exponential Moving Average)
-        # ========================================================================
+    # Progress events so far, then new ones as they arrive, until the refresh ends
+    def stream(self):
+        seen = 0
+        while True:
+            with self._changed:
+                while seen == len(self.progress) and not self.done():
+                    self._changed.wait()
+                pending = self.progress[seen:]
+                finished = self.done()
+            yield from pending
+            seen += len(pending)
+            if finished and seen == len(self.progress):
+                return
 
-        # Calculate rolling RAW scores for each team
-        df['Auto RAW'] = 0.0
-        df['Teleop RAW'] = 0.0
-        df['Endgame RAW'] = 0.0
-        df['Total RAW'] = 0.0
+def _run_flight(future, first):
+    global _in_flight, _last_success, _last_success_time
+    try:
+        result = refresh(first=first, on_progress=future.add_progress)
+    except BaseException as e:
+        with _flight_lock:
+            _in_flight = None
+        future.set_exception(e)
+        return
+    with _flight_lock:
+        _in_flight = None
+        _last_success = future
+        _last_success_time = time.monotonic()
+    future.set_result(result)
 
-        for team_num in df['Team Number'].unique():
-            team_matches = df[df['Team Number'] == team_num].index
-            
-            auto_raw = 0.0
-            teleop_raw = 0.0
-            endgame_raw = 0.0
-            
-            for idx in team_matches:
-                actual_auto = df.loc[idx, 'Auto Score']
-                actual_teleop = df.loc[idx, 'Teleop Score']
-                actual_endgame = df.loc[idx, 'Endgame Score']
-                
-                # Apply EMA formula: RAW_new = RAW_old + K * (actual - RAW_old)
-                auto_raw = auto_raw + config.RAW_K * (actual_auto - auto_raw)
-                teleop_raw = teleop_raw + config.RAW_K * (actual_teleop - teleop_raw)
-                endgame_raw = endgame_raw + config.RAW_K * (actual_endgame - endgame_raw)
-                
-                df.loc[idx, 'Auto RAW'] = auto_raw
-                df.loc[idx, 'Teleop RAW'] = teleop_raw
-                df.loc[idx, 'Endgame RAW'] = endgame_raw
-                df.loc[idx, 'Total RAW'] = auto_raw + teleop_raw + endgame_raw
-
-        # ========================================================================
-        # DOMINANCE CALCULATION
-        # ========================================================================
-
-        df['Dominance'] = None
-        
-        if not tba_df.empty and 'match_number' in tba_df.columns:
-            # Parse TBA data for match scores
-            tba_match_data = []
-            for _, tba_row in tba_df.iterrows():
-                if tba_row.get('comp_level') != 'qm':
-                    continue
-                    
-                match_num = tba_row.get('match_number')
-                
-                # Parse team keys and scores
-                try:
-                    blue_teams = tba_row.get('alliances.blue.team_keys', [])
-                    red_teams = tba_row.get('alliances.red.team_keys', [])
-                    blue_score = tba_row.get('alliances.blue.score', 0)
-                    red_score = tba_row.get('alliances.red.score', 0)
-                    
-                    # Handle JSON-serialized data
-                    if isinstance(blue_teams, str):
-                        blue_teams = json.loads(blue_teams)
-                    if isinstance(red_teams, str):
-                        red_teams = json.loads(red_teams)
-                    
-                    # Extract team numbers from "frcXXXX" format
-                    blue_team_nums = [int(t.replace('frc', '')) for t in blue_teams if isinstance(t, str) and t.startswith('frc')]
-                    red_team_nums = [int(t.replace('frc', '')) for t in red_teams if isinstance(t, str) and t.startswith('frc')]
-                    
-                    # Add match data for each team
-                    for team_num in blue_team_nums:
-                        tba_match_data.append({
-                            'Match Number': match_num,
-                            'Team Number': team_num,
-                            'Alliance': 'blue',
-                            'Opponent Score': red_score,
-                            'Team Count': len(red_team_nums) if red_team_nums else 3
-                        })
-                    for team_num in red_team_nums:
-                        tba_match_data.append({
-                            'Match Number': match_num,
-                            'Team Number': team_num,
-                            'Alliance': 'red',
-                            'Opponent Score': blue_score,
-                            'Team Count': len(blue_team_nums) if blue_team_nums else 3
-                        })
-                except Exception as e:
-                    continue
-            
-            if tba_match_data:
-                tba_match_df = pd.DataFrame(tba_match_data)
-                
-                # Merge with scouting data
-                df = df.merge(
-                    tba_match_df[['Match Number', 'Team Number', 'Opponent Score', 'Team Count']],
-                    on=['Match Number', 'Team Number'],
-                    how='left'
-                )
-                
-                # Calculate dominance for matches with TBA data
-                eps = 1e-6
-                mask = df['Opponent Score'].notna()
-                
-                df.loc[mask, 'margin'] = df.loc[mask, 'Total Score'] - (df.loc[mask, 'Opponent Score'] / df.loc[mask, 'Team Count'])
-                df.loc[mask, 'scaled_margin'] = df.loc[mask, 'margin'] / (df.loc[mask, 'Opponent Score'] + eps)
-                df.loc[mask, 'norm_margin'] = (df.loc[mask, 'scaled_margin'] + 1) / 1.3
-                df.loc[mask, 'Dominance'] = df.loc[mask, 'norm_margin'].clip(0.0, 1.0)
-                
-                # Clean up temporary columns
-                df.drop(columns=['margin', 'scaled_margin', 'norm_margin', 'Opponent Score', 'Team Count'], inplace=True, errors='ignore')
-
-        # ========================================================================
-        # METRICS CALCULATION
-        # ========================================================================
-
-        # Initialize calculation dataframe with unique teams
-        calc_df = pd.DataFrame()
-        calc_df['Team Number'] = df['Team Number'].unique()
-
-        # Count matches played per team
-        team_counts = (
-            df.groupby('Team Number')
-            .size()
-            .reset_index(name='Matches Played')
+# Start a refresh, or join the one in flight. Returns a RefreshFlight whose result
+# is the refresh summary; a refresh that succeeded within the cooldown is reused
+# as is. A new refresh computes the event key `first` before the others.
+def request_refresh(force=False, first=None):
+    global _in_flight
+    with _flight_lock:
+        if _in_flight is not None:
+            return _in_flight
+        if (not force and _last_success is not None
+                and time.monotonic() - _last_success_time < config.REFRESH_COOLDOWN_SECONDS):
+            return _last_success
+        future = RefreshFlight()
+        _in_flight = future
+    threading.Thread(target=_run_flight, args=(future, first), name="scouting-refresh", daemon=True).start()
+    return future
+
+# Event match list from the TBA API as a tba_frame; empty if the request fails
+def fetch_tba_matches(event):
+    import requests
+    try:
+        headers = {"X-TBA-Auth-Key": config.TBA_API_KEY}
+        response = requests.get(
+            f"https://www.thebluealliance.com/api/v3/event/{event['Event Key']}/matches",
+            headers=headers
         )
+        response.raise_for_status()
+        return tba_frame(response.json())
+    except Exception as e:
+        print(f"Warning: Failed to fetch TBA data: {e}")
+        # Create empty TBA dataframe if API fails
+        return tba_frame([])
 
-        # Calculate team averages and statistical metrics using config definitions
-        calc_df = df.groupby('Team Number', as_index=False).agg(**config.CALCULATED_METRICS)
+# Event keys in the order they are refreshed: `first` (the current event by
+# default) before the rest, which keep their configured order
+def refresh_order(events=None, first=None):
+    first = first or config.EVENT_KEY
+    return sorted(events or config.EVENTS, key=lambda key: key != first)
 
-        # Merge with match count
-        calc_df = (
-            calc_df
-            .merge(team_counts, on='Team Number')
-        )
+# Read, calculate and commit one event, as a generator of its progress events.
+# Everything the event reads and writes is its own, so events run concurrently.
+def event_stages(competition, refresh_id, progress):
+    event_key = config.EVENTS[competition]['Event Key']
+    event_name = config.EVENTS[competition]['Name']
+    competition_week = config.EVENTS[competition]['Competition Week']
 
-        # Extract final RAW values for each team (from their last match)
-        final_raw = df.loc[df.groupby('Team Number')['Team Match Number'].idxmax(), 
-                           ['Team Number', 'Auto RAW', 'Teleop RAW', 'Endgame RAW', 'Total RAW']]
-        calc_df = calc_df.merge(final_raw, on='Team Number', how='left')
-
-        # Calculate mean Dominance for each team
-        df['Dominance'] = pd.to_numeric(df['Dominance'], errors='coerce')
-        dominance_avg = df.groupby('Team Number', as_index=False)['Dominance'].mean()
-        dominance_avg.rename(columns={'Dominance': 'Dominance AVG'}, inplace=True)
-        calc_df = calc_df.merge(dominance_avg, on='Team Number', how='left')
-
-        # ========================================================================
-        # CONSISTENCY METRIC
-        # ========================================================================
-
-        # Uses Peekorobo consistency formula to calculate a score based on standard deviation of total scores
-        # High consistency means a low standard deviation which results in a score closer to 1.0
-        eps = 1e-6  # Small value to prevent division by zero
-        peak = df['Total Score'].max()
-
-        calc_df['Consistency'] = (
-                1.0 - (calc_df['Total Score STDEV'] / (peak + eps))
-        ).clip(lower=0.0, upper=1.0)  # Clamp between 0 and 1
-
-        # Calculate Confidence and ACE
-        calc_df['Confidence'] = calc_df['Consistency'] * 0.5 + calc_df['Dominance AVG'].fillna(0) * 0.5
-        calc_df['ACE'] = calc_df['Total RAW'] * calc_df['Confidence']
-
-        # Add Event Key and Event Name before reordering
-        event_key = config.EVENTS[competition]['Event Key']
-        event_name = config.EVENTS[competition]['Name']
-        competition_week = config.EVENTS[competition]['Competition Week']
-        
-        calc_df['Event Key'] = event_key
-        calc_df['Event Name'] = event_name
-        calc_df['Competition Week'] = competition_week
+    # Read match and pit scouting data from the event's configured source
+    source = data_source_for(config.EVENTS[competition])
+    df, pdata_df = source.read()
 
-        # Round calculated metrics to 2 decimal places
-        calc_df = calc_df.round(2)
+    # Match results come from TBA unless the source supplies its own
+    if hasattr(source, "tba_matches"):
+        tba_df = tba_frame(source.tba_matches())
+    else:
+        tba_df = fetch_tba_matches(config.EVENTS[competition])
+    yield progress(event_name, "read", len(df))
 
-        # Calculate rankings (higher score = lower rank number, so use ascending=False)
-        calc_df['ACE Rank'] = calc_df['ACE'].rank(method='min', ascending=False).astype(int)
-        calc_df['RAW Rank'] = calc_df['Total RAW'].rank(method='min', ascending=False).astype(int)
-        calc_df['Confidence Rank'] = calc_df['Confidence'].rank(method='min', ascending=False).astype(int)
-        calc_df['Score Rank'] = calc_df['Total Score AVG'].rank(method='min', ascending=False).astype(int)
+    # ========================================================================
+    # SCORING CALCULATIONS
+    # ========================================================================
 
-        # Reorder columns according to config (now rankings are included)
-        calc_df = calc_df[config.CALCS_COLUMN_ORDER]
+    # Calculate Auto score
+    df['Auto Score'] = df[config.AUTO_COLUMN].map(config.AUTO_SCORES).fillna(0)
 
-        # ========================================================================
-        # RADAR CHART NORMALIZATION
-        # ========================================================================
+    # Calculate Teleop score
+    df['Teleop Score'] = df[list(config.TELEOP_SCORES.keys())].fillna(0).mul(config.TELEOP_SCORES)
 
-        # Create normalized dataframe on a 0-100 scale for radar chart visualization
-        norm_data = {'Team Number': calc_df['Team Number']}
-        
-        # Normalize each metric to 0-100 scale based on max value (with division by zero protection)
-        for norm_col, source_col in config.RADAR_CHART_CONFIG['columns'].items():
-            max_val = calc_df[source_col].max()
-            if max_val > 0:
-                norm_data[norm_col] = calc_df[source_col] * (100 / max_val)
-            else:
-                norm_data[norm_col] = 0
-        
-        norm_df = pd.DataFrame(norm_data)
-
-        # Add Event Key and Event Name to norm_df and df
-        norm_df['Event Key'] = event_key
-        norm_df['Event Name'] = event_name
-        norm_df['Competition Week'] = competition_week
-        df['Event Key'] = event_key
-        df['Event Name'] = event_name
-        df['Competition Week'] = competition_week
-        pdata_df['Event Key'] = event_key
-        pdata_df['Event Name'] = event_name
-        pdata_df['Competition Week'] = competition_week
-
-        # ========================================================================
-        # DATABASE STORAGE
-        # ========================================================================
-
-        # Write all data to SQLite database
-        write_to_db(norm_df, "Normalized Data")
-        write_to_db(calc_df, "Calcs")
-        write_to_db(df, "Scouting_Data")
-        write_to_db(pdata_df, "Pit Scouting")
-        if not tba_df.empty:
-            # Drop duplicate rows BEFORE serialization (using key column to identify unique matches)
-            # TBA API typically has 'key' column that uniquely identifies each match
-            if 'key' in tba_df.columns:
-                tba_df = tba_df.drop_duplicates(subset=['key'])
-            else:
-                tba_df = tba_df.drop_duplicates()
-            
-            # Serialize list/dict columns so SQLite can store them
-            tba_df = tba_df.map(
-                lambda value: json.dumps(value) if isinstance(value, (list, dict)) else value
+    # Calculate Endgame score
+    df['Endgame Score'] = df[config.ENDGAME_COLUMN].map(config.ENDGAME_SCORES).fillna(0)
+    # Sum all scores to get Total Score
+    df['Total Score'] = df['Auto Score'] + df['Teleop Score'] + df['Endgame Score']
+
+    # Sort by team and match number
+    df = df.sort_values(['Team Number', 'Match Number'])
+
+    # Find team specific match number
+    df['Team Match Number'] = df.groupby('Team Number').cumcount() + 1
+
+    # ========================================================================
+    # RAW SCORE CALCULATIONS (Exponential Moving Average)
+    # ========================================================================
+
+    # Calculate rolling RAW scores for each team
+    df['Auto RAW'] = 0.0
+    df['Teleop RAW'] = 0.0
+    df['Endgame RAW'] = 0.0
+    df['Total RAW'] = 0.0
+
+    for team_num in df['Team Number'].unique():
+        team_matches = df[df['Team Number'] == team_num].index
+
+        auto_raw = 0.0
+        teleop_raw = 0.0
+        endgame_raw = 0.0
+
+        for idx in team_matches:
+            actual_auto = df.loc[idx, 'Auto Score']
+            actual_teleop = df.loc[idx, 'Teleop Score']
+            actual_endgame = df.loc[idx, 'Endgame Score']
+
+            # Apply EMA formula: RAW_new = RAW_old + K * (actual - RAW_old)
+            auto_raw = auto_raw + config.RAW_K * (actual_auto - auto_raw)
+            teleop_raw = teleop_raw + config.RAW_K * (actual_teleop - teleop_raw)
+            endgame_raw = endgame_raw + config.RAW_K * (actual_endgame - endgame_raw)
+
+            df.loc[idx, 'Auto RAW'] = auto_raw
+            df.loc[idx, 'Teleop RAW'] = teleop_raw
+            df.loc[idx, 'Endgame RAW'] = endgame_raw
+            df.loc[idx, 'Total RAW'] = auto_raw + teleop_raw + endgame_raw
+
+    # ========================================================================
+    # DOMINANCE CALCULATION
+    # ========================================================================
+
+    df['Dominance'] = None
+
+    if not tba_df.empty and 'match_number' in tba_df.columns:
+        # Parse TBA data for match scores
+        tba_match_data = []
+        for _, tba_row in tba_df.iterrows():
+            if tba_row.get('comp_level') != 'qm':
+                continue
+
+            match_num = tba_row.get('match_number')
+
+            # Parse team keys and scores
+            try:
+                blue_teams = tba_row.get('alliances.blue.team_keys', [])
+                red_teams = tba_row.get('alliances.red.team_keys', [])
+                blue_score = tba_row.get('alliances.blue.score', 0)
+                red_score = tba_row.get('alliances.red.score', 0)
+
+                # Handle JSON-serialized data
+                if isinstance(blue_teams, str):
+                    blue_teams = json.loads(blue_teams)
+                if isinstance(red_teams, str):
+                    red_teams = json.loads(red_teams)
+
+                # Extract team numbers from "frcXXXX" format
+                blue_team_nums = [int(t.replace('frc', '')) for t in blue_teams if isinstance(t, str) and t.startswith('frc')]
+                red_team_nums = [int(t.replace('frc', '')) for t in red_teams if isinstance(t, str) and t.startswith('frc')]
+
+                # Add match data for each team
+                for team_num in blue_team_nums:
+                    tba_match_data.append({
+                        'Match Number': match_num,
+                        'Team Number': team_num,
+                        'Alliance': 'blue',
+                        'Opponent Score': red_score,
+                        'Team Count': len(red_team_nums) if red_team_nums else 3
+                    })
+                for team_num in red_team_nums:
+                    tba_match_data.append({
+                        'Match Number': match_num,
+                        'Team Number': team_num,
+                        'Alliance': 'red',
+                        'Opponent Score': blue_score,
+                        'Team Count': len(blue_team_nums) if blue_team_nums else 3
+                    })
+            except Exception as e:
+                continue
+
+        if tba_match_data:
+            tba_match_df = pd.DataFrame(tba_match_data)
+
+            # Merge with scouting data
+            df = df.merge(
+                tba_match_df[['Match Number', 'Team Number', 'Opponent Score', 'Team Count']],
+                on=['Match Number', 'Team Number'],
+                how='left'
             )
+
+            # Calculate dominance for matches with TBA data
+            eps = 1e-6
+            mask = df['Opponent Score'].notna()
+
+            df.loc[mask, 'margin'] = df.loc[mask, 'Total Score'] - (df.loc[mask, 'Opponent Score'] / df.loc[mask, 'Team Count'])
+            df.loc[mask, 'scaled_margin'] = df.loc[mask, 'margin'] / (df.loc[mask, 'Opponent Score'] + eps)
+            df.loc[mask, 'norm_margin'] = (df.loc[mask, 'scaled_margin'] + 1) / 1.3
+            df.loc[mask, 'Dominance'] = df.loc[mask, 'norm_margin'].clip(0.0, 1.0)
+
+            # Clean up temporary columns
+            df.drop(columns=['margin', 'scaled_margin', 'norm_margin', 'Opponent Score', 'Team Count'], inplace=True, errors='ignore')
+
+    # ========================================================================
+    # METRICS CALCULATION
+    # ========================================================================
+
+    # Initialize calculation dataframe with unique teams
+    calc_df = pd.DataFrame()
+    calc_df['Team Number'] = df['Team Number'].unique()
+
+    # Count matches played per team
+    team_counts = (
+        df.groupby('Team Number')
+        .size()
+        .reset_index(name='Matches Played')
+    )
+
+    # Calculate team averages and statistical metrics using config definitions
+    calc_df = df.groupby('Team Number', as_index=False).agg(**config.CALCULATED_METRICS)
+
+    # Merge with match count
+    calc_df = (
+        calc_df
+        .merge(team_counts, on='Team Number')
+    )
+
+    # Extract final RAW values for each team (from their last match)
+    final_raw = df.loc[df.groupby('Team Number')['Team Match Number'].idxmax(), 
+                       ['Team Number', 'Auto RAW', 'Teleop RAW', 'Endgame RAW', 'Total RAW']]
+    calc_df = calc_df.merge(final_raw, on='Team Number', how='left')
+
+    # Calculate mean Dominance for each team
+    df['Dominance'] = pd.to_numeric(df['Dominance'], errors='coerce')
+    dominance_avg = df.groupby('Team Number', as_index=False)['Dominance'].mean()
+    dominance_avg.rename(columns={'Dominance': 'Dominance AVG'}, inplace=True)
+    calc_df = calc_df.merge(dominance_avg, on='Team Number', how='left')
+
+    # ========================================================================
+    # OPR / DPR / CCWM
+    # ========================================================================
+
+    # Least-squares contribution ratings from TBA alliance scores
+    calc_df = calc_df.merge(ratings.compute_ratings(alliance_rows(tba_df)), on='Team Number', how='left')
+
+    # ========================================================================
+    # CONSISTENCY METRIC
+    # ========================================================================
+
+    # Uses Peekorobo consistency formula to calculate a score based on standard deviation of total scores
+    # High consistency means a low standard deviation which results in a score closer to 1.0
+    eps = 1e-6  # Small value to prevent division by zero
+    peak = df['Total Score'].max()
+
+    calc_df['Consistency'] = (
+            1.0 - (calc_df['Total Score STDEV'] / (peak + eps))
+    ).clip(lower=0.0, upper=1.0)  # Clamp between 0 and 1
+
+    # Calculate Confidence and ACE
+    calc_df['Confidence'] = calc_df['Consistency'] * 0.5 + calc_df['Dominance AVG'].fillna(0) * 0.5
+    calc_df['ACE'] = calc_df['Total RAW'] * calc_df['Confidence']
+
+    # Add Event Key and Event Name before reordering
+    calc_df['Event Key'] = event_key
+    calc_df['Event Name'] = event_name
+    calc_df['Competition Week'] = competition_week
+
+    # Round calculated metrics to 2 decimal places
+    calc_df = calc_df.round(2)
+
+    # Calculate rankings (higher score = lower rank number, so use ascending=False)
+    calc_df['ACE Rank'] = calc_df['ACE'].rank(method='min', ascending=False).astype(int)
+    calc_df['RAW Rank'] = calc_df['Total RAW'].rank(method='min', ascending=False).astype(int)
+    calc_df['Confidence Rank'] = calc_df['Confidence'].rank(method='min', ascending=False).astype(int)
+    calc_df['Score Rank'] = calc_df['Total Score AVG'].rank(method='min', ascending=False).astype(int)
+    calc_df['OPR Rank'] = calc_df['OPR'].rank(method='min', ascending=False, na_option='bottom').astype(int)
+    calc_df['CCWM Rank'] = calc_df['CCWM'].rank(method='min', ascending=False, na_option='bottom').astype(int)
+
+    # Reorder columns according to config (now rankings are included)
+    calc_df = calc_df[config.CALCS_COLUMN_ORDER]
+
+    # ========================================================================
+    # RADAR CHART NORMALIZATION
+    # ========================================================================
+
+    # Create normalized dataframe on a 0-100 scale for radar chart visualization
+    norm_data = {'Team Number': calc_df['Team Number']}
+
+    # Normalize each metric to 0-100 scale based on max value (with division by zero protection)
+    for norm_col, source_col in config.RADAR_CHART_CONFIG['columns'].items():
+        max_val = calc_df[source_col].max()
+        if max_val > 0:
+            norm_data[norm_col] = calc_df[source_col] * (100 / max_val)
+        else:
+            norm_data[norm_col] = 0
+
+    norm_df = pd.DataFrame(norm_data)
+
+    # Add Event Key and Event Name to norm_df and df
+    norm_df['Event Key'] = event_key
+    norm_df['Event Name'] = event_name
+    norm_df['Competition Week'] = competition_week
+    df['Event Key'] = event_key
+    df['Event Name'] = event_name
+    df['Competition Week'] = competition_week
+    pdata_df['Event Key'] = event_key
+    pdata_df['Event Name'] = event_name
+    pdata_df['Competition Week'] = competition_week
+
+    # ========================================================================
+    # MATCH ACCURACY
+    # ========================================================================
+
+    accuracy_df = match_accuracy(df, tba_df)
+    accuracy_df['Event Key'] = event_key
+    accuracy_df['Event Name'] = event_name
+    accuracy_df['Competition Week'] = competition_week
+
+    scouters_df = scouter_reliability(df, tba_df)
+    scouters_df['Event Key'] = event_key
+    scouters_df['Event Name'] = event_name
+    scouters_df['Competition Week'] = competition_week
+    yield progress(event_name, "calculate", len(calc_df))
+
+    # ========================================================================
+    # DATABASE STORAGE
+    # ========================================================================
+
+    # Write the event's tables to a new snapshot file. Nobody reads it until it
+    # is published, so it needs no lock and readers keep the previous one meanwhile.
+    path = storage.new_snapshot_path(event_key)
+    os.makedirs(storage.event_database_dir(), exist_ok=True)
+    try:
+        write_to_db(norm_df, "Normalized Data", path)
+        write_to_db(calc_df, "Calcs", path)
+        write_to_db(df, MATCH_TABLE, path)
+        write_to_db(pdata_df, PIT_TABLE, path)
+        if not tba_df.empty:
+            # Drop duplicate rows (the 'key' column uniquely identifies each match)
+            tba_df = tba_df.drop_duplicates(subset=['key'])
             # Add Event Key and Event Name to TBA data
             tba_df = tba_df.assign(**{'Event Key': event_key, 'Event Name': event_name})
-            write_to_db(tba_df, "TBA Data")
+            write_tba(tba_df, path)
         else:
             print("Warning: No TBA data to write.")
+        if not accuracy_df.empty:
+            write_to_db(accuracy_df, MATCH_ACCURACY_TABLE, path)
+        if not scouters_df.empty:
+            write_to_db(scouters_df, SCOUTER_RELIABILITY_TABLE, path)
+        index_event_tables(path)
+    except BaseException:
+        _remove_snapshot(path)
+        raise
 
-    all_df = pd.read_sql(
-        'SELECT * FROM "Scouting_Data" WHERE "Event Name" != "All Competitions"',
-        sqlite3.connect("Scouting_Data.db")
-    )
+    # The history, the commit log and the snapshot list live in the aggregate file
+    with refresh_lock():
+        calcs_history.record(calc_df, event_key, refresh_id)
+        record_commit(refresh_id, event_key, len(df), {event_key: path})
+    yield progress(event_name, "commit", len(df))
+
+# Main calculation and data processing pipeline, as a generator of progress events
+# ({"Event", "Stage", "Rows", "Elapsed"}) for the read, calculate and commit stage
+# of each event. Recomputes the given event keys (all configured events by
+# default, `first` leading) on up to config.REFRESH_WORKERS threads, then the
+# all-competitions tables from every event's stored rows. Each event's file is
+# committed as soon as it is written. Returns the summary of the run. An event
+# that fails reports a "failed" stage with its "Error" while the others carry
+# on; the run then raises that event's exception.
+def calculation_stages(events=None, first=None, refresh_id=None):
+    usage_before = sheets_usage()
+    with refresh_lock():
+        migrate_all_competitions_storage()
+        migrate_event_files()
+        migrate_snapshots()
+        migrate_tba_storage()
+    start = time.perf_counter()
+
+    def progress(event, stage, rows):
+        return {"Event": event, "Stage": stage, "Rows": int(rows), "Elapsed": round(time.perf_counter() - start, 2)}
+
+    # Events are refreshed concurrently, `first` submitted first; their progress
+    # events are passed on as they arrive, each worker ending with a None
+    updates = queue.Queue()
+
+    def run_event(competition):
+        try:
+            for update in event_stages(competition, refresh_id, progress):
+                updates.put(update)
+        except Exception as e:
+            updates.put({**progress(config.EVENTS[competition]['Name'], "failed", 0), "Error": repr(e)})
+            raise
+        finally:
+            updates.put(None)
+
+    with ThreadPoolExecutor(max_workers=config.REFRESH_WORKERS, thread_name_prefix="scouting-event") as pool:
+        futures = [pool.submit(run_event, competition) for competition in refresh_order(events, first)]
+        remaining = len(futures)
+        while remaining:
+            update = updates.get()
+            if update is None:
+                remaining -= 1
+            else:
+                yield update
+    # Surface the first event that failed
+    for future in futures:
+        future.result()
+
+    # Stored rows of every configured event's current snapshot, with the rowid
+    # that identifies each one in the all-competitions side table, and their
+    # alliance results for the all-competitions ratings
+    current = storage.current_snapshot()["Files"]
+    event_files = {key: storage.snapshot_path(current[key][key]) for key in config.EVENTS
+                   if key in current.get(key, {})}
+    match_frames, tba_frames = [], []
+    for path in event_files.values():
+        conn = sqlite3.connect(path)
+        match_frames.append(pd.read_sql(f'SELECT rowid AS "Source Row", * FROM {_quote(MATCH_TABLE)}', conn))
+        columns = ", ".join(_quote(col) for col in storage.TBA_COLUMNS if col != 'Raw')
+        try:
+            tba_frames.append(pd.read_sql(f'SELECT {columns} FROM {_quote(TBA_TABLE)}', conn))
+        except pd.errors.DatabaseError:
+            pass
+        conn.close()
+    all_df = pd.concat(match_frames, ignore_index=True)
+    all_tba_df = pd.concat(tba_frames, ignore_index=True) if tba_frames else pd.DataFrame()
     all_df = all_df.sort_values(['Team Number', 'Competition Week', 'Match Number'])
     all_df['Team Match Number'] = all_df.groupby('Team Number').cumcount() + 1
+    yield progress("All Competitions", "read", len(all_df))
 
     # ========================================================================
     # RAW SCORE CALCULATIONS FOR ALL COMPETITIONS
@@ -418,6 +1314,9 @@ def perform_calculations():
         all_dominance_avg.rename(columns={'Dominance': 'Dominance AVG'}, inplace=True)
         all_calc_df = all_calc_df.merge(all_dominance_avg, on='Team Number', how='left')
 
+    # Ratings across all events, solving every event's alliances together
+    all_calc_df = all_calc_df.merge(ratings.compute_ratings(alliance_rows(all_tba_df)), on='Team Number', how='left')
+
     eps = 1e-6  # Small value to prevent division by zero
     all_peak = all_df['Total Score'].max()
 
@@ -442,6 +1341,8 @@ def perform_calculations():
     all_calc_df['RAW Rank'] = all_calc_df['Total RAW'].rank(method='min', ascending=False).astype(int)
     all_calc_df['Confidence Rank'] = all_calc_df['Confidence'].rank(method='min', ascending=False).astype(int)
     all_calc_df['Score Rank'] = all_calc_df['Total Score AVG'].rank(method='min', ascending=False).astype(int)
+    all_calc_df['OPR Rank'] = all_calc_df['OPR'].rank(method='min', ascending=False, na_option='bottom').astype(int)
+    all_calc_df['CCWM Rank'] = all_calc_df['CCWM'].rank(method='min', ascending=False, na_option='bottom').astype(int)
 
     # Reorder columns according to config (now rankings are included)
     all_calc_df = all_calc_df[config.CALCS_COLUMN_ORDER]
@@ -465,19 +1366,105 @@ def perform_calculations():
     all_norm_df['Event Key'] = "All Competitions"
     all_norm_df['Event Name'] = "All Competitions"
     all_norm_df['Competition Week'] = "All Weeks"
-    all_df['Event Key'] = "All Competitions"
-    all_df['Event Name'] = "All Competitions"
-    all_df['Competition Week'] = "All Weeks"
-    pdata_df['Event Key'] = "All Competitions"
-    pdata_df['Event Name'] = "All Competitions"
-    pdata_df['Competition Week'] = "All Weeks"
+    yield progress("All Competitions", "calculate", len(all_calc_df))
+
+    all_path = storage.new_snapshot_path("All Competitions")
+    try:
+        write_to_db(all_norm_df, "Normalized Data", all_path)
+        write_to_db(all_calc_df, "Calcs", all_path)
+
+        # Only the cross-event columns are stored; the rest of each all-competitions
+        # row is read from the event row through the views storage.connect creates
+        conn = sqlite3.connect(all_path)
+        create_all_competitions_table(conn)
+        all_df[['Event Key', 'Source Row'] + ALL_COMPETITIONS_COLUMNS].to_sql(
+            ALL_COMPETITIONS_TABLE, conn, if_exists='append', index=False
+        )
+        conn.close()
+    except BaseException:
+        _remove_snapshot(all_path)
+        raise
+
+    # Published with the event files it was computed from, so the side table
+    # always matches the rows it points at
+    with refresh_lock():
+        calcs_history.record(all_calc_df, "All Competitions", refresh_id)
+        record_commit(refresh_id, "All Competitions", len(all_df), {**event_files, "All Competitions": all_path})
+    prune_snapshots()
+    yield progress("All Competitions", "commit", len(all_df))
+
+    usage_after = sheets_usage()
+    if usage_after is None:
+        return {"Sheets Quota": None}
+    import sheets_client
+    return {"Sheets Quota": sheets_client.usage_delta(usage_before, usage_after)}
+
+# Drive a stage generator to the end, passing each progress event to on_progress,
+# and return its summary
+def run_stages(stages, on_progress=None):
+    while True:
+        try:
+            progress = next(stages)
+        except StopIteration as done:
+            return done.value
+        if on_progress is not None:
+            on_progress(progress)
 
-    write_to_db(all_norm_df, "Normalized Data")
-    write_to_db(all_calc_df, "Calcs")
-    write_to_db(all_df, "Scouting_Data")
-    write_to_db(pdata_df, "Pit Scouting")
+# Run the whole pipeline without following its progress; returns its summary
+def perform_calculations(events=None):
+    return run_stages(calculation_stages(events))
 
 
+# ============================================================================
+# REFRESH WORKER CLI
+# ============================================================================
+
+# Command line entry point: run a single refresh, or keep refreshing with --watch.
+# Running this as its own process lets the Streamlit app act purely as a reader.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh the scouting database.")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep refreshing at a fixed interval instead of running once")
+    parser.add_argument("--interval", type=float, default=config.REFRESH_INTERVAL_SECONDS,
+                        help="seconds between refreshes in watch mode")
+    parser.add_argument("--max-failures", type=int, default=config.REFRESH_MAX_FAILURES,
+                        help="consecutive failed refreshes before watch mode gives up")
+    args = parser.parse_args(argv)
+
+    def report(progress):
+        if progress["Stage"] == "commit":
+            print(f"[{datetime.now():%H:%M:%S}] {progress['Event']} committed "
+                  f"({progress['Rows']} rows, {progress['Elapsed']:.1f}s)")
+        elif progress["Stage"] == "failed":
+            print(f"[{datetime.now():%H:%M:%S}] {progress['Event']} failed: {progress['Error']}", file=sys.stderr)
+
+    failures = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            result = refresh(on_progress=report)
+            failures = 0
+            message = f"[{datetime.now():%H:%M:%S}] Refresh finished in {time.perf_counter() - start:.1f}s"
+            quota = result["Sheets Quota"]
+            if quota:
+                message += (f" ({quota['Requests']} Sheets requests, {quota['Retries']} retries, "
+                            f"{quota['Last Minute']}/{quota['Budget Per Minute']} in the last minute)")
+            print(message)
+        except Exception:
+            failures += 1
+            print(f"[{datetime.now():%H:%M:%S}] Refresh failed:", file=sys.stderr)
+            traceback.print_exc()
+            if not args.watch or failures >= args.max_failures:
+                return 1
+
+        if not args.watch:
+            return 0
+
+        try:
+            time.sleep(max(0.0, args.interval - (time.perf_counter() - start)))
+        except KeyboardInterrupt:
+            return 0
+
 
-# Initial calculation run on script load
-perform_calculations()
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+import collections
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import competition_config as config
+
+# Timing of page reruns and the queries they run, kept in memory for the
+# Diagnostics page. utils.get_connection hands out TimedConnections, which record
+# every statement with its row count and time (executing plus fetching), and
+# main.py wraps each page run in track_page. Both go into ring buffers shared by
+# every session, so the page shows what users at the event are actually waiting
+# on. Queries slower than config.SLOW_QUERY_SECONDS are also logged.
+#
+# Fragment reruns and the cache warming thread run outside a tracked page run;
+# their queries are filed under UNTRACKED.
+
+UNTRACKED = "Fragments and background"
+
+_queries = collections.deque(maxlen=config.DIAGNOSTICS_QUERY_BUFFER)
+_reruns = collections.deque(maxlen=config.DIAGNOSTICS_RERUN_BUFFER)
+_lock = threading.Lock()
+
+# The page run in progress on this thread, if any
+_current = threading.local()
+
+
+def _record_query(query):
+    rerun = getattr(_current, "rerun", None)
+    query["Page"] = rerun["Page"] if rerun else UNTRACKED
+    if rerun:
+        rerun["Queries"] += 1
+        rerun["Query Seconds"] += query["Seconds"]
+    with _lock:
+        _queries.append(query)
+    if query["Seconds"] >= config.SLOW_QUERY_SECONDS:
+        print(f"Warning: Slow query on {query['Page']} ({query['Seconds'] * 1000:.0f} ms, "
+              f"{query['Rows']} rows): {query['Query']}")
+
+
+# Cursor that times execute and every fetch, and records the query once its
+# rows have all been read, it is closed or it is dropped
+class TimedCursor(sqlite3.Cursor):
+    _query = None
+
+    def _finish(self):
+        query, self._query = self._query, None
+        if query is not None:
+            _record_query(query)
+
+    def _fetched(self, start, rows, done):
+        if self._query is not None:
+            self._query["Seconds"] += time.perf_counter() - start
+            self._query["Rows"] += rows
+            if done:
+                self._finish()
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        if not self.connection.recording:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._query = {"Time": time.time(), "Query": " ".join(sql.split()), "Rows": 0,
+                           "Seconds": time.perf_counter() - start}
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        size = self.arraysize if size is None else size
+        rows = super().fetchmany(size)
+        self._fetched(start, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        self._fetched(start, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+
+# Connection whose cursors are TimedCursors. The statements run while it is set
+# up (attaching files, creating views) are recorded as one connect entry instead.
+class TimedConnection(sqlite3.Connection):
+    recording = False
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or TimedCursor)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        cursor = self.cursor()
+        cursor.executemany(sql, parameters)
+        return cursor
+
+
+# Open a TimedConnection with connect(factory=...), recording the time it took
+# under `label`
+def timed_connect(connect, label):
+    start = time.perf_counter()
+    conn = connect(factory=TimedConnection)
+    _record_query({"Time": time.time(), "Query": label, "Rows": 0, "Seconds": time.perf_counter() - start})
+    conn.recording = True
+    return conn
+
+
+# Time a page run. `started` is when the rerun began, so the rerun time also
+# covers the work main.py does before the page.
+@contextmanager
+def track_page(page, started=None):
+    rerun = {"Time": time.time(), "Page": page, "Queries": 0, "Query Seconds": 0.0}
+    _current.rerun = rerun
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        _current.rerun = None
+        rerun["Page Seconds"] = end - start
+        rerun["Rerun Seconds"] = end - (start if started is None else started)
+        with _lock:
+            _reruns.append(rerun)
+
+
+# Copies of the buffered records, oldest first
+def queries():
+    with _lock:
+        return list(_queries)
+
+
+def reruns():
+    with _lock:
+        return list(_reruns)
+
+
+def clear():
+    with _lock:
+        _queries.clear()
+        _reruns.clear()
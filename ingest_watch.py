@@ -0,0 +1,231 @@
+import argparse
+import json
+import os
+import queue
+import shutil
+import sys
+import time
+import traceback
+from datetime import datetime
+
+import pandas as pd
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+import competition_config as config
+import db_calc as db
+
+# Streaming ingestion of per-match scouting submissions.
+#
+# Scouts (or the tablet sync) drop one JSON or CSV file per submission into
+# <drop directory>/<event key>/. Files are validated, merged into that event's
+# local "Data Entry" file, and every micro-batch (BATCH_SIZE files or
+# BATCH_SECONDS after the first pending file) triggers a recompute of just the
+# affected events. Accepted files move to processed/, invalid ones to rejected/
+# with an .error.txt explaining why.
+#
+# Run with: python ingest_watch.py
+
+SUBMISSION_EXTENSIONS = (".json", ".csv")
+
+# Files modified more recently than this may still be being written
+SETTLE_SECONDS = 0.5
+
+
+# Read one submission file into a dataframe of match rows
+def read_submission(path):
+    if path.endswith(".csv"):
+        return pd.read_csv(path)
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise ValueError("JSON submission must be an object or a list of objects")
+    return pd.DataFrame(data)
+
+
+# Check submitted rows against the scoring config; returns the cleaned rows
+def validate_submission(rows):
+    if rows.empty:
+        raise ValueError("submission has no rows")
+
+    required = ['Team Number', 'Match Number', config.AUTO_COLUMN, config.ENDGAME_COLUMN] + list(config.TELEOP_SCORES)
+    missing = [col for col in required if col not in rows.columns]
+    if missing:
+        raise ValueError(f"missing columns: {missing}")
+
+    rows = rows.copy()
+    for col in ['Team Number', 'Match Number'] + list(config.TELEOP_SCORES):
+        numbers = pd.to_numeric(rows[col], errors='coerce')
+        if numbers.isna().any() or (numbers < 0).any():
+            raise ValueError(f"'{col}' must be a non-negative number")
+        rows[col] = numbers
+    for col in ['Team Number', 'Match Number']:
+        if (rows[col] % 1 != 0).any():
+            raise ValueError(f"'{col}' must be a whole number")
+        rows[col] = rows[col].astype(int)
+
+    for col, allowed in ((config.AUTO_COLUMN, config.AUTO_SCORES), (config.ENDGAME_COLUMN, config.ENDGAME_SCORES)):
+        unknown = set(rows[col].dropna()) - set(allowed)
+        if unknown:
+            raise ValueError(f"unknown '{col}' values: {sorted(map(str, unknown))}")
+
+    # Keep only columns the pipeline reads
+    return rows[[col for col in db.required_match_columns() if col in rows.columns]]
+
+
+def _move(path, folder, error=None):
+    target_dir = os.path.join(os.path.dirname(path), folder)
+    os.makedirs(target_dir, exist_ok=True)
+    target = os.path.join(target_dir, os.path.basename(path))
+    shutil.move(path, target)
+    if error is not None:
+        with open(target + ".error.txt", "w", encoding="utf-8") as f:
+            f.write(error + "\n")
+
+
+# Local data source an event's submissions are merged into
+def _event_source(event_key):
+    event = config.EVENTS.get(event_key)
+    if event is None:
+        raise ValueError(f"unknown event '{event_key}'")
+    source = db.data_source_for(event)
+    if not isinstance(source, db.LocalFileDataSource):
+        raise ValueError(f"event '{event_key}' must use a local data source to accept submissions")
+    return source
+
+
+# Validate and merge a batch of submission files, then recompute the affected events.
+# Returns the number of accepted submissions per updated event key.
+def process_batch(paths):
+    accepted = {}
+    for path in paths:
+        event_key = os.path.basename(os.path.dirname(path))
+        try:
+            source = _event_source(event_key)
+            rows = validate_submission(read_submission(path))
+        except Exception as e:
+            print(f"Rejected {path}: {e}")
+            _move(path, "rejected", str(e))
+            continue
+        accepted.setdefault(event_key, (source, [], []))
+        accepted[event_key][1].append(rows)
+        accepted[event_key][2].append(path)
+
+    for event_key, (source, frames, files) in accepted.items():
+        source.append_matches(pd.concat(frames, ignore_index=True))
+        for path in files:
+            _move(path, "processed")
+
+    if accepted:
+        db.refresh(events=list(accepted))
+    return {event_key: len(files) for event_key, (_, _, files) in accepted.items()}
+
+
+# Queues submission files as they appear in the drop directory
+class SubmissionHandler(FileSystemEventHandler):
+    def __init__(self, pending, root):
+        self.pending = pending
+        self.root = root
+
+    def _queue(self, path):
+        # Only files directly inside an event folder, not processed/ or rejected/
+        if path.endswith(SUBMISSION_EXTENSIONS) and os.path.dirname(os.path.dirname(path)) == self.root:
+            self.pending.put(path)
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._queue(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self._queue(event.dest_path)
+
+
+def _existing_submissions(directory):
+    for event_key in sorted(os.listdir(directory)):
+        event_dir = os.path.join(directory, event_key)
+        if os.path.isdir(event_dir):
+            for name in sorted(os.listdir(event_dir)):
+                if name.endswith(SUBMISSION_EXTENSIONS):
+                    yield os.path.join(event_dir, name)
+
+
+# Pending files that have stopped changing. Files moved or deleted since they
+# were queued are dropped from `pending`.
+def _settled(pending):
+    now = time.time()
+    ready = []
+    for path in list(pending):
+        try:
+            if now - os.stat(path).st_mtime >= SETTLE_SECONDS:
+                ready.append(path)
+        except OSError:
+            del pending[path]
+    return ready
+
+
+def main(argv=None):
+    settings = config.STREAM_INGEST
+    parser = argparse.ArgumentParser(description="Stream scouting submissions into the database.")
+    parser.add_argument("--directory", default=settings["directory"], help="drop directory to watch")
+    parser.add_argument("--batch-size", type=int, default=settings["batch_size"],
+                        help="submissions per micro-batch")
+    parser.add_argument("--batch-seconds", type=float, default=settings["batch_seconds"],
+                        help="longest a submission waits before its batch is processed")
+    args = parser.parse_args(argv)
+
+    directory = os.path.abspath(args.directory)
+    for event_key in config.EVENTS:
+        os.makedirs(os.path.join(directory, event_key), exist_ok=True)
+
+    pending_queue = queue.Queue()
+    handler = SubmissionHandler(pending_queue, directory)
+    observer = Observer()
+    observer.schedule(handler, directory, recursive=True)
+    observer.start()
+
+    # Pick up anything dropped while the watcher was not running. Pending files
+    # map to when they were first seen.
+    pending = dict.fromkeys(_existing_submissions(directory), time.monotonic())
+    print(f"Watching {directory} (batches of {args.batch_size} or every {args.batch_seconds:g}s)")
+
+    try:
+        while True:
+            # Check whether a batch is due after every event and every quiet
+            # half second, so a steady stream still gets processed on time
+            try:
+                path = pending_queue.get(timeout=0.5)
+                pending.setdefault(path, time.monotonic())
+            except queue.Empty:
+                pass
+
+            # Only files that have stopped changing can go in a batch
+            ready = _settled(pending)
+            if not ready:
+                continue
+            if len(ready) < args.batch_size and time.monotonic() - min(pending.values()) < args.batch_seconds:
+                continue
+            for p in ready:
+                del pending[p]
+
+            start = time.perf_counter()
+            try:
+                events = process_batch(ready)
+                if events:
+                    print(f"[{datetime.now():%H:%M:%S}] Ingested {sum(events.values())} submissions for {', '.join(events)} "
+                          f"in {time.perf_counter() - start:.2f}s")
+            except Exception:
+                print(f"[{datetime.now():%H:%M:%S}] Micro-batch failed:", file=sys.stderr)
+                traceback.print_exc()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        observer.stop()
+        observer.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,34 @@
+import time
 import streamlit as st
-import db_calc as db
+import utils
+import diagnostics
 import competition_config as config
 
+# When this rerun started, for the rerun times on the Diagnostics page
+rerun_started = time.perf_counter()
+
+
+# Refresh once per server process unless a separate refresh worker owns the database.
+# db_calc pulls in pandas and the Google Sheets client, so it is only imported here.
+@st.cache_resource(show_spinner="Loading scouting data...")
+def initial_refresh():
+    if not config.EXTERNAL_REFRESH_WORKER:
+        import db_calc as db
+        db.request_refresh().result()
+    return True
+
+initial_refresh()
+
+
+# Serve the read-only data API alongside the dashboard when enabled
+@st.cache_resource
+def start_api():
+    import api_server
+    return api_server.start_in_background()
+
+if config.API_ENABLED:
+    start_api()
+
 
 # Define navigation pages
 pages = {
@@ -14,16 +41,32 @@ pages = {
         st.Page("pages/05_bubble_chart.py", title="Bubble Chart", icon=":material/bubble_chart:"),
         st.Page("pages/06_radar_chart.py", title="Radar Chart", icon=":material/radar:"),
         st.Page("pages/07_live_comp.py", title="Live Competition", icon=":material/live_tv:"),
+        st.Page("pages/08_pick_list.py", title="Pick List", icon=":material/checklist:"),
     ],
     "Guides": [
         st.Page("pages/guides/configuration.py", title="Configuration Guide", icon=":material/settings:"),
     ],
+    "Tools": [
+        st.Page("pages/09_diagnostics.py", title="Diagnostics", icon=":material/monitor_heart:"),
+    ],
 }
 
 # Set up navigation
 nav = st.navigation(pages)
 
-st.logo(image="assets/inverse polarity logo magnet.png", size="large")
+# The logo file is 4500px wide and Streamlit would downscale and re-encode it on
+# every rerun, so shrink it once per process
+@st.cache_resource
+def logo_image():
+    import io
+    from PIL import Image
+    image = Image.open("assets/inverse polarity logo magnet.png")
+    image.thumbnail((1024, 1024))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+st.logo(image=logo_image(), size="large")
 
 st.set_page_config(
     page_title="Scouting Dashboard",
@@ -37,4 +80,14 @@ if 'comp' not in st.session_state:
     st.session_state.comp = list(config.EVENTS.values())[0]["Name"]
 
 st.session_state.comp = st.sidebar.selectbox("**:material/event: Competition**", [config.EVENTS[key]["Name"] for key in config.EVENTS] + ["All Competitions"], key="competition_select")
-nav.run()
\ No newline at end of file
+
+# Pin the data this rerun reads, then prefetch the selected event whenever the
+# selection changes or new data lands
+warm_key = (st.session_state.comp, utils.pin_snapshot())
+if st.session_state.get("warmed_cache") != warm_key:
+    st.session_state.warmed_cache = warm_key
+    utils.warm_cache(*warm_key)
+
+# Page and rerun time, and the queries the page runs, for the Diagnostics page
+with diagnostics.track_page(nav.title, rerun_started):
+    nav.run()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import streamlit as st
-import db_calc as db
+import utils
+import competition_config as config
 
 # Home page content
 st.title(":material/owl: 2026 Scouting Dashboard")
@@ -13,13 +14,70 @@ Use the sidebar to navigate:
 - :material/bubble_chart: **Bubble Chart** - View trends and correlations between metrics
 - :material/radar: **Radar Chart** - View and compare teams across multiple metrics
 - :material/live_tv: **Live Competition** - View competition status during events
+- :material/checklist: **Pick List** - Get ranked alliance pick recommendations
 
 ---
 
 ### :material/database: Outdated Data?
 """)
 
-if st.button(":material/refresh: Refresh Values", width="stretch"):
-    with st.spinner("Refreshing..."):
-        db.perform_calculations()
-        st.success(":material/check: Data refreshed successfully!")
\ No newline at end of file
+last = utils.last_refresh()
+if last is not None and last["Status"] == "running":
+    st.caption(f"Refresh in progress since {last['Started At']}")
+elif last is not None and last["Status"] == "interrupted":
+    st.caption(f"Last refresh: {last['Started At']} (interrupted before it finished)")
+elif last is not None:
+    st.caption(f"Last refresh: {last['Started At']} ({last['Status']}, {last['Duration']}s)")
+
+if config.EXTERNAL_REFRESH_WORKER:
+    st.info(":material/sync: Data is refreshed automatically by the refresh worker.")
+elif st.button(":material/refresh: Refresh Values", width="stretch"):
+    import db_calc as db
+    comp = st.session_state.comp
+    first = next((key for key, event in config.EVENTS.items() if event["Name"] == comp), None)
+    flight = db.request_refresh(first=first)
+
+    # Stream the refresh until the selected competition is committed or fails; the
+    # other events keep going in the background and show up on the next rerun
+    error = None
+    with st.status("Refreshing...", expanded=True) as status:
+        for progress in flight.stream():
+            if progress["Stage"] == "failed":
+                st.write(f"**{progress['Event']}**: failed ({progress['Error']})")
+                if progress["Event"] == comp:
+                    error = progress["Error"]
+                    break
+                continue
+            st.write(
+                f"**{progress['Event']}**: {progress['Stage']} ({progress['Rows']:,} rows, {progress['Elapsed']:.1f}s)"
+            )
+            if progress["Event"] == comp and progress["Stage"] == "commit":
+                break
+        # The stream also ends when the whole refresh fails
+        if error is None and flight.done() and flight.exception() is not None:
+            error = repr(flight.exception())
+        if error is None:
+            status.update(label="Refreshed", state="complete", expanded=False)
+        else:
+            status.update(label="Refresh failed", state="error", expanded=True)
+
+    if error is not None:
+        st.error(f":material/error: Refreshing {comp} failed: {error}")
+    else:
+        # Show the refreshed data for the rest of this run
+        utils.pin_snapshot()
+        utils.warm_cache(comp)
+        if not flight.done():
+            st.success(f":material/check: {comp} refreshed! Other events are still refreshing in the background.")
+        elif flight.exception() is not None:
+            st.success(f":material/check: {comp} refreshed!")
+            st.warning(f":material/warning: Refreshing another event failed: {flight.exception()!r}")
+        else:
+            result = flight.result()
+            st.success(f":material/check: Data refreshed successfully at {result['Started At']:%H:%M:%S}!")
+            quota = result["Sheets Quota"]
+            if quota:
+                st.caption(
+                    f"Google Sheets: {quota['Requests']} requests, {quota['Retries']} retries, "
+                    f"{quota['Last Minute']}/{quota['Budget Per Minute']} used in the last minute"
+                )
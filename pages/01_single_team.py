@@ -18,3 +18,6 @@ except ValueError:
 
 # Display team scores
 utils.plot_team_scores(teamNumber, show_table=True, dataType="single team")
+
+# Display how the team's rankings moved over the event
+utils.plot_rank_history(teamNumber)
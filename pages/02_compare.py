@@ -16,21 +16,25 @@ st.session_state.showTeleop = st.sidebar.checkbox(":material/clock_loader_80: Te
 st.session_state.showEndgame = st.sidebar.checkbox(":material/flag: Endgame", st.session_state.get("showEndgame", True))
 st.session_state.showLegend = st.sidebar.checkbox(":material/legend_toggle: Show Legend", st.session_state.get("showLegend", True))
 
-# Collect team numbers for comparison
-teamNumbers = []
-for i in range(1, 7):
-    input_value = st.sidebar.text_input(f":material/numbers: Team {i}", "", key=f"compare_team_{i}")
-    if input_value.strip():
-        try:
-            teamNumber = int(input_value)
-            teamNumbers.append(teamNumber)
-        except ValueError:
-            st.error(f"Enter a valid number for Team {i}.")
-            st.stop()
+# Each team slot is its own fragment: editing one team number reruns and
+# redraws only that slot. The data type toggles above apply to every chart,
+# so changing them still reruns the whole page.
+@st.fragment
+def team_slot(slot):
+    input_value = st.text_input(f":material/numbers: Team {slot}", "", key=f"compare_team_{slot}")
+    if not input_value.strip():
+        return
+    try:
+        teamNumber = int(input_value)
+    except ValueError:
+        st.error(f"Enter a valid number for Team {slot}.")
+        return
+    # Keyed per slot so the same team can be entered twice
+    utils.plot_team_scores(teamNumber, chart_key=f"compare_chart_{slot}")
 
-# Display teams in 3-column layout
-for i in range(0, len(teamNumbers), 3):
+# Display team slots in 3-column layout
+for i in range(1, 7, 3):
     columns = st.columns(3)
-    for j, teamNumber in enumerate(teamNumbers[i:i + 3]):
+    for j in range(3):
         with columns[j]:
-            utils.plot_team_scores(teamNumber)
+            team_slot(i + j)
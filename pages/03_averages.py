@@ -1,23 +1,28 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.colors as mc
 import utils
 import competition_config as config
 
 st.set_page_config(layout="wide")
 st.title(":material/table: Averages")
 
-conn = utils.get_connection()
-
 # Load calculated averages for all teams
-df = pd.read_sql(f"SELECT * FROM Calcs WHERE `Event Name` = '{st.session_state.comp}'", conn)
-
-# Create color gradients for different scoring phases
-AutoCmap = mc.LinearSegmentedColormap.from_list("BlueGray", config.AUTO_COLORS)
-TeleopCmap = mc.LinearSegmentedColormap.from_list("OrangeGray", config.TELEOP_COLORS)
-EndgameCmap = mc.LinearSegmentedColormap.from_list("YellowGray", config.ENDGAME_COLORS)
-TotalCmap = mc.LinearSegmentedColormap.from_list("GreenGray", config.TOTAL_COLORS)
-RAWCmap = mc.LinearSegmentedColormap.from_list("PurpleGray", config.RAW_COLORS)
+df = utils.load_calcs()
+
+# Create color gradients for different scoring phases, once per server process.
+# matplotlib is only needed for these, so it is imported on first use.
+@st.cache_resource
+def colormaps():
+    import matplotlib.colors as mc
+    return (
+        mc.LinearSegmentedColormap.from_list("BlueGray", config.AUTO_COLORS),
+        mc.LinearSegmentedColormap.from_list("OrangeGray", config.TELEOP_COLORS),
+        mc.LinearSegmentedColormap.from_list("YellowGray", config.ENDGAME_COLORS),
+        mc.LinearSegmentedColormap.from_list("GreenGray", config.TOTAL_COLORS),
+        mc.LinearSegmentedColormap.from_list("PurpleGray", config.RAW_COLORS),
+        mc.LinearSegmentedColormap.from_list("RedGray", config.RATING_COLORS),
+    )
+
+AutoCmap, TeleopCmap, EndgameCmap, TotalCmap, RAWCmap, RatingCmap = colormaps()
 
 df.drop(columns=['Event Key'], inplace=True, errors='ignore')
 
@@ -29,8 +34,7 @@ df = (df.style
     .background_gradient(cmap=EndgameCmap, subset=config.ENDGAME_AVG_COLUMNS, axis=0)
     .background_gradient(cmap=TotalCmap, subset=config.TOTAL_AVG_COLUMNS, axis=0)
     .background_gradient(cmap=RAWCmap, subset=config.RAW_COLUMNS, axis=0)
+    .background_gradient(cmap=RatingCmap, subset=config.RATING_COLUMNS, axis=0)
 )
 
 st.dataframe(df, width="stretch")
-
-conn.close()
@@ -7,28 +7,9 @@ import competition_config as config
 st.set_page_config(layout="wide")
 st.title(":material/scoreboard: Match Reference")
 
-conn = utils.get_connection()
-
 # Get match number input
-try:
-    matchNumber = int(st.sidebar.text_input("Match Number", "1", key="match_reference_number"))
-except ValueError:
-    st.error("Enter a valid match number")
-    st.stop()
-
-# Fetch match lineup and videos from TBA data
-test_df = pd.read_sql(
-    'SELECT "alliances.blue.team_keys" AS blue_keys, "alliances.red.team_keys" AS red_keys, "videos" '
-    'FROM "TBA Data" WHERE "match_number" = ? AND "comp_level" = "qm" AND "Event Name" = ?',
-    conn,
-    params=(matchNumber, st.session_state.comp)
-)
-
-if test_df.empty:
-    st.error("Enter a valid match number")
-    st.stop()
-
-row = test_df.iloc[0]
+matchInput = st.sidebar.text_input("Match Number", "1", key="match_reference_number")
+accuracy_df = utils.load_accuracy()
 
 def parse_videos(value):
     if isinstance(value, list):
@@ -60,82 +41,159 @@ def key_to_team_number(team_key):
     except ValueError:
         return None
 
-blue_keys = parse_team_keys(row["blue_keys"])
-red_keys = parse_team_keys(row["red_keys"])
-
-positions = []
-for idx, team_key in enumerate(red_keys[:3], start=1):
-    team_number = key_to_team_number(team_key)
-    if team_number is not None:
-        positions.append({"Team Number": team_number, "Position": f"RED {idx}"})
-for idx, team_key in enumerate(blue_keys[:3], start=1):
-    team_number = key_to_team_number(team_key)
-    if team_number is not None:
-        positions.append({"Team Number": team_number, "Position": f"BLUE {idx}"})
-
-teams_df = pd.DataFrame(positions)
-if teams_df.empty:
-    st.error("Match data is missing team keys.")
-    st.stop()
-
-# Fetch scores for all teams in this match
-placeholders = ','.join(['?' for _ in teams_df["Team Number"]])
-match_score_df = pd.read_sql(
-    f'SELECT "Team Number", "Total Score", "Auto Score", "Teleop Score", "Endgame Score" FROM "Scouting_Data" WHERE "Team Number" IN ({placeholders}) AND "Match Number" = ? AND "Event Name" = ?',
-    conn,
-    params=list(teams_df["Team Number"]) + [matchNumber, st.session_state.comp]
-)
-
-# Merge match lineup with average scores
-result_df = (
-    teams_df
-    .merge(match_score_df, on="Team Number", how="left")
-)
-
-result_df["Team Number"] = result_df["Team Number"].astype(str)
-result_df["Position"] = result_df["Position"].str.upper()
-result_df["Alliance"] = result_df["Position"].str[:4]
-result_df["Slot"] = result_df["Position"].str[-1]
-result_df.sort_values(by=["Alliance"], inplace=True)
-result_df.drop(columns=["Alliance", "Slot"], inplace=True)
-
-scouting_blue_score = result_df[result_df["Position"].str.contains("BLUE")][["Auto Score", "Teleop Score", "Endgame Score"]].sum().sum()
-scouting_red_score = result_df[result_df["Position"].str.contains("RED")][["Auto Score", "Teleop Score", "Endgame Score"]].sum().sum()
-
-result_df = result_df.style.apply(utils.color_alliance, axis=1).set_properties(subset=["Team Number"], **{"font-weight": "bold"})
-
-
-match_df = pd.read_sql(
-    'SELECT "alliances.blue.score" AS blue_score, "alliances.red.score" AS red_score FROM "TBA Data" WHERE "match_number" = ? AND "comp_level" = "qm" AND "Event Name" = ?',
-    conn,
-    params=(matchNumber, st.session_state.comp)
-)
-
-header = f"Match {matchNumber}"
-
-st.header(header)
-
-st.subheader(":material/poker_chip: Team Lineup & Averages")
-st.dataframe(result_df, width="stretch")
-
-st.subheader(":material/scoreboard: Match Scores")
-st.markdown("##### As Given by TBA")
-if not match_df.empty:
-    tba_blue_score = match_df.iloc[0]["blue_score"]
-    tba_red_score = match_df.iloc[0]["red_score"]
-    st.markdown(f"**Red Alliance:** {tba_red_score}  |  **Blue Alliance:** {tba_blue_score}")
-st.markdown("##### Calculated from Scouting Data")
-if not match_df.empty:
-    st.markdown(f"**Red Alliance:** {scouting_red_score}  |  **Blue Alliance:** {scouting_blue_score}")
-
-# Display video if available
-st.subheader(":material/youtube_activity: Video")
-videos = parse_videos(row.get("videos", []))
-if videos:
-    for video in videos:
-        video_id = video.get("key")
-        st.video(f"https://www.youtube.com/watch?v={video_id}")
-else:
-    st.info("No video available for this match")
-
-conn.close()
+# Alliance score or error for display; NaN when no team on the alliance was
+# scouted, which is common early in an event
+def score_text(value, spec="g", missing="–"):
+    return missing if pd.isna(value) else format(value, spec)
+
+def show_match():
+    try:
+        matchNumber = int(matchInput)
+    except ValueError:
+        st.error("Enter a valid match number")
+        return
+
+    # Fetch match lineup and videos from TBA data
+    conn = utils.get_connection()
+    test_df = pd.read_sql(
+        'SELECT "alliances.blue.team_keys" AS blue_keys, "alliances.red.team_keys" AS red_keys, "videos" '
+        'FROM "TBA Data" WHERE "match_number" = ? AND "comp_level" = "qm" AND "Event Name" = ?',
+        conn,
+        params=(matchNumber, st.session_state.comp)
+    )
+    conn.close()
+
+    if test_df.empty:
+        st.error("Enter a valid match number")
+        return
+
+    row = test_df.iloc[0]
+
+    blue_keys = parse_team_keys(row["blue_keys"])
+    red_keys = parse_team_keys(row["red_keys"])
+
+    positions = []
+    for idx, team_key in enumerate(red_keys[:3], start=1):
+        team_number = key_to_team_number(team_key)
+        if team_number is not None:
+            positions.append({"Team Number": team_number, "Position": f"RED {idx}"})
+    for idx, team_key in enumerate(blue_keys[:3], start=1):
+        team_number = key_to_team_number(team_key)
+        if team_number is not None:
+            positions.append({"Team Number": team_number, "Position": f"BLUE {idx}"})
+
+    teams_df = pd.DataFrame(positions)
+    if teams_df.empty:
+        st.error("Match data is missing team keys.")
+        return
+
+    # Fetch scores for all teams in this match
+    event_df = utils.load_matches()
+    match_score_df = event_df.loc[
+        event_df["Team Number"].isin(teams_df["Team Number"]) & (event_df["Match Number"] == matchNumber),
+        ["Team Number", "Total Score", "Auto Score", "Teleop Score", "Endgame Score"]
+    ]
+
+    # Merge match lineup with average scores
+    result_df = (
+        teams_df
+        .merge(match_score_df, on="Team Number", how="left")
+    )
+
+    result_df["Team Number"] = result_df["Team Number"].astype(str)
+    result_df["Position"] = result_df["Position"].str.upper()
+    result_df["Alliance"] = result_df["Position"].str[:4]
+    result_df["Slot"] = result_df["Position"].str[-1]
+    result_df.sort_values(by=["Alliance"], inplace=True)
+    result_df.drop(columns=["Alliance", "Slot"], inplace=True)
+
+    result_df = result_df.style.apply(utils.color_alliance, axis=1).set_properties(subset=["Team Number"], **{"font-weight": "bold"})
+
+    # Alliance totals were computed with every other match during the refresh
+    match_df = pd.DataFrame()
+    if accuracy_df is not None:
+        match_df = accuracy_df[accuracy_df["Match Number"] == matchNumber].set_index("Alliance")
+
+    st.header(f"Match {matchNumber}")
+
+    st.subheader(":material/poker_chip: Team Lineup & Averages")
+    st.dataframe(result_df, width="stretch")
+
+    st.subheader(":material/scoreboard: Match Scores")
+    if {"red", "blue"}.issubset(match_df.index):
+        red, blue = match_df.loc["red"], match_df.loc["blue"]
+        st.markdown("##### As Given by TBA")
+        st.markdown(f"**Red Alliance:** {score_text(red['TBA Score'])}  |  **Blue Alliance:** {score_text(blue['TBA Score'])}")
+        st.markdown("##### Calculated from Scouting Data")
+        st.markdown(f"**Red Alliance:** {score_text(red['Scouted Score'], missing='not scouted')}  |  "
+                    f"**Blue Alliance:** {score_text(blue['Scouted Score'], missing='not scouted')}")
+        st.caption(f"Scouting error: red {score_text(red['Error'], '+g')}, blue {score_text(blue['Error'], '+g')}")
+    else:
+        st.info("Scores appear here once the match has been played and the data refreshed.")
+
+    # Field-by-field scoring as reported by TBA, kept in the match's raw record
+    breakdown = (utils.load_tba_match(matchNumber) or {}).get("score_breakdown")
+    if breakdown:
+        with st.expander("TBA Score Breakdown"):
+            breakdown_df = pd.DataFrame({
+                color.title(): pd.json_normalize(breakdown[color]).iloc[0].astype(str)
+                for color in ("red", "blue") if breakdown.get(color)
+            })
+            st.dataframe(breakdown_df, width="stretch")
+
+    # Display video if available
+    st.subheader(":material/youtube_activity: Video")
+    videos = parse_videos(row.get("videos", []))
+    if videos:
+        for video in videos:
+            video_id = video.get("key")
+            st.video(f"https://www.youtube.com/watch?v={video_id}")
+    else:
+        st.info("No video available for this match")
+
+# Every alliance of the event, biggest scouted vs TBA discrepancy first, to find bad scouting data
+def show_accuracy():
+    if accuracy_df is None or accuracy_df.empty:
+        st.info("No match accuracy data yet. It is computed when the data is refreshed.")
+        return
+
+    scored = accuracy_df.dropna(subset=["Error"])
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Alliances Compared", len(scored))
+    col2.metric("Mean Absolute Error", score_text(scored['Abs Error'].mean(), ".1f"))
+    col3.metric("Mean Signed Error", score_text(scored['Error'].mean(), "+.1f"))
+
+    columns = ["Match Number", "Alliance", "Teams", "Teams Scouted", "Scouted Score", "TBA Score", "Error",
+               "Abs Error", "Scouted Auto", "Scouted Teleop", "Scouted Endgame"]
+    if st.session_state.comp == "All Competitions":
+        columns.insert(0, "Event Name")
+    st.dataframe(
+        accuracy_df.sort_values("Abs Error", ascending=False, na_position="last")[columns],
+        width="stretch",
+        hide_index=True
+    )
+
+    # Alliance errors attributed to the scouters who recorded each robot
+    st.subheader(":material/person_check: Scouter Reliability")
+    scouters_df = utils.load_scouters()
+    if scouters_df is None or scouters_df.empty:
+        st.info("No scouter data yet. It needs fully scouted alliances with TBA results.")
+        return
+    st.caption(
+        "Bias is how many points per robot a scouter's rows are off from TBA (negative: under-counted). "
+        "Error Variance is how much that error varies from robot to robot."
+    )
+    columns = ["Scouter", "Rows", "Alliances", "Bias", "Error Variance", "Alliance Abs Error"]
+    if st.session_state.comp == "All Competitions":
+        columns.insert(0, "Event Name")
+    st.dataframe(
+        scouters_df.assign(order=scouters_df["Bias"].abs()).sort_values("order", ascending=False)[columns],
+        width="stretch",
+        hide_index=True
+    )
+
+matchTab, accuracyTab = st.tabs([":material/sports_score: Match", ":material/rule: Scouting Accuracy"])
+with matchTab:
+    show_match()
+with accuracyTab:
+    show_accuracy()
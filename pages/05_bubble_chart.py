@@ -1,5 +1,4 @@
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
 import utils
 import competition_config as config
@@ -7,10 +6,8 @@ import competition_config as config
 st.set_page_config(layout="wide")
 st.title(":material/bubble_chart: Bubble Chart")
 
-conn = utils.get_connection()
-
 # Load all calculated metrics
-df = pd.read_sql(f'SELECT * FROM "Calcs" WHERE `Event Name` = "{st.session_state.comp}"', conn)
+df = utils.load_calcs()
 
 # Selectboxes for choosing X and Y axes from available columns
 xAxis = st.sidebar.selectbox(":material/line_axis: X-Axis", ['Select X-Axis'] + df.columns.tolist(), key="bubble_x_axis")
@@ -55,5 +52,3 @@ else:
     )
 
     st.plotly_chart(fig, config=configs)
-
-conn.close()
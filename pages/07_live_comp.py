@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import requests
 import datetime
+import utils
+import predictor
 import competition_config as config
 
 st.set_page_config(layout="wide")
@@ -64,6 +66,40 @@ alliance_color = (
 )
 st.write("Put on the {} bumpers".format(alliance_color))
 
+# Predict every upcoming match from each team's scouted score distribution
+def to_team_numbers(teams):
+    return [int(team) for team in teams if str(team).isdigit()]
+
+upcoming = [m for m in matches if m.get("status") != "On field"]
+schedule = pd.DataFrame({
+    "Match": [m.get("label") for m in upcoming],
+    "Red Teams": [to_team_numbers(m.get("redTeams", [])) for m in upcoming],
+    "Blue Teams": [to_team_numbers(m.get("blueTeams", [])) for m in upcoming],
+})
+
+conn = utils.get_connection(config.EVENTS[config.EVENT_KEY]["Name"])
+match_df = pd.read_sql(
+    'SELECT "Team Number", "Team Match Number", "Auto Score", "Teleop Score", "Endgame Score", '
+    '"Auto RAW", "Teleop RAW", "Endgame RAW" FROM "Scouting_Data" WHERE "Event Key" = ?',
+    conn,
+    params=(config.EVENT_KEY,)
+)
+conn.close()
+
+if not match_df.empty:
+    predictions = predictor.simulate_matches(schedule, predictor.team_distributions(match_df))
+    next_prediction = predictions[predictions["Match"] == my_next_match.get("label")]
+    if not next_prediction.empty:
+        prediction = next_prediction.iloc[0]
+        win_chance = prediction["Red Win %"] if alliance_color == "red" else prediction["Blue Win %"]
+        margin = prediction["Expected Margin"] if alliance_color == "red" else -prediction["Expected Margin"]
+        st.write("Predicted win chance: {}% (expected margin {:+.1f})".format(win_chance, margin))
+
+    st.subheader("Match Predictions")
+    predictions["Red Teams"] = predictions["Red Teams"].map(lambda teams: ", ".join(map(str, teams)))
+    predictions["Blue Teams"] = predictions["Blue Teams"].map(lambda teams: ", ".join(map(str, teams)))
+    st.dataframe(predictions, width="stretch", hide_index=True)
+
 estimated_queue_time = my_next_match.get("times", {}).get("estimatedQueueTime")
 if estimated_queue_time:
     st.write(
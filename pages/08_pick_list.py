@@ -0,0 +1,40 @@
+import streamlit as st
+import utils
+import picklist
+import competition_config as config
+
+st.set_page_config(layout="wide")
+st.title(":material/checklist: Pick List")
+
+# Build the team metric matrix once per event and refresh
+@st.cache_data(show_spinner=False)
+def load_matrix(comp, generation):
+    return picklist.TeamMatrix(utils.event_calcs(comp, generation))
+
+matrix = load_matrix(st.session_state.comp, utils.data_generation())
+
+try:
+    our_team = int(st.sidebar.text_input(":material/numbers: Our Team", "1100", key="picklist_team_number"))
+except ValueError:
+    st.error("Please enter a valid integer team number.")
+    st.stop()
+
+if matrix.index_of(our_team) is None:
+    st.error(f"Team {our_team} not found in data.")
+    st.stop()
+
+# Teams already picked or declined are removed from the search
+taken = st.sidebar.multiselect(
+    ":material/block: Taken Teams",
+    [team for team in matrix.teams.tolist() if team != our_team],
+    key="picklist_taken",
+)
+
+recommendations = picklist.recommend(matrix, our_team, taken)
+
+if recommendations.empty:
+    st.info("Not enough available teams to build an alliance.")
+    st.stop()
+
+st.subheader(":material/group_add: Recommended Picks")
+st.dataframe(recommendations, width="stretch", hide_index=True)
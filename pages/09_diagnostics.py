@@ -0,0 +1,69 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+import diagnostics
+import competition_config as config
+
+st.set_page_config(layout="wide")
+st.title(":material/monitor_heart: Diagnostics")
+
+st.caption(
+    f"Page reruns and queries since the server started, across every session (the last "
+    f"{config.DIAGNOSTICS_RERUN_BUFFER} reruns and {config.DIAGNOSTICS_QUERY_BUFFER} queries). "
+    f"Queries over {config.SLOW_QUERY_SECONDS * 1000:.0f} ms are also logged."
+)
+
+if st.sidebar.button("Clear Diagnostics", key="diagnostics_clear"):
+    diagnostics.clear()
+
+reruns_df = pd.DataFrame(diagnostics.reruns())
+queries_df = pd.DataFrame(diagnostics.queries())
+
+# p50/p95/p99 of a seconds column per group, in milliseconds
+def percentiles(df, by, column):
+    table = df.groupby(by)[column].quantile([0.5, 0.95, 0.99]).unstack() * 1000
+    table.columns = ["p50 ms", "p95 ms", "p99 ms"]
+    return table
+
+st.subheader(":material/web: Pages")
+if reruns_df.empty:
+    st.info("No page reruns recorded yet.")
+else:
+    grouped = reruns_df.groupby("Page")
+    pages_df = (
+        grouped.size().rename("Reruns").to_frame()
+        .join(percentiles(reruns_df, "Page", "Rerun Seconds"))
+        .join((grouped["Page Seconds"].median() * 1000).rename("Page p50 ms"))
+        .join(grouped["Queries"].mean().rename("Queries/Rerun"))
+        .join((grouped["Query Seconds"].median() * 1000).rename("Query p50 ms/Rerun"))
+        .sort_values("p95 ms", ascending=False)
+    )
+    st.caption("Rerun time runs from the start of the script to the end of the page; query time is the part spent in the database.")
+    st.dataframe(pages_df.round(1), width="stretch")
+
+st.subheader(":material/database: Queries")
+if queries_df.empty:
+    st.info("No queries recorded yet.")
+else:
+    grouped = queries_df.groupby("Query")
+    query_stats = (
+        grouped.size().rename("Count").to_frame()
+        .join(percentiles(queries_df, "Query", "Seconds"))
+        .join((grouped["Seconds"].max() * 1000).rename("Max ms"))
+        .join(grouped["Rows"].mean().rename("Rows (mean)"))
+        .join(grouped["Page"].agg(lambda pages: ", ".join(sorted(set(pages)))).rename("Pages"))
+        .sort_values("p95 ms", ascending=False)
+        .reset_index()
+    )
+    st.dataframe(query_stats.round(1), width="stretch", hide_index=True)
+
+    st.subheader(":material/hourglass_bottom: Slow Queries")
+    slow = queries_df[queries_df["Seconds"] >= config.SLOW_QUERY_SECONDS]
+    if slow.empty:
+        st.info("No query has gone over the threshold.")
+    else:
+        slow = slow.assign(
+            Time=slow["Time"].map(datetime.fromtimestamp),
+            ms=slow["Seconds"] * 1000
+        ).sort_values("Time", ascending=False)
+        st.dataframe(slow[["Time", "Page", "ms", "Rows", "Query"]].round(1), width="stretch", hide_index=True)
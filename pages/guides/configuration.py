@@ -17,6 +17,13 @@ GOOGLE_SHEET = "Test Data"
 
 Change this to match your Google Sheet name for the competition.
 
+#### Events
+Each event in `EVENTS` is stored in its own database file. The All Competitions view attaches every
+event's file to one SQLite connection. SQLite allows at most 10 attached files in most builds, and one of them
+is the all-competitions file, so keep **at most 9 events** in `EVENTS`. If there are more, All Competitions
+reads fail with an error naming the limit. To archive a finished event, remove it from `EVENTS`; its files stay
+on disk and it is no longer attached.
+
 ### 2. Scoring Rules
 
 #### Endgame Scoring
@@ -80,6 +87,20 @@ ENDGAME_COLUMN = "Endgame"     # Column name in your data sheet
 AUTO_COLUMN = "Auto Climb"      # Column name in your data sheet
 ```
 
+Only the columns listed above (plus `Team Number`, `Match Number` and the teleop scoring columns) are read from the
+"Data Entry" sheet. To load any other column, add it to:
+
+```python
+EXTRA_MATCH_COLUMNS = ['Scouter Initials']
+```
+
+The column naming who scouted each row is used for the scouter reliability table on Match Reference:
+
+```python
+SCOUTER_COLUMN = "Scouter Initials"
+SCOUTER_BIAS_RIDGE = 1.0       # Pulls scouters with few rows towards zero bias
+```
+
 ### 4. Calculated Metrics
 
 Define which stats are calculated for each team:
@@ -115,6 +136,9 @@ RADAR_CHART_CONFIG = {
 }
 ```
 
+The radar chart normalizes these columns from the Calcs table when the page loads (max scaled, percentile or
+z-score, chosen in the sidebar), so changes here show up without refreshing the data.
+
 ## Make sure
 
 - **Column Names**: Make sure column names in the config match exactly with your Google Sheet column headers
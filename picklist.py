@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+import competition_config as config
+
+
+# Dense team-by-metric matrix from Calcs, each metric scaled to 0-1 by its max.
+# Built once per event; everything below works on row indices into it.
+class TeamMatrix:
+    def __init__(self, calc_df):
+        self.coverage_metrics = list(config.PICKLIST_CONFIG['coverage'].keys())
+        self.average_metrics = list(config.PICKLIST_CONFIG['average'].keys())
+        metrics = self.coverage_metrics + self.average_metrics
+
+        values = calc_df[metrics].apply(pd.to_numeric, errors='coerce').fillna(0.0).clip(lower=0.0).to_numpy(dtype=float)
+        peaks = values.max(axis=0)
+        values = np.divide(values, peaks, out=np.zeros_like(values), where=peaks > 0)
+
+        self.teams = calc_df['Team Number'].to_numpy()
+        self.coverage = values[:, :len(self.coverage_metrics)]
+        self.average = values[:, len(self.coverage_metrics):]
+        self.coverage_weights = np.array(list(config.PICKLIST_CONFIG['coverage'].values()), dtype=float)
+        self.average_weights = np.array(list(config.PICKLIST_CONFIG['average'].values()), dtype=float)
+
+    def index_of(self, team):
+        matches = np.flatnonzero(self.teams == team)
+        return int(matches[0]) if len(matches) else None
+
+
+# Alliance value for broadcast stacks of robots. Coverage metrics combine as
+# 1 - Π(1 - x): a second robot strong where the first is already strong adds less
+# than one covering a weakness. Average metrics (ACE, consistency...) are averaged.
+def _alliance_value(matrix, coverage_missing, average_sum, robots):
+    coverage = (1.0 - coverage_missing) @ matrix.coverage_weights
+    average = (average_sum / robots) @ matrix.average_weights
+    return coverage + average
+
+
+# Ranked (second pick, third pick) recommendations for our alliance, the best
+# `limit` partner pairs. A pair is unordered; the partner with the better pair
+# score with us is listed as the second pick.
+# Candidates are visited in order of an optimistic bound (their value with an
+# ideal third robot built from the best remaining value of every metric), which
+# no alliance including them can beat. Each candidate is paired only with the
+# candidates visited after it, and the search stops once the next bound is below
+# the current limit-th best alliance.
+def recommend(matrix, our_team, taken=(), limit=None, block_size=None):
+    limit = limit or config.PICKLIST_CONFIG['recommendations']
+    block_size = block_size or config.PICKLIST_CONFIG['block_size']
+    columns = ['Second Pick', 'Third Pick', 'Alliance Score', 'Pair Score']
+
+    ours = matrix.index_of(our_team)
+    if ours is None:
+        return pd.DataFrame(columns=columns)
+
+    available = ~np.isin(matrix.teams, list(taken))
+    available[ours] = False
+    candidates = np.flatnonzero(available)
+    if len(candidates) < 2:
+        return pd.DataFrame(columns=columns)
+
+    our_missing = 1.0 - matrix.coverage[ours]
+    our_average = matrix.average[ours]
+
+    # Pair scores and the optimistic bound for every candidate at once
+    pair_missing = our_missing * (1.0 - matrix.coverage[candidates])
+    pair_average = our_average + matrix.average[candidates]
+    pair_scores = _alliance_value(matrix, pair_missing, pair_average, 2)
+
+    ideal_coverage = matrix.coverage[candidates].max(axis=0)
+    ideal_average = matrix.average[candidates].max(axis=0)
+    bounds = _alliance_value(matrix, pair_missing * (1.0 - ideal_coverage), pair_average + ideal_average, 3)
+    order = np.argsort(-bounds, kind='stable')
+    position = np.empty(len(order), dtype=int)
+    position[order] = np.arange(len(order))
+
+    # Best alliances so far as parallel arrays of candidate indices and scores
+    firsts = np.empty(0, dtype=int)
+    seconds = np.empty(0, dtype=int)
+    best = np.empty(0)
+    for start in range(0, len(order), block_size):
+        block = order[start:start + block_size]
+        # The bound is computed in another order than the scores, so allow for rounding
+        if len(best) >= limit and bounds[block[0]] < best.min() - 1e-9:
+            break
+
+        # (block, candidates, metrics) stack of every triple in this block
+        missing = pair_missing[block][:, None, :] * (1.0 - matrix.coverage[candidates])[None, :, :]
+        averages = pair_average[block][:, None, :] + matrix.average[candidates][None, :, :]
+        scores = _alliance_value(matrix, missing, averages, 3)
+        # Pairs with a candidate visited earlier were scored with that one (and a
+        # team can't be picked twice)
+        scores[position[None, :] <= position[block][:, None]] = -np.inf
+
+        rows, cols = np.nonzero(np.isfinite(scores))
+        firsts = np.concatenate([firsts, block[rows]])
+        seconds = np.concatenate([seconds, cols])
+        best = np.concatenate([best, scores[rows, cols]])
+        if len(best) > limit:
+            keep = np.argpartition(-best, limit - 1)[:limit]
+            firsts, seconds, best = firsts[keep], seconds[keep], best[keep]
+
+    ranked = np.argsort(-best, kind='stable')
+    firsts, seconds, best = firsts[ranked], seconds[ranked], best[ranked]
+    swap = pair_scores[seconds] > pair_scores[firsts]
+    second = np.where(swap, seconds, firsts)
+    third = np.where(swap, firsts, seconds)
+    return pd.DataFrame({
+        'Second Pick': matrix.teams[candidates[second]],
+        'Third Pick': matrix.teams[candidates[third]],
+        'Alliance Score': np.round(best, 3),
+        'Pair Score': np.round(pair_scores[second], 3),
+    })
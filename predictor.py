@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+import competition_config as config
+
+PHASES = ['Auto', 'Teleop', 'Endgame']
+ALLIANCE_SIZE = 3
+
+
+# Per-team scoring distribution for each phase. The center blends the team's
+# match average with its latest RAW (recent form); the spread is the team's
+# standard deviation, falling back to the event-wide spread for teams with one match.
+def team_distributions(match_df):
+    score_columns = [f'{phase} Score' for phase in PHASES]
+    raw_columns = [f'{phase} RAW' for phase in PHASES]
+
+    grouped = match_df.groupby('Team Number')
+    mean = grouped[score_columns].mean()
+    std = grouped[score_columns].std()
+    std = std.fillna(match_df[score_columns].std()).fillna(0.0)
+
+    latest = match_df.sort_values('Team Match Number').groupby('Team Number').tail(1).set_index('Team Number')
+    raw = latest[raw_columns].reindex(mean.index)
+    raw.columns = score_columns
+    center = config.PREDICTION_RAW_WEIGHT * raw.fillna(mean) + (1 - config.PREDICTION_RAW_WEIGHT) * mean
+
+    distributions = pd.DataFrame(index=mean.index)
+    for phase, column in zip(PHASES, score_columns):
+        distributions[f'{phase} Mean'] = center[column]
+        distributions[f'{phase} STDEV'] = std[column]
+    return distributions
+
+
+# Map each alliance slot of the schedule to a row of the distribution arrays.
+# Teams without scouting data play as an event-average robot; missing slots score nothing.
+def _slot_indices(schedule, teams):
+    unknown, empty = len(teams), len(teams) + 1
+    positions = {team: index for index, team in enumerate(teams)}
+    slots = np.full((len(schedule), 2 * ALLIANCE_SIZE), empty, dtype=int)
+    for row, (red, blue) in enumerate(zip(schedule['Red Teams'], schedule['Blue Teams'])):
+        for offset, alliance in ((0, red), (ALLIANCE_SIZE, blue)):
+            for slot, team in enumerate(list(alliance)[:ALLIANCE_SIZE]):
+                slots[row, offset + slot] = positions.get(team, unknown)
+    return slots
+
+
+# Simulate every scheduled match at once. Scores are drawn as arrays of shape
+# (matches, simulations, teams) per phase, clipped at zero, and summed per alliance.
+# Returns the schedule with red/blue win probabilities, expected scores and margin.
+def simulate_matches(schedule, distributions, simulations=None, seed=None):
+    simulations = simulations or config.PREDICTION_SIMULATIONS
+    schedule = schedule.reset_index(drop=True)
+    if schedule.empty:
+        return schedule.assign(**{
+            'Red Win %': [], 'Blue Win %': [], 'Red Expected': [], 'Blue Expected': [], 'Expected Margin': []
+        })
+
+    rng = np.random.default_rng(seed)
+    teams = distributions.index.tolist()
+    slots = _slot_indices(schedule, teams)
+
+    totals = np.zeros((len(schedule), simulations, 2 * ALLIANCE_SIZE), dtype=np.float32)
+    for phase in PHASES:
+        means = distributions[f'{phase} Mean'].to_numpy(dtype=np.float32)
+        stdevs = distributions[f'{phase} STDEV'].to_numpy(dtype=np.float32)
+        # Extra rows: the event-average robot, then the empty slot
+        means = np.append(means, [means.mean() if len(means) else 0.0, 0.0]).astype(np.float32)
+        stdevs = np.append(stdevs, [stdevs.mean() if len(stdevs) else 0.0, 0.0]).astype(np.float32)
+
+        draws = rng.standard_normal((len(schedule), simulations, 2 * ALLIANCE_SIZE), dtype=np.float32)
+        draws *= stdevs[slots][:, None, :]
+        draws += means[slots][:, None, :]
+        np.maximum(draws, 0, out=draws)
+        totals += draws
+
+    red = totals[:, :, :ALLIANCE_SIZE].sum(axis=2)
+    blue = totals[:, :, ALLIANCE_SIZE:].sum(axis=2)
+    margin = red - blue
+    red_win = (margin > 0).mean(axis=1) + 0.5 * (margin == 0).mean(axis=1)
+
+    return schedule.assign(**{
+        'Red Win %': np.round(red_win * 100, 1),
+        'Blue Win %': np.round((1 - red_win) * 100, 1),
+        'Red Expected': np.round(red.mean(axis=1, dtype=np.float64), 1),
+        'Blue Expected': np.round(blue.mean(axis=1, dtype=np.float64), 1),
+        'Expected Margin': np.round(margin.mean(axis=1, dtype=np.float64), 1),
+    })
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+RATING_COLUMNS = ['OPR', 'DPR', 'CCWM']
+
+
+# Build the team-by-alliance incidence matrix: one row per alliance appearance,
+# one column per team, 1 where the team played on that alliance
+def alliance_matrix(alliances):
+    team_lists = alliances['Teams'].tolist()
+    sizes = np.fromiter((len(teams) for teams in team_lists), dtype=int, count=len(team_lists))
+    flat = np.fromiter((team for teams in team_lists for team in teams), dtype=int, count=int(sizes.sum()))
+
+    teams = np.unique(flat)
+    rows = np.repeat(np.arange(len(team_lists)), sizes)
+    cols = np.searchsorted(teams, flat)
+
+    matrix = np.zeros((len(team_lists), len(teams)))
+    matrix[rows, cols] = 1.0
+    return matrix, teams
+
+
+# Solve OPR and DPR together from the normal equations (AᵀA)x = Aᵀb, with the
+# alliance's own score and its opponent's score as two right-hand sides.
+# CCWM is the same least-squares fit on the winning margin, which by linearity
+# is OPR - DPR. lstsq keeps the solve stable early in an event when AᵀA is singular.
+def compute_ratings(alliances):
+    if alliances.empty:
+        return pd.DataFrame(columns=['Team Number'] + RATING_COLUMNS)
+
+    matrix, teams = alliance_matrix(alliances)
+    targets = alliances[['Score', 'Opponent Score']].to_numpy(dtype=float)
+
+    normal = matrix.T @ matrix
+    rhs = matrix.T @ targets
+    solution = np.linalg.lstsq(normal, rhs, rcond=None)[0]
+
+    return pd.DataFrame({
+        'Team Number': teams,
+        'OPR': solution[:, 0],
+        'DPR': solution[:, 1],
+        'CCWM': solution[:, 0] - solution[:, 1],
+    })
+
+
+# Attribute each alliance's scouting error (scouted total - TBA score) to the
+# scouters who recorded its rows. rows has one entry per scouted row with its
+# 'Alliance' index into errors, its 'Scouter' and a 'Weight' (1, or a share when
+# a robot was scouted more than once). Solves the ridge-regularised normal
+# equations (AᵀA + λI)b = Aᵀe for each scouter's bias per robot scouted, then
+# spreads what the biases leave unexplained over the alliance's rows by weight to
+# get every row's error, whose spread per scouter is its variance.
+def scouter_bias(rows, errors, ridge):
+    columns = ['Scouter', 'Rows', 'Alliances', 'Bias', 'Error Variance', 'Alliance Abs Error']
+    if rows.empty:
+        return pd.DataFrame(columns=columns)
+
+    alliance = rows['Alliance'].to_numpy()
+    scouters, scouter = np.unique(rows['Scouter'].to_numpy(), return_inverse=True)
+    weight = rows['Weight'].to_numpy(dtype=float)
+
+    matrix = np.zeros((len(errors), len(scouters)))
+    np.add.at(matrix, (alliance, scouter), weight)
+    bias = np.linalg.solve(matrix.T @ matrix + ridge * np.eye(len(scouters)), matrix.T @ errors)
+
+    unexplained = errors - matrix @ bias
+    share = weight / matrix.sum(axis=1)[alliance]
+    row_error = bias[scouter] + unexplained[alliance] * share
+
+    per_row = pd.DataFrame({
+        'Scouter': scouters[scouter],
+        'Alliance': alliance,
+        'Row Error': row_error,
+        'Alliance Abs Error': np.abs(errors[alliance]),
+    })
+    result = per_row.groupby('Scouter').agg(**{
+        'Rows': ('Row Error', 'size'),
+        'Alliances': ('Alliance', 'nunique'),
+        'Error Variance': ('Row Error', 'var'),
+        'Alliance Abs Error': ('Alliance Abs Error', 'mean'),
+    }).reset_index()
+    result['Bias'] = bias[np.searchsorted(scouters, result['Scouter'].to_numpy())]
+    return result[columns]
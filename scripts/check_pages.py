@@ -0,0 +1,80 @@
+import os
+import re
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import competition_config as config
+from load_test import SyntheticDataSource, build_database
+
+# Runs dashboard pages through Streamlit's AppTest against a small synthetic
+# database with inputs that have broken them before, and checks that no
+# exception or unformatted value (such as "nan") reaches the page. Exits
+# non-zero on any failure.
+#
+#   python scripts/check_pages.py
+
+# Synthetic data with nobody on match 1's red alliance scouted
+class PartlyScoutedSource(SyntheticDataSource):
+    def __init__(self, event):
+        super().__init__(event)
+        red = {int(key[3:]) for key in self.tba[0]["alliances"]["red"]["team_keys"]}
+        self.rows = [row for row in self.rows if row["Match Number"] != 1 or row["Team Number"] not in red]
+
+
+# (name, page, widget values, words that must not appear on the page)
+CASES = [
+    ("radar with a repeated team", "06_radar_chart.py",
+     {"radar_team_1": "1", "radar_team_2": "1", "radar_team_3": "2"}, []),
+    ("compare with a repeated team", "02_compare.py",
+     {"compare_team_1": "1", "compare_team_2": "1"}, []),
+    ("match with an unscouted alliance", "04_match_reference.py",
+     {"match_reference_number": "1"}, ["nan"]),
+]
+
+
+def page_text(at):
+    elements = list(at.markdown) + list(at.caption) + list(at.metric)
+    return [str(getattr(element, "value", "")) for element in elements]
+
+
+def check(comp, page, values, forbidden):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(ROOT, "pages", page), default_timeout=60)
+    at.session_state["comp"] = comp
+    at.run()
+    for widget in list(at.text_input) + list(at.selectbox):
+        if widget.key in values:
+            widget.set_value(values.pop(widget.key))
+    at.run()
+
+    failures = [f"exception: {exception.message}" for exception in at.exception]
+    failures += [f"widget {key} not found" for key in values]
+    for text in page_text(at):
+        failures += [f"{word!r} shown in {text!r}" for word in forbidden if re.search(rf"\b{word}\b", text)]
+    return failures
+
+
+def main():
+    comp = next(iter(config.EVENTS.values()))["Name"]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "Scouting_Data.db")
+        build_database(path, teams=12, matches=4, source=PartlyScoutedSource)
+        config.DATABASE_PATH = path
+
+        failed = 0
+        for name, page, values, forbidden in CASES:
+            failures = check(comp, page, dict(values), forbidden)
+            for failure in failures:
+                print(f"FAIL  {name}: {failure}")
+            if not failures:
+                print(f"ok    {name}")
+            failed += bool(failures)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import argparse
+import itertools
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import competition_config as config
+import picklist
+
+# Checks picklist.recommend against a brute-force enumeration of every partner
+# pair on seeded synthetic Calcs: the same alliances and scores, each pair once.
+# Exits non-zero on any mismatch, so it can run in CI.
+#
+#   python scripts/check_picklist.py --seeds 20 --teams 60
+
+
+def synthetic_calcs(rng, teams):
+    metrics = list(config.PICKLIST_CONFIG['coverage']) + list(config.PICKLIST_CONFIG['average'])
+    calc_df = pd.DataFrame(rng.gamma(2.0, 10.0, size=(teams, len(metrics))), columns=metrics)
+    calc_df.insert(0, 'Team Number', 1000 + np.arange(teams))
+    return calc_df
+
+
+# Every (pair, score) of the alliance with our team, best first
+def brute_force(matrix, our_team, taken):
+    ours = matrix.index_of(our_team)
+    candidates = [i for i in range(len(matrix.teams)) if i != ours and matrix.teams[i] not in taken]
+    results = []
+    for a, b in itertools.combinations(candidates, 2):
+        missing = (1.0 - matrix.coverage[ours]) * (1.0 - matrix.coverage[a]) * (1.0 - matrix.coverage[b])
+        average = matrix.average[ours] + matrix.average[a] + matrix.average[b]
+        score = picklist._alliance_value(matrix, missing, average, 3)
+        results.append((frozenset((int(matrix.teams[a]), int(matrix.teams[b]))), score))
+    return sorted(results, key=lambda item: -item[1])
+
+
+def check(seed, teams, limit, block_size):
+    rng = np.random.default_rng(seed)
+    matrix = picklist.TeamMatrix(synthetic_calcs(rng, teams))
+    our_team = int(rng.choice(matrix.teams))
+    taken = {int(team) for team in rng.choice(matrix.teams, size=teams // 10, replace=False)} - {our_team}
+
+    result = picklist.recommend(matrix, our_team, taken, limit=limit, block_size=block_size)
+    everything = brute_force(matrix, our_team, taken)
+    expected = everything[:limit]
+    scores = dict(everything)
+
+    failures = []
+    pairs = [frozenset(map(int, pair)) for pair in zip(result['Second Pick'], result['Third Pick'])]
+    if len(set(pairs)) != len(pairs):
+        failures.append("an alliance is listed twice")
+    if len(pairs) != len(expected):
+        failures.append(f"{len(pairs)} alliances, expected {len(expected)}")
+    if not np.allclose(result['Alliance Score'], np.round([score for _, score in expected], 3)):
+        failures.append("scores differ from brute force")
+    for pair, score in zip(pairs, result['Alliance Score']):
+        if pair not in scores or round(scores[pair], 3) != score:
+            failures.append(f"{sorted(pair)} scored {score}, brute force {scores.get(pair)}")
+    # Alliances strictly better than the worst listed one must all be listed
+    for pair, score in expected:
+        if round(score, 3) > result['Alliance Score'].min() and pair not in pairs:
+            failures.append(f"missed {sorted(pair)} at {score:.3f}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check pick-list recommendations against brute force.")
+    parser.add_argument("--seeds", type=int, default=20, help="Synthetic events to check")
+    parser.add_argument("--teams", type=int, default=60, help="Teams per synthetic event")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for seed in range(args.seeds):
+        for limit, block_size in ((config.PICKLIST_CONFIG['recommendations'], config.PICKLIST_CONFIG['block_size']),
+                                  (1, 1), (40, 5)):
+            failures = check(seed, args.teams, limit, block_size)
+            for failure in failures:
+                print(f"FAIL seed {seed}, limit {limit}, block {block_size}: {failure}")
+            failed += bool(failures)
+    print(f"{args.seeds * 3 - failed} of {args.seeds * 3} checks match brute force")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
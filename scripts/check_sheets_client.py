@@ -0,0 +1,128 @@
+import json
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import gspread
+import requests
+
+from sheets_client import QUOTA_WINDOW_SECONDS, QuotaAwareSheetsClient
+
+# Checks QuotaAwareSheetsClient against a fake Sheets API that replays scripted
+# responses: throttled (429) and unavailable (503) requests are retried with
+# backoff sleeps inside the jitter cap or as long as Retry-After asks, a forbidden
+# (403) request is raised without a retry, retries stop at max_retries and the
+# per-minute budget makes a request wait for the window to roll over. The clock
+# is simulated, so it runs instantly. Exits non-zero on any failure.
+#
+#   python scripts/check_sheets_client.py
+
+BASE, CAP, RETRIES = 1.0, 8.0, 4
+
+
+def api_error(status, retry_after=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps({"error": {"code": status, "message": "fake", "status": "FAKE"}}).encode()
+    if retry_after is not None:
+        response.headers["Retry-After"] = str(retry_after)
+    return gspread.exceptions.APIError(response)
+
+
+# Fake API call that raises the scripted errors in order, then succeeds
+class FakeSheets:
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "values"
+
+
+# Client with a simulated clock that sleep() advances
+def client(requests_per_minute=100):
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    sheets = QuotaAwareSheetsClient(None, requests_per_minute=requests_per_minute, max_retries=RETRIES,
+                                    backoff_base=BASE, backoff_max=CAP, clock=lambda: now[0], sleep=sleep)
+    return sheets, sleeps
+
+
+def check_retries_throttling():
+    sheets, sleeps = client()
+    fake = FakeSheets(api_error(429), api_error(503), api_error(429, retry_after=7))
+    assert sheets.call(fake) == "values"
+    assert fake.calls == 4, fake.calls
+    assert len(sleeps) == 3, sleeps
+    for attempt, delay in enumerate(sleeps[:2]):
+        assert 0 <= delay <= min(CAP, BASE * 2 ** attempt), (attempt, delay)
+    assert sleeps[2] == 7, sleeps
+    usage = sheets.usage()
+    assert (usage["Requests"], usage["Retries"], usage["Throttled"]) == (4, 3, 2), usage
+
+
+def check_forbidden_not_retried():
+    sheets, sleeps = client()
+    fake = FakeSheets(api_error(403))
+    try:
+        sheets.call(fake)
+    except gspread.exceptions.APIError as e:
+        assert e.code == 403
+    else:
+        raise AssertionError("403 was not raised")
+    assert fake.calls == 1 and sleeps == [], (fake.calls, sleeps)
+    assert sheets.usage()["Retries"] == 0
+
+
+def check_retries_stop():
+    sheets, sleeps = client()
+    fake = FakeSheets(*[api_error(503) for _ in range(RETRIES + 1)])
+    try:
+        sheets.call(fake)
+    except gspread.exceptions.APIError as e:
+        assert e.code == 503
+    else:
+        raise AssertionError("503 was not raised after the last retry")
+    assert fake.calls == RETRIES + 1, fake.calls
+    assert len(sleeps) == RETRIES, sleeps
+    for attempt, delay in enumerate(sleeps):
+        assert 0 <= delay <= min(CAP, BASE * 2 ** attempt), (attempt, delay)
+
+
+def check_budget_waits():
+    sheets, sleeps = client(requests_per_minute=3)
+    for _ in range(4):
+        sheets.call(FakeSheets())
+    assert sleeps == [QUOTA_WINDOW_SECONDS], sleeps
+    assert sheets.usage()["Peak Per Minute"] == 3
+
+
+CHECKS = [check_retries_throttling, check_forbidden_not_retried, check_retries_stop, check_budget_waits]
+
+
+def main():
+    random.seed(0)
+    failed = 0
+    for check in CHECKS:
+        try:
+            check()
+            print(f"ok    {check.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL  {check.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
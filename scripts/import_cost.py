@@ -0,0 +1,117 @@
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import competition_config as config
+
+# Measures what importing the app costs before the first page can render: the
+# module-level imports of main.py and the home page are imported in a fresh
+# interpreter under `python -X importtime`, and the cumulative cost of each
+# module is reported. With --check it fails when the total goes over
+# config.STARTUP_IMPORT_BUDGET_SECONDS or one of config.STARTUP_FORBIDDEN_MODULES
+# is imported at startup, so it can run in CI.
+#
+#   python scripts/import_cost.py --top 25
+#   python scripts/import_cost.py --check
+
+STARTUP_SCRIPTS = ["main.py", os.path.join("pages", "00_home_page.py")]
+
+
+# Modules imported at the top level of a script, in order; imports inside
+# functions only run when that code path does, so they are left out
+def startup_imports(path):
+    with open(os.path.join(ROOT, path)) as f:
+        tree = ast.parse(f.read(), path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names = [node.module]
+        else:
+            continue
+        modules.extend(name for name in names if name not in modules)
+    return modules
+
+
+# One cold import in a new interpreter; returns {module: cumulative seconds} for
+# every module loaded and the order the top-level ones finished in
+def import_times(modules):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "; ".join(f"import {module}" for module in modules)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    cumulative, top_level = {}, []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cost, name = line.split("|")
+        module = name.strip()
+        cumulative[module] = int(cost) / 1e6
+        # Nesting is shown by indentation, two spaces per level
+        if len(name) - len(name.lstrip()) == 1:
+            top_level.append(module)
+    return cumulative, top_level
+
+
+def measure(modules, runs):
+    samples = [import_times(modules) for _ in range(runs)]
+    loaded = set().union(*(set(cumulative) for cumulative, _ in samples))
+    median = {
+        module: statistics.median(cumulative.get(module, 0.0) for cumulative, _ in samples)
+        for module in loaded
+    }
+    totals = [sum(cumulative[module] for module in top_level) for cumulative, top_level in samples]
+    return median, statistics.median(totals)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the import cost of starting the dashboard.")
+    parser.add_argument("--runs", type=int, default=5, help="Cold imports to take the median of")
+    parser.add_argument("--top", type=int, default=15, help="Most expensive modules to list")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero if the startup budget is exceeded")
+    args = parser.parse_args(argv)
+
+    modules = []
+    for script in STARTUP_SCRIPTS:
+        modules.extend(module for module in startup_imports(script) if module not in modules)
+
+    median, total = measure(modules, args.runs)
+
+    print(f"Startup imports: {', '.join(modules)}")
+    print(f"{'Module':<60}{'Cumulative ms':>15}")
+    for module in modules:
+        print(f"{module:<60}{median.get(module, 0.0) * 1000:>15.1f}")
+    print()
+    print(f"Most expensive of {len(median)} modules loaded:")
+    for module, seconds in sorted(median.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{module:<60}{seconds * 1000:>15.1f}")
+    print()
+    budget = config.STARTUP_IMPORT_BUDGET_SECONDS
+    print(f"Total cold import: {total * 1000:.0f} ms (budget {budget * 1000:.0f} ms, median of {args.runs} runs)")
+
+    if not args.check:
+        return 0
+
+    failures = []
+    if total > budget:
+        failures.append(f"cold import took {total * 1000:.0f} ms, over the {budget * 1000:.0f} ms budget")
+    for module in config.STARTUP_FORBIDDEN_MODULES:
+        if module in median:
+            failures.append(f"{module} is imported at startup")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
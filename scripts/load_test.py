@@ -0,0 +1,311 @@
+import argparse
+import asyncio
+import collections
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tornado.websocket import websocket_connect
+
+import competition_config as config
+from measure_reruns import Session
+
+# Load test for the dashboard: builds a synthetic scouting database of a chosen
+# size, serves the app in this process and drives N concurrent browser sessions
+# through every page with typical widget interactions over the websocket
+# protocol. Reports per page p50/p95/p99 rerun latency, database queries per
+# rerun and peak Python memory while the page is being served.
+#
+#   python scripts/load_test.py --teams 60 --matches 12 --sessions 20
+#
+# Live Competition is skipped since it calls the Nexus API.
+
+# Interactions per page: (widget key, value picker). Values are drawn per session.
+SCENARIOS = {
+    "home_page": [],
+    "single_team": [("single_team_number", "team")],
+    "compare": [(f"compare_team_{slot}", "team") for slot in range(1, 7)],
+    "averages": [],
+    "match_reference": [("match_reference_number", "match"), ("match_reference_number", "match")],
+    "bubble_chart": [("bubble_x_axis", "Total Score AVG"), ("bubble_y_axis", "Total RAW")],
+    "radar_chart": [(f"radar_team_{slot}", "team") for slot in range(1, 7)],
+    "pick_list": [("picklist_team_number", "team")],
+}
+
+# ============================================================================
+# SYNTHETIC DATABASE
+# ============================================================================
+
+# Data source producing random but internally consistent match, pit and TBA data
+# for one event: teams have a skill level, every qualification match has six
+# distinct teams, and TBA alliance scores are the scouted totals plus noise.
+class SyntheticDataSource:
+    def __init__(self, event):
+        import db_calc
+        settings = event["Data Source"]
+        rng = random.Random(settings["seed"])
+        teams = list(range(1, settings["teams"] + 1))
+        skill = {team: rng.uniform(5, 60) for team in teams}
+        match_count = max(1, settings["teams"] * settings["matches"] // 6)
+
+        self.rows, self.tba = [], []
+        for match in range(1, match_count + 1):
+            lineup = rng.sample(teams, 6)
+            totals = {}
+            for team in lineup:
+                row = {"Team Number": team, "Match Number": match}
+                for column in db_calc.required_match_columns():
+                    if column == config.AUTO_COLUMN:
+                        row[column] = rng.choice(list(config.AUTO_SCORES))
+                    elif column == config.ENDGAME_COLUMN:
+                        row[column] = rng.choice(list(config.ENDGAME_SCORES))
+                    elif column in config.TELEOP_SCORES:
+                        row[column] = max(0, int(rng.gauss(skill[team], 8)))
+                    elif column in config.EXTRA_MATCH_COLUMNS:
+                        row[column] = rng.choice(["AB", "CD", "EF", "GH", "JK", "LM"])
+                totals[team] = (
+                    config.AUTO_SCORES[row[config.AUTO_COLUMN]]
+                    + config.ENDGAME_SCORES[row[config.ENDGAME_COLUMN]]
+                    + sum(row[column] * points for column, points in config.TELEOP_SCORES.items())
+                )
+                self.rows.append(row)
+
+            red, blue = lineup[:3], lineup[3:]
+            self.tba.append({
+                "key": f"{event['Event Key']}_qm{match}", "comp_level": "qm", "match_number": match,
+                "set_number": 1,
+                "alliances": {
+                    color: {"team_keys": [f"frc{team}" for team in alliance],
+                            "score": sum(totals[team] for team in alliance) + rng.randint(0, 10)}
+                    for color, alliance in (("red", red), ("blue", blue))
+                },
+                "videos": [{"type": "youtube", "key": "dQw4w9WgXcQ"}],
+                "score_breakdown": {
+                    color: {f"field{index}": rng.randint(0, 20) for index in range(40)} for color in ("red", "blue")
+                },
+            })
+        self.pit = [{"Team #": team, "Name(s)": "Load Test", "Drivetrain": rng.choice(["Swerve", "Tank"])}
+                    for team in teams]
+
+    def read(self):
+        import pandas as pd
+        return pd.DataFrame(self.rows), pd.DataFrame(self.pit)
+
+    def tba_matches(self):
+        return self.tba
+
+
+# Build a database for the configured events with the given number of teams
+# per event and matches per team, through the regular refresh pipeline. `source`
+# is the synthetic data source class to read the events from.
+def build_database(path, teams, matches, seed=0, source=SyntheticDataSource):
+    import db_calc
+    import storage
+    original_events, original_path = config.EVENTS, config.DATABASE_PATH
+    config.DATABASE_PATH = path
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    directory = storage.event_database_dir()
+    scopes = set(original_events) | {storage.ALL_COMPETITIONS}
+    for file in os.listdir(directory) if os.path.isdir(directory) else []:
+        if file.endswith(".db") and storage.snapshot_scope(file) in scopes:
+            os.remove(os.path.join(directory, file))
+
+    config.EVENTS = {
+        key: dict(event, **{"Data Source": {"type": "synthetic", "teams": teams, "matches": matches,
+                                            "seed": seed + index}})
+        for index, (key, event) in enumerate(original_events.items())
+    }
+    db_calc.DATA_SOURCES["synthetic"] = source
+    try:
+        db_calc.refresh()
+    finally:
+        config.EVENTS = original_events
+        config.DATABASE_PATH = original_path
+
+# ============================================================================
+# INSTRUMENTATION
+# ============================================================================
+
+# Queries executed per Streamlit session, counted with a trace callback on every
+# sqlite3 connection opened in this process
+queries = collections.Counter()
+
+
+def count_queries():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    connect = sqlite3.connect
+
+    def trace(statement):
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return
+        ctx = get_script_run_ctx(suppress_warning=True)
+        if ctx is not None:
+            queries[ctx.session_id] += 1
+
+    def counting_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        conn.set_trace_callback(trace)
+        return conn
+
+    sqlite3.connect = counting_connect
+
+
+async def start_server(port):
+    from streamlit.web import bootstrap
+    from streamlit.web.server import Server
+    bootstrap.load_config_options({
+        "server.headless": True,
+        "server.port": port,
+        "server.fileWatcherType": "none",
+        "browser.gatherUsageStats": False,
+        "logger.level": "error",
+    })
+    server = Server(os.path.join(ROOT, "main.py"), False)
+    await server.start()
+    return server
+
+# ============================================================================
+# SESSIONS
+# ============================================================================
+
+class LoadSession(Session):
+    def __init__(self, connection, rng, teams, matches):
+        super().__init__(connection, "")
+        self.rng = rng
+        self.teams = teams
+        self.matches = matches
+        self.samples = []
+
+    def pick(self, picker):
+        if picker == "team":
+            return self.rng.choice(self.teams)
+        if picker == "match":
+            return self.rng.randint(1, self.matches)
+        return picker
+
+    async def timed(self, rerun):
+        before = queries[self.session_id]
+        elapsed, _ = await rerun
+        self.samples.append((elapsed * 1000, queries[self.session_id] - before))
+
+    # Open a page, then work through its interactions
+    async def visit(self, page, rounds):
+        self.page = page
+        for _ in range(rounds):
+            await self.timed(self.rerun())
+            for key, picker in SCENARIOS[page]:
+                await self.timed(self.set_value(key, self.pick(picker)))
+
+
+def percentile(values, q):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+async def run_load(args):
+    import storage
+    event = list(config.EVENTS.values())[0]["Name"] if args.competition is None else args.competition
+    conn = storage.connect(event)
+    teams = [row[0] for row in conn.execute('SELECT "Team Number" FROM "Calcs" WHERE "Event Name" = ?', (event,))]
+    match_count = conn.execute(
+        'SELECT MAX("Match Number") FROM "Scouting_Data" WHERE "Event Name" = ?', (event,)
+    ).fetchone()[0] or 1
+    conn.close()
+
+    server = await start_server(args.port)
+    sessions = []
+    for index in range(args.sessions):
+        connection = await websocket_connect(
+            f"ws://localhost:{args.port}/_stcore/stream", subprotocols=["streamlit"], max_message_size=1 << 28
+        )
+        session = LoadSession(connection, random.Random(index), teams, match_count)
+        # The first run reports the page list and session id
+        await session.rerun()
+        if args.competition is not None:
+            await session.set_value("competition_select", args.competition)
+        sessions.append(session)
+
+    results = {}
+    for page in args.pages:
+        for session in sessions:
+            session.samples = []
+            session.exceptions = []
+        await asyncio.gather(*(session.visit(page, args.rounds) for session in sessions))
+        samples = [sample for session in sessions for sample in session.samples]
+
+        # Separate pass for memory so tracing overhead stays out of the latencies
+        tracemalloc.start()
+        await asyncio.gather(*(session.visit(page, 1) for session in sessions))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        latencies = [latency for latency, _ in samples]
+        results[page] = {
+            "Reruns": len(samples),
+            "p50 ms": percentile(latencies, 50),
+            "p95 ms": percentile(latencies, 95),
+            "p99 ms": percentile(latencies, 99),
+            "Queries/Rerun": statistics.mean(count for _, count in samples),
+            "Peak MB": peak / 1e6,
+            "Errors": sum(len(session.exceptions) for session in sessions),
+        }
+        for message in sorted({message for session in sessions for message in session.exceptions}):
+            print(f"Error on {page}: {message}")
+
+    for session in sessions:
+        session.connection.close()
+    server.stop()
+    await server.stopped
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the dashboard with concurrent sessions.")
+    parser.add_argument("--teams", type=int, default=60, help="Teams per event in the synthetic database")
+    parser.add_argument("--matches", type=int, default=12, help="Matches per team in the synthetic database")
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent browser sessions")
+    parser.add_argument("--rounds", type=int, default=3, help="Times each session works through each page")
+    parser.add_argument("--pages", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--competition", help="Competition to select (default: the first configured event)")
+    parser.add_argument("--database", default=os.path.join(tempfile.gettempdir(), "scouting_load_test.db"),
+                        help="Where to build the synthetic database")
+    parser.add_argument("--reuse", action="store_true", help="Reuse an existing database instead of rebuilding")
+    parser.add_argument("--port", type=int, default=8598)
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    if not args.reuse:
+        started = time.perf_counter()
+        build_database(args.database, args.teams, args.matches)
+        print(f"Built {args.database} in {time.perf_counter() - started:.1f}s")
+
+    # The app reads the synthetic database and never refreshes it
+    config.DATABASE_PATH = os.path.abspath(args.database)
+    config.EXTERNAL_REFRESH_WORKER = True
+    count_queries()
+
+    results = asyncio.run(run_load(args))
+
+    print(f"{args.sessions} sessions x {args.rounds} rounds, {args.teams} teams x {args.matches} matches per event")
+    columns = ["Reruns", "p50 ms", "p95 ms", "p99 ms", "Queries/Rerun", "Peak MB", "Errors"]
+    print(f"{'Page':<18}" + "".join(f"{column:>15}" for column in columns))
+    for page, row in results.items():
+        print(f"{page:<18}" + "".join(
+            f"{row[column]:>15,}" if column in ("Reruns", "Errors") else f"{row[column]:>15.1f}" for column in columns
+        ))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
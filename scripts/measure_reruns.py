@@ -0,0 +1,176 @@
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from tornado.websocket import websocket_connect
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+# Measures what editing one team number costs on the Compare Teams or Radar
+# Chart page: server-side rerun latency and bytes sent to the browser. It starts
+# the dashboard against an existing database and talks to it over the same
+# websocket protocol the browser uses, so fragment-scoped reruns are measured
+# exactly as a user would trigger them.
+#
+#   python scripts/measure_reruns.py --database Scouting_Data.db --page compare
+#
+# Run it before and after a change to compare the two.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = {
+    "compare": ("compare", "compare_team_"),
+    "radar": ("radar_chart", "radar_team_"),
+}
+
+
+def start_server(database, port):
+    env = dict(os.environ, SCOUTING_DATABASE_PATH=os.path.abspath(database), EXTERNAL_REFRESH_WORKER="1")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "main.py", "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Streamlit server did not start")
+
+
+def _widget(element):
+    kind = element.WhichOneof("type")
+    proto = getattr(element, kind, None) if kind else None
+    if proto is not None and hasattr(proto, "id") and hasattr(proto, "label"):
+        return proto
+    return None
+
+
+# One browser session: keeps widget values and cached message hashes between reruns
+class Session:
+    def __init__(self, connection, page):
+        self.connection = connection
+        self.page = page
+        self.page_hashes = {}
+        self.session_id = None
+        self.exceptions = []
+        self.states = {}
+        self.widgets = {}
+        self.cached = set()
+
+    async def rerun(self, fragment_id=""):
+        message = BackMsg()
+        message.rerun_script.page_script_hash = self.page_hashes.get(self.page, "")
+        message.rerun_script.fragment_id = fragment_id
+        message.rerun_script.widget_states.widgets.extend(self.states.values())
+        message.rerun_script.cached_message_hashes.extend(self.cached)
+
+        start = time.perf_counter()
+        await self.connection.write_message(message.SerializeToString(), binary=True)
+        received = 0
+        while True:
+            raw = await self.connection.read_message()
+            if raw is None:
+                raise RuntimeError("Connection closed by server")
+            received += len(raw)
+            msg = ForwardMsg()
+            msg.ParseFromString(raw)
+            if msg.hash:
+                self.cached.add(msg.hash)
+            kind = msg.WhichOneof("type")
+            if kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                if msg.delta.new_element.WhichOneof("type") == "exception":
+                    self.exceptions.append(msg.delta.new_element.exception.message)
+                widget = _widget(msg.delta.new_element)
+                if widget is not None and getattr(widget, "id", ""):
+                    self.widgets[widget.id] = msg.delta.fragment_id
+            elif kind == "new_session":
+                self.session_id = msg.new_session.initialize.session_id
+            elif kind == "navigation":
+                for app_page in msg.navigation.app_pages:
+                    self.page_hashes[app_page.url_pathname] = app_page.page_script_hash
+            elif kind == "script_finished":
+                return time.perf_counter() - start, received
+
+    def widget_id(self, key):
+        return next(widget for widget in self.widgets if widget.endswith(f"-{key}"))
+
+    # Change a text input or selectbox by its key, rerunning its fragment if it has one
+    async def set_value(self, key, value):
+        widget_id = self.widget_id(key)
+        self.states[widget_id] = WidgetState(id=widget_id, string_value=str(value))
+        return await self.rerun(self.widgets[widget_id])
+
+
+async def measure(port, page, teams, runs):
+    url_path, prefix = PAGES[page]
+    connection = await websocket_connect(
+        f"ws://localhost:{port}/_stcore/stream", subprotocols=["streamlit"], max_message_size=1 << 28
+    )
+    session = Session(connection, url_path)
+    # The first run lands on the home page and reports the page list, then open the page
+    await session.rerun()
+    await session.rerun()
+
+    # Fill every slot, then time repeated edits of the first one
+    for slot, team in enumerate(teams, start=1):
+        await session.set_value(f"{prefix}{slot}", team)
+
+    latencies, sizes = [], []
+    for run in range(runs):
+        team = teams[-1] if run % 2 == 0 else teams[0]
+        elapsed, received = await session.set_value(f"{prefix}1", team)
+        latencies.append(elapsed * 1000)
+        sizes.append(received)
+    connection.close()
+    return latencies, sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure rerun latency and bytes sent when editing one team slot.")
+    parser.add_argument("--database", required=True, help="Scouting database to serve")
+    parser.add_argument("--page", choices=sorted(PAGES), default="compare")
+    parser.add_argument("--teams", help="Comma separated team numbers (default: first six in Calcs)")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8599)
+    args = parser.parse_args(argv)
+
+    if args.teams:
+        teams = [int(team) for team in args.teams.split(",")]
+    else:
+        # The dashboard opens on the first configured event
+        sys.path.insert(0, ROOT)
+        import competition_config as config
+        import storage
+        config.DATABASE_PATH = os.path.abspath(args.database)
+        event = list(config.EVENTS.values())[0]["Name"]
+        conn = storage.connect(event)
+        teams = [row[0] for row in conn.execute(
+            'SELECT "Team Number" FROM "Calcs" WHERE "Event Name" = ? ORDER BY "Team Number" LIMIT 6', (event,)
+        )]
+        conn.close()
+
+    server = start_server(args.database, args.port)
+    try:
+        latencies, sizes = asyncio.run(measure(args.port, args.page, teams, args.runs))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{args.page}: {len(teams)} teams, {args.runs} edits of one team slot")
+    print(f"  rerun latency  median {statistics.median(latencies):.1f} ms, max {max(latencies):.1f} ms")
+    print(f"  bytes sent     median {statistics.median(sizes):,.0f}, total {sum(sizes):,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import random
+import threading
+import time
+from collections import deque
+
+import gspread
+import requests
+
+import competition_config as config
+
+# HTTP statuses worth retrying: quota exhaustion and transient server errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Length of the quota window Google uses for per-minute read limits
+QUOTA_WINDOW_SECONDS = 60.0
+
+
+def _status_code(error):
+    code = getattr(error, "code", None)
+    if code is None and getattr(error, "response", None) is not None:
+        code = error.response.status_code
+    return code
+
+
+# Wraps a gspread client so every Sheets API request is counted against a
+# requests-per-minute budget. Requests that would exceed the budget wait for the
+# window to roll over, and 429/5xx responses are retried with jittered
+# exponential backoff. One instance is shared by every refresh in the process so
+# back-to-back refreshes see the same budget.
+class QuotaAwareSheetsClient:
+    def __init__(self, gc, requests_per_minute=None, max_retries=None,
+                 backoff_base=None, backoff_max=None, clock=time.monotonic, sleep=time.sleep):
+        self.gc = gc
+        self.requests_per_minute = requests_per_minute or config.SHEETS_REQUESTS_PER_MINUTE
+        self.max_retries = config.SHEETS_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = backoff_base or config.SHEETS_BACKOFF_BASE_SECONDS
+        self.backoff_max = backoff_max or config.SHEETS_BACKOFF_MAX_SECONDS
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._sent = deque()
+        self._stats = {"Requests": 0, "Retries": 0, "Throttled": 0, "Waited": 0.0, "Peak Per Minute": 0}
+
+    # Block until another request fits in the current window, then claim a slot
+    def _acquire(self):
+        while True:
+            with self._lock:
+                now = self.clock()
+                while self._sent and now - self._sent[0] >= QUOTA_WINDOW_SECONDS:
+                    self._sent.popleft()
+                if len(self._sent) < self.requests_per_minute:
+                    self._sent.append(now)
+                    self._stats["Requests"] += 1
+                    self._stats["Peak Per Minute"] = max(self._stats["Peak Per Minute"], len(self._sent))
+                    return
+                wait = QUOTA_WINDOW_SECONDS - (now - self._sent[0])
+                self._stats["Waited"] += wait
+            self.sleep(wait)
+
+    def _backoff(self, attempt, error):
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        # Full jitter: anywhere between zero and the exponential cap
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    # Run one Sheets API call under the quota budget, retrying throttled and failed requests
+    def call(self, func, *args, **kwargs):
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                return func(*args, **kwargs)
+            except (gspread.exceptions.APIError, requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout) as e:
+                status = _status_code(e) if isinstance(e, gspread.exceptions.APIError) else None
+                if isinstance(e, gspread.exceptions.APIError) and status not in RETRYABLE_STATUSES:
+                    raise
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                with self._lock:
+                    self._stats["Retries"] += 1
+                    self._stats["Waited"] += delay
+                    if status == 429:
+                        self._stats["Throttled"] += 1
+                print(f"Warning: Sheets request failed ({status or type(e).__name__}), retrying in {delay:.1f}s")
+                self.sleep(delay)
+                attempt += 1
+
+    def open(self, title):
+        return QuotaAwareSpreadsheet(self, self.call(self.gc.open, title))
+
+    # Snapshot of the counters, used to report per-refresh usage
+    def usage(self):
+        with self._lock:
+            stats = dict(self._stats)
+            now = self.clock()
+            stats["Last Minute"] = sum(1 for sent in self._sent if now - sent < QUOTA_WINDOW_SECONDS)
+        stats["Budget Per Minute"] = self.requests_per_minute
+        stats["Waited"] = round(stats["Waited"], 2)
+        return stats
+
+
+# Spreadsheet proxy whose API calls go through the quota-aware client
+class QuotaAwareSpreadsheet:
+    def __init__(self, client, spreadsheet):
+        self.client = client
+        self.spreadsheet = spreadsheet
+
+    def values_batch_get(self, ranges, params=None):
+        return self.client.call(self.spreadsheet.values_batch_get, ranges, params=params)
+
+
+# Difference between two usage() snapshots, i.e. what one refresh consumed.
+# before is None when the client was created during the refresh.
+def usage_delta(before, after):
+    before = before or {"Requests": 0, "Retries": 0, "Throttled": 0, "Waited": 0.0}
+    delta = dict(after)
+    for key in ("Requests", "Retries", "Throttled"):
+        delta[key] = after[key] - before[key]
+    delta["Waited"] = round(after["Waited"] - before["Waited"], 2)
+    return delta
@@ -0,0 +1,381 @@
+import json
+import os
+import sqlite3
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import competition_config as config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Database layout: the data lives in snapshot files in config.EVENT_DATABASE_DIR.
+# A refresh writes every event into a new file and the "All Competitions" rows
+# into another, and never changes a file once it is published. config.DATABASE_PATH
+# is the aggregate file with the refresh logs, the Calcs history and the
+# "Snapshots" table naming the current files of each scope:
+#
+#   scope <event key>         -> that event's file
+#   scope "All Competitions"  -> the all-competitions file and the event files
+#                                its rows were computed from
+#
+# Publishing a file is one transaction on the aggregate file together with its
+# "Commit Log" row, so readers see either the old snapshot or the new one, never a
+# half-written event. Replaced files stay on disk for config.SNAPSHOT_RETENTION_SECONDS
+# so readers that pinned them can finish. Events refresh in parallel since each
+# writes its own file, and an event removed from config.EVENTS is simply no
+# longer attached; its files can be archived or deleted.
+#
+# connect(comp) opens the aggregate file, attaches the files the competition
+# needs and creates TEMP views under the table names readers have always used
+# ("Calcs", "Scouting_Data", ...), so queries work unchanged.
+
+ALL_COMPETITIONS = "All Competitions"
+ALL_COMPETITIONS_FILE = "all-competitions"
+SNAPSHOTS_TABLE = "Snapshots"
+
+# Per-event match and pit rows. "Scouting_Data" and "Pit Scouting" are views over
+# them that add the "All Competitions" rows when every event is attached.
+MATCH_TABLE = "Event Scouting_Data"
+PIT_TABLE = "Event Pit Scouting"
+
+# Tables stored in each event's file
+EVENT_TABLES = ["Calcs", "Normalized Data", MATCH_TABLE, PIT_TABLE, "TBA Data", "Match Accuracy",
+                "Scouter Reliability"]
+
+# Tables of the all-competitions file that hold the "All Competitions" rows of a view
+AGGREGATE_TABLES = ["Calcs", "Normalized Data"]
+
+# Side table in the all-competitions file with the columns that differ for an
+# event row seen across all competitions, keyed by the event and the rowid of
+# that row in the event's MATCH_TABLE
+ALL_COMPETITIONS_TABLE = "All Competitions Matches"
+ALL_COMPETITIONS_COLUMNS = ['Team Match Number', 'Auto RAW', 'Teleop RAW', 'Endgame RAW', 'Total RAW']
+
+ALL_COMPETITIONS_LABELS = {
+    'Event Key': "'All Competitions'",
+    'Event Name': "'All Competitions'",
+    'Competition Week': "'All Weeks'",
+}
+
+# TBA match list of an event: the fields the dashboard reads as typed columns,
+# named as pd.json_normalize names them, and the whole match record as
+# zlib-compressed JSON in "Raw" for the rare lookup of anything else (the score
+# breakdown has hundreds of fields that would otherwise each be a column)
+TBA_TABLE = "TBA Data"
+TBA_COLUMNS = {
+    'key': "TEXT",
+    'comp_level': "TEXT",
+    'set_number': "INTEGER",
+    'match_number': "INTEGER",
+    'alliances.red.team_keys': "TEXT",
+    'alliances.blue.team_keys': "TEXT",
+    'alliances.red.score': "INTEGER",
+    'alliances.blue.score': "INTEGER",
+    'videos': "TEXT",
+    'Raw': "BLOB",
+    'Event Key': "TEXT",
+    'Event Name': "TEXT",
+}
+# Columns holding lists, stored as JSON
+TBA_JSON_COLUMNS = ['alliances.red.team_keys', 'alliances.blue.team_keys', 'videos']
+
+# The blobs of an event are compressed against a preset dictionary, the JSON of
+# one of its matches, kept once per file. Field names and common values then
+# cost a few bytes in each match instead of being compressed again every time.
+TBA_DICTIONARY_TABLE = "TBA Dictionary"
+TBA_DICTIONARY_COLUMNS = {
+    'Event Key': "TEXT",
+    'Dictionary': "BLOB",
+}
+
+# zlib only looks back this far, so a longer dictionary is cut to its end
+_TBA_WINDOW = 32768
+
+
+def _tba_json(match):
+    return json.dumps(match, separators=(",", ":")).encode("utf-8")
+
+
+def tba_dictionary(match):
+    return _tba_json(match)[-_TBA_WINDOW:]
+
+
+def encode_tba(match, dictionary):
+    compressor = zlib.compressobj(9, zdict=dictionary)
+    return compressor.compress(_tba_json(match)) + compressor.flush()
+
+
+def decode_tba(raw, dictionary):
+    decompressor = zlib.decompressobj(zdict=dictionary)
+    return json.loads(decompressor.decompress(raw) + decompressor.flush())
+
+
+def _create_table(conn, schema, table, columns):
+    columns = ", ".join(f"{quote(col)} {kind}" for col, kind in columns.items())
+    conn.execute(f"CREATE TABLE {schema}.{quote(table)} ({columns})")
+
+
+def create_tba_tables(conn, schema="main"):
+    _create_table(conn, schema, TBA_TABLE, TBA_COLUMNS)
+    _create_table(conn, schema, TBA_DICTIONARY_TABLE, TBA_DICTIONARY_COLUMNS)
+
+
+# View name -> table in the event files it reads
+VIEWS = {
+    "Calcs": "Calcs",
+    "Normalized Data": "Normalized Data",
+    "Scouting_Data": MATCH_TABLE,
+    "Pit Scouting": PIT_TABLE,
+    TBA_TABLE: TBA_TABLE,
+    TBA_DICTIONARY_TABLE: TBA_DICTIONARY_TABLE,
+    "Match Accuracy": "Match Accuracy",
+    "Scouter Reliability": "Scouter Reliability",
+}
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _literal(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+def event_database_dir():
+    return config.EVENT_DATABASE_DIR or os.path.join(os.path.dirname(config.DATABASE_PATH), "events")
+
+
+# Single file an event was kept in before snapshots, read by the migration
+def event_database_path(event_key):
+    return os.path.join(event_database_dir(), f"{event_key}.db")
+
+
+def snapshot_path(file):
+    return os.path.join(event_database_dir(), file)
+
+
+# Path for a new snapshot file of a scope, named after the scope and the time
+def new_snapshot_path(scope):
+    prefix = ALL_COMPETITIONS_FILE if scope == ALL_COMPETITIONS else scope
+    return snapshot_path(f"{prefix}-{datetime.now():%Y%m%d%H%M%S%f}.db")
+
+
+# Scope a snapshot file belongs to, from its name
+def snapshot_scope(file):
+    prefix = file[:-len(".db")].rsplit("-", 1)[0] if "-" in file else file[:-len(".db")]
+    return ALL_COMPETITIONS if prefix == ALL_COMPETITIONS_FILE else prefix
+
+
+def create_snapshots_table(conn):
+    conn.execute(
+        f'CREATE TABLE IF NOT EXISTS {quote(SNAPSHOTS_TABLE)} '
+        '("Scope" TEXT, "Event Key" TEXT, "File" TEXT, PRIMARY KEY ("Scope", "Event Key"))'
+    )
+
+
+# Make `files` ({event key: path}) the current files of a scope. Runs in the
+# caller's transaction, so it is committed together with the commit log.
+def publish(conn, scope, files):
+    create_snapshots_table(conn)
+    conn.execute(f'DELETE FROM {quote(SNAPSHOTS_TABLE)} WHERE "Scope" = ?', (scope,))
+    conn.executemany(
+        f'INSERT INTO {quote(SNAPSHOTS_TABLE)} ("Scope", "Event Key", "File") VALUES (?, ?, ?)',
+        [(scope, key, os.path.basename(path)) for key, path in files.items()]
+    )
+
+
+# The data readers should see: the latest commit and the current files of every
+# scope ({"Generation": int, "Files": {scope: {event key: file}}}), read in one
+# transaction so the two always match
+def current_snapshot():
+    snapshot = {"Generation": 0, "Files": {}}
+    if not os.path.exists(config.DATABASE_PATH):
+        return snapshot
+    conn = sqlite3.connect(config.DATABASE_PATH, timeout=30)
+    try:
+        conn.execute("BEGIN")
+        try:
+            snapshot["Generation"] = conn.execute('SELECT MAX("Commit ID") FROM "Commit Log"').fetchone()[0] or 0
+        except sqlite3.OperationalError:
+            pass
+        try:
+            rows = conn.execute(f'SELECT "Scope", "Event Key", "File" FROM {quote(SNAPSHOTS_TABLE)}').fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        conn.rollback()
+    finally:
+        conn.close()
+    for scope, key, file in rows:
+        snapshot["Files"].setdefault(scope, {})[key] = file
+    return snapshot
+
+
+# Every refresh holds a shared lock on this sidecar file from the moment it is
+# logged as running until its outcome is recorded. The OS releases the lock when
+# a process dies, so a "running" log row while nobody holds it is a refresh that
+# was cut off (say the app exited mid-refresh). Windows has no shared file locks;
+# there a running row is taken at its word.
+def _running_lock_path():
+    return config.DATABASE_PATH + ".running"
+
+
+@contextmanager
+def refresh_running():
+    if fcntl is None:
+        yield
+        return
+    with open(_running_lock_path(), "a+") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+# Whether a refresh is running in any process
+def refresh_in_progress():
+    if fcntl is None:
+        return True
+    with open(_running_lock_path(), "a+") as lock_file:
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        return False
+
+
+def _uri(path, read_only):
+    return Path(path).resolve().as_uri() + ("?mode=ro" if read_only else "")
+
+
+# Event keys a competition reads: one event, every configured event for
+# All Competitions, or none (aggregate tables only)
+def event_keys_for(comp):
+    if comp == ALL_COMPETITIONS:
+        return list(config.EVENTS)
+    return [key for key, event in config.EVENTS.items() if event["Name"] == comp]
+
+
+# Files a competition reads in a snapshot: [(event key, file)] in configured
+# order, and the all-competitions file for All Competitions
+def _files_for(comp, snapshot):
+    if comp == ALL_COMPETITIONS:
+        files = dict(snapshot["Files"].get(ALL_COMPETITIONS, {}))
+        all_file = files.pop(ALL_COMPETITIONS, None)
+        # Events since removed from config.EVENTS are archived and not attached
+        order = list(config.EVENTS)
+        events = sorted((item for item in files.items() if item[0] in order), key=lambda item: order.index(item[0]))
+        return events, all_file
+    events = [(key, snapshot["Files"][key][key]) for key in event_keys_for(comp)
+              if key in snapshot["Files"].get(key, {})]
+    return events, None
+
+
+def table_columns(conn, schema, table):
+    return [row[1] for row in conn.execute(f'PRAGMA {schema}.table_info({quote(table)})')]
+
+
+# SELECT of a source table padded to the view's columns; `overrides` replaces
+# the expression for some columns
+def _select(columns, available, source, overrides=None, prefix=""):
+    overrides = overrides or {}
+    parts = []
+    for col in columns:
+        if col in overrides:
+            expression = overrides[col]
+        elif col in available:
+            expression = prefix + quote(col)
+        else:
+            expression = "NULL"
+        parts.append(f"{expression} AS {quote(col)}")
+    return f"SELECT {', '.join(parts)} FROM {source}"
+
+
+def _create_views(conn, schemas, all_schema):
+    for view, table in VIEWS.items():
+        sources = [(schema, key, table_columns(conn, schema, table)) for schema, key in schemas]
+        sources = [(schema, key, columns) for schema, key, columns in sources if columns]
+        if not sources:
+            continue
+
+        aggregate = []
+        if all_schema and view in AGGREGATE_TABLES:
+            aggregate = table_columns(conn, all_schema, table)
+
+        columns = []
+        for available in [available for _, _, available in sources] + [aggregate]:
+            columns.extend(col for col in available if col not in columns)
+
+        selects = [_select(columns, available, f"{schema}.{quote(table)}") for schema, _, available in sources]
+        if aggregate:
+            selects.append(_select(columns, aggregate, f"{all_schema}.{quote(table)}"))
+
+        if all_schema and view == "Scouting_Data":
+            # Every event row again as an "All Competitions" row, with the
+            # cross-event columns from the side table
+            side = table_columns(conn, all_schema, ALL_COMPETITIONS_TABLE)
+            overrides = {col: f'a.{quote(col)}' for col in ALL_COMPETITIONS_COLUMNS if col in side}
+            overrides.update(ALL_COMPETITIONS_LABELS)
+            for schema, key, available in sources if side else []:
+                selects.append(
+                    _select(columns, available,
+                            f'{all_schema}.{quote(ALL_COMPETITIONS_TABLE)} a JOIN {schema}.{quote(table)} e '
+                            f'ON e.rowid = a."Source Row" AND a."Event Key" = {_literal(key)}',
+                            overrides, prefix="e.")
+                )
+        elif all_schema and view == "Pit Scouting":
+            # All-competitions pit data comes from the last configured event
+            schema, key, available = sources[-1]
+            selects.append(_select(columns, available, f"{schema}.{quote(table)}", ALL_COMPETITIONS_LABELS))
+
+        conn.execute(f"CREATE TEMP VIEW {quote(view)} AS {' UNION ALL '.join(selects)}")
+
+
+# Connection to the aggregate file with the files of `comp` attached and the
+# reader views created. `snapshot` (from current_snapshot) pins the files read;
+# the current ones are used when it is not given or its files are gone. Without
+# a competition only the aggregate tables are visible. `factory` is the
+# sqlite3.Connection class to open it with.
+def connect(comp=None, read_only=False, snapshot=None, factory=sqlite3.Connection):
+    conn = sqlite3.connect(_uri(config.DATABASE_PATH, read_only), uri=True, timeout=30, factory=factory)
+    if not comp:
+        return conn
+
+    events, all_file = _files_for(comp, snapshot or current_snapshot())
+    files = [file for _, file in events] + ([all_file] if all_file else [])
+    if snapshot is not None and not all(os.path.exists(snapshot_path(file)) for file in files):
+        events, all_file = _files_for(comp, current_snapshot())
+
+    # SQLite attaches at most SQLITE_LIMIT_ATTACHED files to a connection (10 in
+    # most builds, fixed when SQLite is compiled), and All Competitions needs one
+    # per event plus the all-competitions file
+    needed = len(events) + (1 if all_file else 0)
+    limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    if needed > limit:
+        conn.close()
+        raise sqlite3.OperationalError(
+            f"{comp} needs {needed} attached database files but this SQLite build allows {limit}. "
+            f"Remove finished events from config.EVENTS (their files stay on disk) "
+            f"to keep at most {limit - 1} events."
+        )
+
+    # Published files never change, so they are always attached read-only
+    schemas = []
+    for index, (key, file) in enumerate(events):
+        path = snapshot_path(file)
+        if os.path.exists(path):
+            conn.execute("ATTACH DATABASE ? AS ?", (_uri(path, True), f"e{index}"))
+            schemas.append((f"e{index}", key))
+    all_schema = None
+    if all_file and os.path.exists(snapshot_path(all_file)):
+        conn.execute("ATTACH DATABASE ? AS ?", (_uri(snapshot_path(all_file), True), "a0"))
+        all_schema = "a0"
+    if schemas:
+        _create_views(conn, schemas, all_schema)
+    return conn
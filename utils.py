@@ -1,12 +1,203 @@
+import collections
+import functools
+import json
 import sqlite3
+import threading
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import plotly.graph_objects as go
 import competition_config as config
+import diagnostics
+import storage
 
 
-# Initialize database connection
-def get_connection():
-    return sqlite3.connect("Scouting_Data.db")
+# Snapshots pinned by recent reruns, by generation. They are shared by every
+# session, so a cached read keyed on a generation always reads that generation's files.
+_snapshots = collections.OrderedDict()
+_snapshots_lock = threading.Lock()
+PINNED_SNAPSHOTS = 16
+
+# Pin the current snapshot for this session and return its generation. main.py
+# pins at the start of every rerun, so all reads of the rerun see the same data
+# even when a refresh publishes new files halfway through it.
+def pin_snapshot():
+    snapshot = storage.current_snapshot()
+    generation = snapshot["Generation"]
+    with _snapshots_lock:
+        _snapshots[generation] = snapshot
+        _snapshots.move_to_end(generation)
+        while len(_snapshots) > PINNED_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    st.session_state.snapshot_generation = generation
+    return generation
+
+# Id of the latest commit in the pinned snapshot, used as a cache key so cached
+# reads expire as soon as a refresh has written an event
+def data_generation():
+    generation = st.session_state.get("snapshot_generation")
+    if generation is None or generation not in _snapshots:
+        generation = pin_snapshot()
+    return generation
+
+# Initialize database connection with the files of a competition (the selected
+# one by default) attached, so its tables can be queried by their usual names.
+# Reads the snapshot of `generation`, the pinned one by default. Its queries are
+# timed for the Diagnostics page.
+def get_connection(comp=None, generation=None):
+    generation = data_generation() if generation is None else generation
+    comp = comp or st.session_state.get("comp")
+    return diagnostics.timed_connect(
+        functools.partial(storage.connect, comp, snapshot=_snapshots.get(generation)), f"(connect {comp})"
+    )
+
+# Most recent entry in the refresh log, or None if nothing has been logged yet.
+# A refresh logged as running that no process is running any more is reported
+# as "interrupted".
+def last_refresh():
+    conn = storage.connect()
+    try:
+        row = conn.execute(
+            'SELECT "Started At", "Duration", "Status", "Error" FROM "Refresh Log" ORDER BY "Refresh ID" DESC LIMIT 1'
+        ).fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    conn.close()
+    if row is None:
+        return None
+    last = dict(zip(["Started At", "Duration", "Status", "Error"], row))
+    if last["Status"] == "running" and not storage.refresh_in_progress():
+        last["Status"] = "interrupted"
+    return last
+
+# ============================================================================
+# SHARED EVENT DATA CACHE
+# ============================================================================
+
+# Whole-event reads shared by every session. The refresh generation is part of
+# the key, so a refresh makes them miss and the next read goes back to the DB.
+@st.cache_data(show_spinner=False)
+def event_calcs(comp, generation):
+    conn = get_connection(comp, generation)
+    df = sql_to_df('SELECT * FROM "Calcs" WHERE "Event Name" = ?', conn, params=(comp,))
+    conn.close()
+    return df
+
+@st.cache_data(show_spinner=False)
+def event_normalized(comp, generation):
+    conn = get_connection(comp, generation)
+    df = sql_to_df('SELECT * FROM "Normalized Data" WHERE "Event Name" = ?', conn, params=(comp,))
+    conn.close()
+    return df
+
+@st.cache_data(show_spinner=False)
+def event_matches(comp, generation):
+    conn = get_connection(comp, generation)
+    df = sql_to_df(
+        'SELECT * FROM "Scouting_Data" WHERE "Event Name" = ? ORDER BY "Team Number", "Team Match Number"',
+        conn,
+        params=(comp,)
+    )
+    conn.close()
+    return df
+
+# Rows of a per-event analysis table, every event's for All Competitions, or None
+# if no refresh has written the table yet
+def _event_analysis(table, comp, generation, order_by):
+    import pandas as pd
+    conn = get_connection(comp, generation)
+    query = f'SELECT * FROM "{table}"'
+    params = ()
+    if comp != "All Competitions":
+        query += ' WHERE "Event Name" = ?'
+        params = (comp,)
+    try:
+        df = sql_to_df(f"{query} ORDER BY {order_by}", conn, params=params)
+    except pd.errors.DatabaseError:
+        df = None
+    conn.close()
+    return df
+
+# Scouted vs TBA alliance totals
+@st.cache_data(show_spinner=False)
+def event_accuracy(comp, generation):
+    return _event_analysis("Match Accuracy", comp, generation, '"Match Number", "Alliance"')
+
+# Per-scouter bias and error variance
+@st.cache_data(show_spinner=False)
+def event_scouters(comp, generation):
+    return _event_analysis("Scouter Reliability", comp, generation, '"Event Name", "Scouter"')
+
+def load_calcs(comp=None):
+    return event_calcs(comp or st.session_state.comp, data_generation())
+
+def load_normalized(comp=None):
+    return event_normalized(comp or st.session_state.comp, data_generation())
+
+def load_matches(comp=None):
+    return event_matches(comp or st.session_state.comp, data_generation())
+
+# Match accuracy rows, or None until a refresh has computed them
+def load_accuracy(comp=None):
+    return event_accuracy(comp or st.session_state.comp, data_generation())
+
+# Scouter reliability rows, or None until a refresh has computed them
+def load_scouters(comp=None):
+    return event_scouters(comp or st.session_state.comp, data_generation())
+
+# One team's match series, ordered chronologically
+def load_team_matches(team_number, comp=None):
+    df = load_matches(comp)
+    return df[df["Team Number"] == team_number].reset_index(drop=True)
+
+# Whole TBA record of a qualification match, score breakdown included, or None
+# if it is not stored. Decompressed on demand, since few pages ever need it.
+def load_tba_match(match_number, comp=None):
+    comp = comp or st.session_state.comp
+    conn = get_connection(comp)
+    try:
+        row = conn.execute(
+            'SELECT t."Raw", d."Dictionary" FROM "TBA Data" t JOIN "TBA Dictionary" d USING ("Event Key") '
+            'WHERE t."match_number" = ? AND t."comp_level" = \'qm\' AND t."Event Name" = ?',
+            (int(match_number), comp)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        # No refresh has written the TBA tables yet
+        row = None
+    finally:
+        conn.close()
+    return storage.decode_tba(*row) if row else None
+
+_warming = set()
+_warming_lock = threading.Lock()
+
+# Prefetch an event into the shared cache on a background thread, so the first
+# page view after switching competitions or refreshing is a cache hit. Pages that
+# ask for the same data while it loads wait on the same computation.
+def warm_cache(comp, generation=None):
+    generation = data_generation() if generation is None else generation
+    key = (comp, generation)
+    with _warming_lock:
+        if key in _warming:
+            return None
+        _warming.add(key)
+
+    def run():
+        try:
+            event_calcs(comp, generation)
+            event_normalized(comp, generation)
+            event_matches(comp, generation)
+            event_accuracy(comp, generation)
+            radar_reference(comp, generation, tuple(_radar_sources()))
+        except Exception as e:
+            print(f"Warning: Cache warm-up for {comp} failed: {e}")
+        finally:
+            with _warming_lock:
+                _warming.discard(key)
+
+    thread = threading.Thread(target=run, name=f"warm-cache-{comp}", daemon=True)
+    add_script_run_ctx(thread, get_script_run_ctx())
+    thread.start()
+    return thread
 
 # Apply row styling based on alliance color (red/blue)
 def color_alliance(row):
@@ -31,66 +222,42 @@ def retrieve_data(data_type, team_number, match_number=None):
     conn.close()
     return result
 
-# Generate score trend visualization and optional detailed tables for a team
-def plot_team_scores(team_number, show_table=False, dataType=""):
-    conn = get_connection()
-    # Fetch all matches for the team, ordered chronologically
-    team_data = sql_to_df(
-        f"SELECT * FROM Scouting_Data WHERE `Team Number` = {team_number} AND `Event Name` = '{st.session_state.comp}' ORDER BY `Team Match Number` ASC",
-        conn
-    )
+# Score columns drawn on the trend chart: (session toggle, column, line color)
+SCORE_TRACES = [
+    ("showTotal", "Total Score", "Line Color 1"),
+    ("showAuto", "Auto Score", "Line Color 2"),
+    ("showTeleop", "Teleop Score", "Line Color 3"),
+    ("showEndgame", "Endgame Score", "Line Color 4"),
+]
+
+# Serialized score trend figure for one team, or None if the team has no matches.
+# Specs are memoized per (team, event, phases, legend, generation) with LRU
+# eviction, so reruns and checkbox toggles reuse figures instead of rebuilding them.
+@functools.lru_cache(maxsize=config.FIGURE_CACHE_SIZE)
+def team_figure_spec(team_number, comp, phases, show_legend, generation):
+    team_data = event_matches(comp, generation)
+    team_data = team_data[team_data["Team Number"] == team_number]
     if team_data.empty:
-        st.error("Please enter a valid team number.")
-        return
+        return None
 
     # Initialize line plot figure
     fig = go.Figure()
 
-    # Add traces for selected score types based on session state
-    # Always show all scores in single team view
-    if st.session_state.get("showTotal") or dataType.lower() == "single team":
-        fig.add_trace(go.Scatter(
-            x=team_data['Team Match Number'],
-            y=team_data['Total Score'],
-            mode='lines+markers',
-            name='Total Score',
-            line=dict(shape='spline', color=config.GRAPH_LINE_COLORS_PASTEL['Line Color 1']),
-            marker=dict(color=config.GRAPH_LINE_COLORS_PASTEL['Line Color 1'])
-        ))
-
-    # Always show auto/teleop in single team view
-    if st.session_state.get("showAuto") or dataType.lower() == "single team":
+    # Add traces for the selected score types
+    for _, column, color in SCORE_TRACES:
+        if column not in phases:
+            continue
         fig.add_trace(go.Scatter(
             x=team_data['Team Match Number'],
-            y=team_data['Auto Score'],
+            y=team_data[column],
             mode='lines+markers',
-            name='Auto Score',
-            line=dict(shape='spline', color=config.GRAPH_LINE_COLORS_PASTEL['Line Color 2']),
-            marker=dict(color=config.GRAPH_LINE_COLORS_PASTEL['Line Color 2'])
-        ))
-
-    if st.session_state.get("showTeleop") or dataType.lower() == "single team":
-        fig.add_trace(go.Scatter(
-            x=team_data['Team Match Number'],
-            y=team_data['Teleop Score'],
-            mode='lines+markers',
-            name='Teleop Score',
-            line=dict(shape='spline', color=config.GRAPH_LINE_COLORS_PASTEL['Line Color 3']),
-            marker=dict(color=config.GRAPH_LINE_COLORS_PASTEL['Line Color 3'])
-        ))
-
-    if st.session_state.get("showEndgame") or dataType.lower() == "single team":
-        fig.add_trace(go.Scatter(
-            x=team_data['Team Match Number'],
-            y=team_data['Endgame Score'],
-            mode='lines+markers',
-            name='Endgame Score',
-            line=dict(shape='spline', color=config.GRAPH_LINE_COLORS_PASTEL['Line Color 4']),
-            marker=dict(color=config.GRAPH_LINE_COLORS_PASTEL['Line Color 4'])
+            name=column,
+            line=dict(shape='spline', color=config.GRAPH_LINE_COLORS_PASTEL[color]),
+            marker=dict(color=config.GRAPH_LINE_COLORS_PASTEL[color])
         ))
 
     fig.update_layout(
-        showlegend=st.session_state.get("showLegend"),
+        showlegend=show_legend,
         legend=dict(groupclick="toggleitem"),
         xaxis_title="Match Number",
         yaxis_title="Score",
@@ -98,7 +265,25 @@ def plot_team_scores(team_number, show_table=False, dataType=""):
         margin=dict(l=0, r=0, t=25, b=0),
         font_color="#F4B40B"
     )
-    
+    return fig.to_json()
+
+# Generate score trend visualization and optional detailed tables for a team
+def plot_team_scores(team_number, show_table=False, dataType="", chart_key=None):
+    # Always show all scores in single team view
+    phases = tuple(
+        column for key, column, _ in SCORE_TRACES
+        if st.session_state.get(key) or dataType.lower() == "single team"
+    )
+    spec = team_figure_spec(
+        team_number, st.session_state.comp, phases, st.session_state.get("showLegend"), data_generation()
+    )
+    if spec is None:
+        st.error("Please enter a valid team number.")
+        return
+
+    # The spec was validated when it was built, so skip validating it again
+    fig = go.Figure(json.loads(spec), _validate=False)
+
     if dataType.lower() == "single team":
         configs={'modeBarButtonsToAdd': ['drawline',
                                         'drawopenpath',
@@ -112,15 +297,20 @@ def plot_team_scores(team_number, show_table=False, dataType=""):
 
     # Display the plot
     st.markdown(f":material/area_chart: **Team {team_number} Score Trend**")
-    st.plotly_chart(fig, config=configs)
+    st.plotly_chart(fig, config=configs, key=chart_key)
 
     # Show detailed breakdown tables for single team view
     if show_table:
         # Fetch pit scouting data
+        conn = get_connection()
         pit_data = sql_to_df(
             f'SELECT * FROM "Pit Scouting" WHERE "Team #" = {team_number} AND `Event Name` = "{st.session_state.comp}"',
             conn
         )
+        conn.close()
+
+        # Fetch all matches for the team, ordered chronologically
+        team_data = load_team_matches(team_number)
 
         # Clean up match data
         team_data.drop(columns='Scouter Initials', inplace=True, errors='ignore')
@@ -162,10 +352,9 @@ def plot_team_scores(team_number, show_table=False, dataType=""):
         # Ensure pit data column names are strings for serialization
         pit_data.columns = pit_data.columns.astype(str)
 
-        team_avgs = sql_to_df(
-            f'SELECT {", ".join([f"`{col}`" for col in config.RANK_COLUMNS])} FROM "Calcs" WHERE `Team Number` = {team_number} AND `Event Name` = "{st.session_state.comp}"',
-            conn)
-        
+        calc_df = load_calcs()
+        team_avgs = calc_df.loc[calc_df["Team Number"] == team_number, config.RANK_COLUMNS].reset_index(drop=True)
+
         team_avgs.drop(columns=['Event Key'], inplace=True, errors='ignore')
 
         # Display phase breakdowns
@@ -179,12 +368,134 @@ def plot_team_scores(team_number, show_table=False, dataType=""):
         st.dataframe(team_avgs.transpose())
         st.markdown(":material/partner_exchange: **Pit Data**")
         st.dataframe(pit_data)
-    
+
+# ============================================================================
+# RANK HISTORY
+# ============================================================================
+
+# Event Key a competition's Calcs history is stored under
+def event_key_for(comp):
+    for event in config.EVENTS.values():
+        if event["Name"] == comp:
+            return event["Event Key"]
+    return comp
+
+# A team's rankings at every stored Calcs version of the competition
+@st.cache_data(show_spinner=False)
+def rank_history(team_number, comp, generation):
+    import calcs_history
+    return calcs_history.metric_series(event_key_for(comp), team_number, config.RANK_HISTORY_COLUMNS)
+
+# Step chart of how a team's rankings moved over the refreshes of the competition
+def plot_rank_history(team_number):
+    history = rank_history(team_number, st.session_state.comp, data_generation())
+    if history.empty:
+        return
+
+    st.markdown(f":material/trending_up: **Team {team_number} Rank Movement**")
+    if len(history) < 2:
+        st.caption("Rank movement appears once the data has been refreshed with new results.")
+        return
+
+    fig = go.Figure()
+    for i, column in enumerate(config.RANK_HISTORY_COLUMNS):
+        color = config.GRAPH_LINE_COLORS_PASTEL[f"Line Color {i % len(config.GRAPH_LINE_COLORS_PASTEL) + 1}"]
+        fig.add_trace(go.Scatter(
+            x=history["Created At"],
+            y=history[column],
+            mode="lines+markers",
+            name=column,
+            line=dict(shape="hv", color=color),
+            marker=dict(color=color)
+        ))
+    fig.update_layout(
+        xaxis_title="Refreshed At",
+        yaxis_title="Rank",
+        # Rank 1 at the top
+        yaxis=dict(autorange="reversed"),
+        margin=dict(l=0, r=0, t=25, b=0),
+        font_color="#F4B40B"
+    )
+    st.plotly_chart(fig)
+
+def sql_to_df(query, conn, params=None):
+    import pandas as pd
+    return pd.read_sql(query, conn, params=params)
+
+# ============================================================================
+# RADAR CHART DATA
+# ============================================================================
+
+# Normalization modes for the radar chart and the radial axis range each one uses
+RADAR_MODES = {
+    "Max Scaled": (0, 100),
+    "Percentile": (0, 100),
+    "Z-Score": (-3, 3),
+}
+
+def _radar_sources():
+    return list(config.RADAR_CHART_CONFIG['columns'].values())
+
+def _to_numeric(series):
+    import pandas as pd
+    return pd.to_numeric(series, errors="coerce")
+
+# Distribution of every radar source column across the event's teams, computed
+# once per event, refresh and radar config so normalization never needs a DB rebuild
+@st.cache_data(show_spinner=False)
+def radar_reference(comp, generation, source_columns):
+    import numpy as np
+    conn = get_connection(comp, generation)
+    columns = ", ".join(f'"{col}"' for col in source_columns)
+    df = sql_to_df(f'SELECT {columns} FROM "Calcs" WHERE "Event Name" = ?', conn, params=(comp,))
     conn.close()
+    values = df.apply(_to_numeric).to_numpy(dtype=float)
+    return {
+        "max": np.nanmax(values, axis=0, initial=0.0),
+        "mean": np.nanmean(values, axis=0) if len(values) else np.zeros(len(source_columns)),
+        "std": np.nanstd(values, axis=0) if len(values) else np.zeros(len(source_columns)),
+        "sorted": np.sort(values, axis=0),
+    }
 
-def sql_to_df(query, conn):
+# Radar values for the selected teams, indexed by team number in the order given
+# (a team entered twice appears once).
+# Only the selected teams are read (one parameterized query); normalization is
+# vectorized against the cached reference distribution.
+def load_radar_data(team_numbers, mode="Max Scaled"):
+    import numpy as np
     import pandas as pd
-    return pd.read_sql(query, conn)
+    norm_columns = list(config.RADAR_CHART_CONFIG['columns'].keys())
+    source_columns = _radar_sources()
+    if not team_numbers:
+        return pd.DataFrame(columns=norm_columns)
+
+    conn = get_connection()
+    columns = ", ".join(f'"{col}"' for col in source_columns)
+    placeholders = ", ".join("?" for _ in team_numbers)
+    rows = sql_to_df(
+        f'SELECT "Team Number", {columns} FROM "Calcs" WHERE "Event Name" = ? AND "Team Number" IN ({placeholders})',
+        conn,
+        params=[st.session_state.comp] + list(team_numbers)
+    )
+    conn.close()
+
+    reference = radar_reference(st.session_state.comp, data_generation(), tuple(source_columns))
+    values = rows[source_columns].apply(_to_numeric).to_numpy(dtype=float)
+
+    if mode == "Percentile":
+        ranked = reference["sorted"]
+        counts = (ranked[None, :, :] <= values[:, None, :]).sum(axis=1)
+        valid = np.maximum((~np.isnan(ranked)).sum(axis=0), 1)
+        scaled = counts / valid * 100
+    elif mode == "Z-Score":
+        std = reference["std"]
+        scaled = np.divide(values - reference["mean"], std, out=np.zeros_like(values), where=std > 0)
+    else:
+        peak = reference["max"]
+        scaled = np.divide(values * 100, peak, out=np.zeros_like(values), where=peak > 0)
+
+    result = pd.DataFrame(np.nan_to_num(scaled), columns=norm_columns, index=rows["Team Number"].astype(int))
+    return result.reindex(list(dict.fromkeys(team for team in team_numbers if team in result.index)))
 
 def init_session_state():
     default_states = {